@@ -1,31 +1,161 @@
+import config
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import r2_score
 import joblib
+import json
+import math
 import os
-from dotenv import load_dotenv
-import google.generativeai as genai
-from typing import Dict, Any
+import time
+from typing import Dict, Any, List
+from inference_transform import InferenceTransform
+from compiled_forest import CompiledForest
+from prediction_table import PredictionTable, PRESSURE_LEVELS
+from prediction_cache import PredictionCache
+from prediction_coalescer import PredictionCoalescer
+from inference_pool import InferencePool
+import multiprocessing
+import threading
+from concurrent.futures import BrokenExecutor, CancelledError
+from model_bundle import BUNDLE_FILENAME, read_bundle, write_bundle
+from llm_client import llm_client
+from llm_resilience import fallback_text
+
+DEFAULT_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+FOREST_PARAMS_FILENAME = 'forest_params.json'
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    divisor = 1024 * 1024 if os.uname().sysname == 'Darwin' else 1024
+    return round(peak / divisor, 1)
 
 class FarmingAnalyzer:
-    def __init__(self):
+    # Plot size definitions and modifiers
+    PLOT_SIZES = {
+        'Small': {
+            'min_size': 75,  # square feet
+            'max_size': 100,
+            'yield_modifier': 0.85,  # slightly lower yield due to less efficient use of space
+            'success_modifier': 1.1   # higher success rate due to easier management
+        },
+        'Medium': {
+            'min_size': 100,  # square meters
+            'max_size': 320,
+            'yield_modifier': 1.0,    # baseline yield
+            'success_modifier': 1.0    # baseline success rate
+        },
+        'Large': {
+            'min_size': 320,  # square meters
+            'max_size': 800,
+            'yield_modifier': 1.15,   # higher yield due to economies of scale
+            'success_modifier': 0.9    # slightly lower success rate due to management complexity
+        }
+    }
+
+    # Seasonal base values
+    SEASONAL_DATA = {
+        'Summer': {
+            'Rainfall_mm': 600,
+            'Avg_Temp_C': 34,
+            'Soil_Moisture_Percentage': 65,
+            'Growing_Days': 125,
+            'base_yield_modifier': 1.0
+        },
+        'Winter': {
+            'Rainfall_mm': 300,
+            'Avg_Temp_C': 18,
+            'Soil_Moisture_Percentage': 75,
+            'Growing_Days': 150,
+            'base_yield_modifier': 0.8
+        },
+        'Spring': {
+            'Rainfall_mm': 450,
+            'Avg_Temp_C': 25,
+            'Soil_Moisture_Percentage': 70,
+            'Growing_Days': 135,
+            'base_yield_modifier': 1.2
+        },
+        'Fall': {
+            'Rainfall_mm': 350,
+            'Avg_Temp_C': 22,
+            'Soil_Moisture_Percentage': 68,
+            'Growing_Days': 140,
+            'base_yield_modifier': 0.9
+        }
+    }
+
+    # Monthly adjustments
+    MONTHLY_MODIFIERS = {
+        'January': {'temp': -2, 'moisture': +5, 'yield': 0.85},
+        'February': {'temp': -1, 'moisture': +5, 'yield': 0.9},
+        'March': {'temp': +1, 'moisture': +3, 'yield': 1.1},
+        'April': {'temp': +2, 'moisture': +2, 'yield': 1.15},
+        'May': {'temp': +3, 'moisture': 0, 'yield': 1.2},
+        'June': {'temp': +4, 'moisture': -2, 'yield': 1.1},
+        'July': {'temp': +5, 'moisture': -5, 'yield': 1.0},
+        'August': {'temp': +5, 'moisture': -7, 'yield': 0.95},
+        'September': {'temp': +3, 'moisture': -3, 'yield': 0.9},
+        'October': {'temp': +1, 'moisture': 0, 'yield': 0.85},
+        'November': {'temp': -1, 'moisture': +2, 'yield': 0.8},
+        'December': {'temp': -2, 'moisture': +4, 'yield': 0.8}
+    }
+
+    MONTHS = ['January', 'February', 'March', 'April', 'May', 'June',
+              'July', 'August', 'September', 'October', 'November', 'December']
+
+    # Per-tree quantiles reported with intervals=True predictions
+    INTERVAL_QUANTILES = (0.05, 0.5, 0.95)
+    MAX_INTERVAL_QUANTILES = 20
+
+    # Forest used by the training methods unless tuned parameters are configured
+    DEFAULT_FOREST_PARAMS = {'n_estimators': 100, 'random_state': 42}
+
+    # Model inputs, in training column order
+    NUMERICAL_FEATURES = ['Rainfall_mm', 'Avg_Temp_C', 'Soil_Moisture_Percentage',
+                          'Growing_Days', 'Soil_pH', 'Fertilizer_Usage_kg_per_ha']
+    CATEGORICAL_FEATURES = ['Season', 'Drought_Status', 'Pest_Pressure', 'Disease_Pressure']
+    FEATURES = NUMERICAL_FEATURES + CATEGORICAL_FEATURES
+
+    def __init__(self, model_dir=None, forest_params=None):
+        self.model_dir = model_dir or os.getenv('MODEL_DIR', DEFAULT_MODEL_DIR)
+        self.forest_params = forest_params or self.load_forest_params()
+        self.model_version = None
+        self.model_bundle = None
         self.model = None
         self.scaler = StandardScaler()
         self.label_encoders = {}
         self.target_scaler = StandardScaler()
-        
-        # Load environment variables
-        load_dotenv()
-        google_api_key = os.getenv('GOOGLE_API_KEY')
-        
-        # Initialize Gemini AI if API key is set
-        if google_api_key:
-            genai.configure(api_key=google_api_key)
-            self.genai_model = genai.GenerativeModel('gemini-1.5-flash')
-        else:
-            self.genai_model = None
+        self.inference_transform = None
+        self.forest = None
+        self.prediction_table = None
+        self.inference_pool = None
+        self.prediction_cache = PredictionCache(int(os.getenv('PREDICTION_CACHE_SIZE', '4096')))
+
+        # Concurrent cache misses are micro-batched into one forest call when a window is configured
+        coalesce_window_ms = float(os.getenv('PREDICTION_COALESCE_WINDOW_MS') or 0)
+        self.coalescer = None
+        if coalesce_window_ms > 0:
+            self.coalescer = PredictionCoalescer(
+                self._score_batch,
+                window_ms=coalesce_window_ms,
+                max_batch=int(os.getenv('PREDICTION_COALESCE_MAX_BATCH', '64'))
+            )
+
+        # Gemini client shared by all services
+        self.llm = llm_client
 
     def _load_training_data(self):
         """Simulate loading historical data from CSV"""
@@ -62,6 +192,7 @@ class FarmingAnalyzer:
 
 
     def preprocess_data(self, df):
+        """Fit the label encoders and scaler on training data; serving uses InferenceTransform"""
         categorical_columns = ['Season', 'Drought_Status', 'Pest_Pressure', 
                                'Disease_Pressure', 'Season_Quality', 'Planting_Month', 
                                'Harvest_Month']
@@ -97,8 +228,9 @@ class FarmingAnalyzer:
                                                             test_size=0.2,
                                                             random_state=42)
 
-        self.model = RandomForestRegressor(n_estimators=100, random_state=42)
+        self.model = RandomForestRegressor(**self.forest_params)
         self.model.fit(X_train, y_train)
+        self.compile_inference()
 
         self.save_model()
 
@@ -125,8 +257,9 @@ class FarmingAnalyzer:
                                                             test_size=0.2,
                                                             random_state=42)
 
-        self.model = RandomForestRegressor(n_estimators=100, random_state=42)
+        self.model = RandomForestRegressor(**self.forest_params)
         self.model.fit(X_train, y_train)
+        self.compile_inference()
 
         self.save_model()
 
@@ -134,9 +267,151 @@ class FarmingAnalyzer:
         print(f"Model trained successfully with score: {score:.3f}")
         return score
 
+    @property
+    def forest_params_path(self):
+        return os.path.join(self.model_dir, FOREST_PARAMS_FILENAME)
+
+    def load_forest_params(self) -> Dict[str, Any]:
+        """Tuned forest parameters from the model directory, else the defaults"""
+        params = dict(self.DEFAULT_FOREST_PARAMS)
+        if os.path.exists(self.forest_params_path):
+            with open(self.forest_params_path) as f:
+                params.update(json.load(f))
+        return params
+
+    def _read_chunks(self, data_path, columns, chunksize):
+        """Stream a CSV or Parquet file/directory with typed columns: float32 numerics, categorical strings"""
+        dtypes = {column: np.float32 for column in columns if column not in self.CATEGORICAL_FEATURES}
+        dtypes.update({column: 'category' for column in columns if column in self.CATEGORICAL_FEATURES})
+        if os.path.isdir(data_path) or data_path.endswith('.parquet'):
+            import pyarrow.dataset as ds
+
+            dataset = ds.dataset(data_path, format='parquet')
+            for batch in dataset.to_batches(columns=columns, batch_size=chunksize):
+                yield batch.to_pandas().astype(dtypes).dropna()
+            return
+
+        for chunk in pd.read_csv(data_path, usecols=columns, dtype=dtypes, chunksize=chunksize):
+            yield chunk.dropna()
+
+    def train_model_streaming(self, data_path: str, target=None, chunksize: int = 100_000,
+                              sample_fraction: float = 1.0, n_estimators: int = None,
+                              test_fraction: float = 0.2, max_test_rows: int = 200_000,
+                              n_jobs: int = -1, random_state: int = 42) -> Dict[str, Any]:
+        """Train on a CSV or Parquet dataset too large for memory.
+
+        A first pass streams the file to fit the scalers and category sets. A
+        second pass splits the rows into blocks and grows each block's share of
+        trees on it (warm start). Blocks are sized so every round fits at least
+        one tree per n_jobs worker, keeping all cores busy. Only one block is in
+        memory at a time; rows can be subsampled with sample_fraction. Returns a report with the held-out R²,
+        wall-clock time per pass and peak memory.
+        """
+        if not 0 < sample_fraction <= 1:
+            raise ValueError("sample_fraction must be in (0, 1]")
+
+        target = target or ['Yield_Tons_Per_Hectare', 'Success_Rating']
+        n_estimators = n_estimators or self.forest_params.get('n_estimators', 100)
+        tree_params = {name: value for name, value in self.forest_params.items()
+                       if name not in ('n_estimators', 'random_state', 'n_jobs', 'warm_start')}
+        columns = self.FEATURES + list(target)
+        rng = np.random.default_rng(random_state)
+        started = time.perf_counter()
+
+        # Pass 1: scaler statistics and category sets
+        print(f"Scanning {data_path} for preprocessing statistics...")
+        self.scaler = StandardScaler()
+        self.target_scaler = StandardScaler()
+        categories = {column: set() for column in self.CATEGORICAL_FEATURES}
+        n_rows = 0
+        for chunk in self._read_chunks(data_path, columns, chunksize):
+            if chunk.empty:
+                continue
+            n_rows += len(chunk)
+            self.scaler.partial_fit(chunk[self.NUMERICAL_FEATURES])
+            self.target_scaler.partial_fit(chunk[target])
+            for column in self.CATEGORICAL_FEATURES:
+                categories[column].update(chunk[column].cat.categories)
+        if n_rows == 0:
+            raise ValueError(f"No usable rows in {data_path}")
+
+        self.label_encoders = {}
+        for column, labels in categories.items():
+            self.label_encoders[column] = LabelEncoder().fit(sorted(labels))
+        codes = {column: {label: code for code, label in enumerate(encoder.classes_)}
+                 for column, encoder in self.label_encoders.items()}
+        scan_seconds = time.perf_counter() - started
+
+        # Pass 2: grow the forest block by block. A warm-start fit only parallelises
+        # across the trees it adds, so each block gets at least one tree per worker
+        trees_per_block = min(n_estimators, joblib.effective_n_jobs(n_jobs))
+        block_rows = max(chunksize, math.ceil(n_rows / (n_estimators // trees_per_block)))
+        n_blocks = math.ceil(n_rows / block_rows)
+        print(f"Training {n_estimators} trees on {n_rows} rows in {n_blocks} blocks...")
+
+        self.model = RandomForestRegressor(n_estimators=0, warm_start=True, n_jobs=n_jobs,
+                                           random_state=random_state, **tree_params)
+        X_test, y_test = [], []
+        test_rows = 0
+        trained_rows = 0
+        for block, chunk in enumerate(self._read_chunks(data_path, columns, block_rows)):
+            if sample_fraction < 1:
+                chunk = chunk[rng.random(len(chunk)) < sample_fraction]
+            held_out = rng.random(len(chunk)) < test_fraction
+            if chunk.empty:
+                continue
+
+            X = chunk[self.FEATURES].copy()
+            X[self.NUMERICAL_FEATURES] = self.scaler.transform(X[self.NUMERICAL_FEATURES])
+            for column in self.CATEGORICAL_FEATURES:
+                X[column] = X[column].astype(object).map(codes[column]).astype(np.float32)
+            y = self.target_scaler.transform(chunk[target])
+
+            if held_out.any() and test_rows < max_test_rows:
+                keep = np.flatnonzero(held_out)[:max_test_rows - test_rows]
+                X_test.append(X.iloc[keep])
+                y_test.append(y[keep])
+                test_rows += len(keep)
+
+            # Rows dropped by the reader can add a trailing block; it gets no trees
+            trees = min(((block + 1) * n_estimators) // n_blocks - (block * n_estimators) // n_blocks,
+                        n_estimators - self.model.n_estimators)
+            if trees <= 0 or (~held_out).sum() == 0:
+                continue
+            self.model.n_estimators += trees
+            self.model.fit(X[~held_out], y[~held_out])
+            trained_rows += int((~held_out).sum())
+
+        if not hasattr(self.model, 'estimators_'):
+            raise ValueError("No training rows left after subsampling")
+        train_seconds = time.perf_counter() - started - scan_seconds
+
+        score = None
+        if X_test:
+            score = r2_score(np.concatenate(y_test), self.model.predict(pd.concat(X_test)))
+
+        self.compile_inference()
+        report = {
+            'rows': n_rows,
+            'trained_rows': trained_rows,
+            'test_rows': test_rows,
+            'blocks': n_blocks,
+            'n_estimators': self.model.n_estimators,
+            'score': score,
+            'scan_seconds': round(scan_seconds, 2),
+            'train_seconds': round(train_seconds, 2),
+            'wall_clock_seconds': round(time.perf_counter() - started, 2),
+            'peak_rss_mb': peak_rss_mb()
+        }
+        self.save_model(metadata={'training': report})
+
+        print(f"Model trained on {trained_rows} rows in {report['wall_clock_seconds']}s "
+              f"(peak RSS {report['peak_rss_mb']} MB), score: {score}")
+        return report
+
     def get_ai_recommendations(self, input_data: Dict[str, Any], prediction: Dict[str, float]) -> str:
         """Get personalized recommendations from Gemini AI"""
-        if not self.genai_model:
+        if not self.llm.available:
             return "AI recommendations not available - API key not configured."
 
         prompt = f"""
@@ -187,88 +462,76 @@ class FarmingAnalyzer:
 
     
         try:
-            response = self.genai_model.generate_content(prompt)
-            return response.text
+            return self.llm.generate(prompt, call_site='farming.recommendations',
+                                     fallback=lambda: self._fallback_recommendations(input_data, prediction))
         except Exception as e:
             return f"Unable to get AI recommendations: {str(e)}"
 
 
-    def predict(self, input_data: Dict[str, Any]) -> Dict[str, float]:
-        # Plot size definitions and modifiers
-        plot_sizes = {
-            'Small': {
-                'min_size': 75,  # square feet
-                'max_size': 100,
-                'yield_modifier': 0.85,  # slightly lower yield due to less efficient use of space
-                'success_modifier': 1.1   # higher success rate due to easier management
-            },
-            'Medium': {
-                'min_size': 100,  # square meters
-                'max_size': 320,
-                'yield_modifier': 1.0,    # baseline yield
-                'success_modifier': 1.0    # baseline success rate
-            },
-            'Large': {
-                'min_size': 320,  # square meters
-                'max_size': 800,
-                'yield_modifier': 1.15,   # higher yield due to economies of scale
-                'success_modifier': 0.9    # slightly lower success rate due to management complexity
-            }
-        }
+    def _fallback_recommendations(self, input_data: Dict[str, Any], prediction: Dict[str, float]) -> str:
+        """Guidance from the predicted yield and success rating, used when Gemini is down"""
+        rating = prediction['success_rating']
+        if rating >= 7:
+            outlook = "Conditions look favourable: follow standard practice and protect the expected yield."
+        elif rating >= 4:
+            outlook = "Moderate risk: monitor soil moisture closely and scout weekly for pests and disease."
+        else:
+            outlook = "High risk: consider a drought-tolerant variety, a smaller planted area or a different harvest month."
+        return fallback_text(
+            f"{input_data['plant_type']} in {input_data['location']} ({input_data['plot_size']} plot):",
+            [
+                f"Predicted yield: {prediction['yield_prediction']} tons per hectare",
+                f"Success rating: {rating}/10",
+                outlook
+            ]
+        )
 
-        # Seasonal base values
-        seasonal_data = {
-            'Summer': {
-                'Rainfall_mm': 600,
-                'Avg_Temp_C': 34,
-                'Soil_Moisture_Percentage': 65,
-                'Growing_Days': 125,
-                'base_yield_modifier': 1.0
-            },
-            'Winter': {
-                'Rainfall_mm': 300,
-                'Avg_Temp_C': 18,
-                'Soil_Moisture_Percentage': 75,
-                'Growing_Days': 150,
-                'base_yield_modifier': 0.8
-            },
-            'Spring': {
-                'Rainfall_mm': 450,
-                'Avg_Temp_C': 25,
-                'Soil_Moisture_Percentage': 70,
-                'Growing_Days': 135,
-                'base_yield_modifier': 1.2
-            },
-            'Fall': {
-                'Rainfall_mm': 350,
-                'Avg_Temp_C': 22,
-                'Soil_Moisture_Percentage': 68,
-                'Growing_Days': 140,
-                'base_yield_modifier': 0.9
-            }
-        }
+    # Inputs that take arbitrary numbers; numeric strings (form values) are accepted
+    NUMERIC_INPUTS = ('soil_ph', 'fertilizer_usage', 'plot_size_value')
 
-        # Monthly adjustments
-        monthly_modifiers = {
-            'January': {'temp': -2, 'moisture': +5, 'yield': 0.85},
-            'February': {'temp': -1, 'moisture': +5, 'yield': 0.9},
-            'March': {'temp': +1, 'moisture': +3, 'yield': 1.1},
-            'April': {'temp': +2, 'moisture': +2, 'yield': 1.15},
-            'May': {'temp': +3, 'moisture': 0, 'yield': 1.2},
-            'June': {'temp': +4, 'moisture': -2, 'yield': 1.1},
-            'July': {'temp': +5, 'moisture': -5, 'yield': 1.0},
-            'August': {'temp': +5, 'moisture': -7, 'yield': 0.95},
-            'September': {'temp': +3, 'moisture': -3, 'yield': 0.9},
-            'October': {'temp': +1, 'moisture': 0, 'yield': 0.85},
-            'November': {'temp': -1, 'moisture': +2, 'yield': 0.8},
-            'December': {'temp': -2, 'moisture': +4, 'yield': 0.8}
-        }
+    def normalize_input(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Validated copy of one request with its numeric inputs as floats; raises ValueError.
 
+        Every prediction path (cache, grid table, coalescer, forest) sees the
+        normalized form, so a request is accepted or rejected the same way
+        whichever path serves it.
+        """
+        if not isinstance(input_data, dict):
+            raise ValueError(f"Prediction input must be an object, got {type(input_data).__name__}")
+
+        normalized = dict(input_data)
+        for name in self.NUMERIC_INPUTS:
+            if name not in normalized:
+                continue
+            value = normalized[name]
+            if value is None or value == '':
+                # Unset form fields fall back to the defaults
+                del normalized[name]
+                continue
+            if isinstance(value, bool):
+                raise ValueError(f"{name} must be a number, got {value!r}")
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} must be a number, got {value!r}")
+            if not math.isfinite(value):
+                raise ValueError(f"{name} must be finite, got {value!r}")
+            normalized[name] = value
+
+        for name, known in (('season', self.SEASONAL_DATA), ('plot_size', self.PLOT_SIZES),
+                            ('harvest_month', self.MONTHLY_MODIFIERS)):
+            value = normalized.get(name)
+            if name in normalized and (not isinstance(value, str) or value not in known):
+                raise ValueError(f"Unknown {name}: {value!r}")
+        return normalized
+
+    def _build_input_values(self, input_data: Dict[str, Any]):
+        """Resolve one request into model input values and its yield/success modifiers"""
         # Get plot size and season from input or use default
         plot_size = input_data.get('plot_size', 'Medium')
         season = input_data.get('season', 'Summer')
-        base_data = seasonal_data[season]
-        size_data = plot_sizes[plot_size]
+        base_data = self.SEASONAL_DATA[season]
+        size_data = self.PLOT_SIZES[plot_size]
 
         # Calculate size-specific resource requirements
         plot_size_actual = input_data.get('plot_size_value', (size_data['min_size'] + size_data['max_size']) / 2)
@@ -296,21 +559,21 @@ class FarmingAnalyzer:
             'Fertilizer_Usage_kg_per_ha': actual_fertilizer
         }
 
+        month_yield_modifier = 1.0
+
         # Apply monthly adjustments if harvest month is provided
         if 'harvest_month' in input_data:
             harvest_month = input_data['harvest_month']
-            monthly_mod = monthly_modifiers[harvest_month]
+            monthly_mod = self.MONTHLY_MODIFIERS[harvest_month]
             
             # Adjust temperature and moisture based on month
             input_values['Avg_Temp_C'] += monthly_mod['temp']
             input_values['Soil_Moisture_Percentage'] += monthly_mod['moisture']
             
             # Calculate planting month
-            months = ['January', 'February', 'March', 'April', 'May', 'June',
-                    'July', 'August', 'September', 'October', 'November', 'December']
-            harvest_idx = months.index(harvest_month)
+            harvest_idx = self.MONTHS.index(harvest_month)
             planting_idx = (harvest_idx - 4) % 12
-            planting_month = months[planting_idx]
+            planting_month = self.MONTHS[planting_idx]
             
             input_values['Harvest_Month'] = harvest_month
             input_values['Planting_Month'] = planting_month
@@ -318,34 +581,8 @@ class FarmingAnalyzer:
             # Adjust growing days based on season and month
             input_values['Growing_Days'] = int(base_data['Growing_Days'] * 
                                             (monthly_mod['yield'] * 0.9 + 0.1))
+            month_yield_modifier = monthly_mod['yield']
 
-        # Create DataFrame
-        input_df = pd.DataFrame([input_values])
-        
-        # Process input and make prediction
-        input_processed = self.preprocess_data(input_df)
-        prediction_scaled = self.model.predict(input_processed[self.model.feature_names_in_])
-        base_prediction = self.target_scaler.inverse_transform(prediction_scaled)
-        
-        # Apply plot size, seasonal and monthly yield modifiers
-        final_yield = (base_prediction[0][0] * 
-                    base_data['base_yield_modifier'] * 
-                    size_data['yield_modifier'])
-        
-        if 'harvest_month' in input_data:
-            final_yield *= monthly_modifiers[harvest_month]['yield']
-        
-        # Calculate success rating based on conditions
-        success_rating = base_prediction[0][1] * size_data['success_modifier']
-        
-        # Adjust success rating based on environmental factors
-        if input_values['Drought_Status'] == 'High':
-            success_rating *= 0.8
-        if input_values['Pest_Pressure'] == 'High':
-            success_rating *= 0.85
-        if input_values['Disease_Pressure'] == 'High':
-            success_rating *= 0.85
-        
         # Calculate total yield based on area
         if plot_size == 'Small':
             # Convert square feet to hectares for yield calculation
@@ -353,28 +590,313 @@ class FarmingAnalyzer:
         else:
             # Convert square meters to hectares for yield calculation
             area_in_hectares = plot_size_actual / 10000
-        
-        total_yield = final_yield * area_in_hectares
-        
-        return {
-            'yield_prediction': round(total_yield, 2),  # Total yield for the entire plot
-            'yield_per_hectare': round(final_yield, 2),  # Yield per hectare
-            'success_rating': round(min(max(success_rating, 0), 10), 1)
+
+        modifiers = {
+            'base_yield_modifier': base_data['base_yield_modifier'],
+            'size_yield_modifier': size_data['yield_modifier'],
+            'month_yield_modifier': month_yield_modifier,
+            'size_success_modifier': size_data['success_modifier'],
+            # Adjust success rating based on environmental factors
+            'drought_modifier': 0.8 if input_values['Drought_Status'] == 'High' else 1.0,
+            'pest_modifier': 0.85 if input_values['Pest_Pressure'] == 'High' else 1.0,
+            'disease_modifier': 0.85 if input_values['Disease_Pressure'] == 'High' else 1.0,
+            'area_in_hectares': area_in_hectares
         }
 
-    def save_model(self):
-        model_path = 'models/'
-        if not os.path.exists(model_path):
-            os.makedirs(model_path)
-            
-        joblib.dump(self.model, f'{model_path}farming_model.joblib')
-        joblib.dump(self.scaler, f'{model_path}scaler.joblib')
-        joblib.dump(self.label_encoders, f'{model_path}label_encoders.joblib')
-        joblib.dump(self.target_scaler, f'{model_path}target_scaler.joblib')
+        return input_values, modifiers
+
+    def _modified_outputs(self, base_prediction: np.ndarray, modifiers: List[Dict[str, float]]):
+        """Plot yield, yield per hectare and success rating from raw model output.
+
+        base_prediction is (n_rows, 2) forest means or (n_rows, n_trees, 2) per-tree outputs;
+        the per-row modifiers broadcast over the tree axis.
+        """
+        mods = {key: np.array([m[key] for m in modifiers], dtype=np.float64) for key in modifiers[0]}
+        if base_prediction.ndim == 3:
+            mods = {key: values[:, None] for key, values in mods.items()}
+
+        # Apply plot size, seasonal and monthly yield modifiers
+        final_yield = (base_prediction[..., 0] *
+                       mods['base_yield_modifier'] *
+                       mods['size_yield_modifier'])
+        final_yield = final_yield * mods['month_yield_modifier']
+
+        # Calculate success rating based on conditions
+        success_rating = base_prediction[..., 1] * mods['size_success_modifier']
+        success_rating = success_rating * mods['drought_modifier']
+        success_rating = success_rating * mods['pest_modifier']
+        success_rating = success_rating * mods['disease_modifier']
+
+        total_yield = final_yield * mods['area_in_hectares']
+        return total_yield, final_yield, np.clip(success_rating, 0, 10)
+
+    def _apply_modifiers(self, base_prediction: np.ndarray, modifiers: List[Dict[str, float]]) -> List[Dict[str, float]]:
+        """Apply plot size, seasonal and monthly modifiers to raw model output as array operations"""
+        total_yield, final_yield, success_rating = self._modified_outputs(base_prediction, modifiers)
+
+        yield_prediction = np.round(total_yield, 2).tolist()  # Total yield for the entire plot
+        yield_per_hectare = np.round(final_yield, 2).tolist()  # Yield per hectare
+        success = np.round(success_rating, 1).tolist()
+
+        return [
+            {
+                'yield_prediction': yield_prediction[i],
+                'yield_per_hectare': yield_per_hectare[i],
+                'success_rating': success[i]
+            }
+            for i in range(len(modifiers))
+        ]
+
+    def _prediction_intervals(self, per_tree_base: np.ndarray, modifiers: List[Dict[str, float]],
+                              quantiles) -> List[Dict[str, Dict[str, float]]]:
+        """Quantiles and standard deviation of every output across the trees"""
+        names = ('yield_prediction', 'yield_per_hectare', 'success_rating')
+        decimals = (2, 2, 1)
+        labels = [f'p{q * 100:g}' for q in quantiles]
+
+        # (outputs, rows, trees); the modifiers are applied per tree, before the statistics
+        outputs = np.stack(self._modified_outputs(per_tree_base, modifiers))
+        stats = np.quantile(outputs, quantiles, axis=2)
+        std = outputs.std(axis=2)
+
+        bands = []
+        for k, name in enumerate(names):
+            rounded = np.round(stats[:, k], decimals[k]).tolist()
+            bands.append((name, rounded, np.round(std[k], decimals[k]).tolist()))
+
+        return [
+            {
+                name: dict({label: rounded[j][i] for j, label in enumerate(labels)}, std=deviation[i])
+                for name, rounded, deviation in bands
+            }
+            for i in range(len(modifiers))
+        ]
+
+    def _predict_scaled(self, features: np.ndarray) -> np.ndarray:
+        """Scaled forest means, from the worker pool when one is running"""
+        pool = self.inference_pool
+        if pool is not None:
+            try:
+                return pool.predict(features)
+            except (RuntimeError, CancelledError, BrokenExecutor) as e:
+                # Pool shut down (model swapped out), task cancelled or a worker died: score in-process
+                print(f"Inference pool unavailable, predicting in-process: {e}")
+        return self.forest.predict(features)
+
+    def predict_batch(self, inputs: List[Dict[str, Any]], intervals: bool = False,
+                      quantiles=None) -> List[Dict[str, Any]]:
+        """Score many plots with one feature matrix and a single forest call.
+
+        With intervals=True every prediction also carries an 'intervals' entry with
+        per-tree quantiles (default 5th/50th/95th percentile) and the standard deviation
+        of each output, computed from the same forest pass as the mean.
+        """
+        quantiles = self._validate_quantiles(quantiles) if intervals else None
+        return self._score_batch([self.normalize_input(input_data) for input_data in inputs],
+                                 intervals=intervals, quantiles=quantiles)
+
+    @classmethod
+    def _validate_quantiles(cls, quantiles):
+        """Interval quantiles as floats in [0, 1]; None means INTERVAL_QUANTILES"""
+        if quantiles is None:
+            return None
+        if not isinstance(quantiles, (list, tuple)) or not quantiles:
+            raise ValueError("quantiles must be a non-empty list")
+        if len(quantiles) > cls.MAX_INTERVAL_QUANTILES:
+            raise ValueError(f"At most {cls.MAX_INTERVAL_QUANTILES} quantiles are allowed")
+        for q in quantiles:
+            if isinstance(q, bool) or not isinstance(q, (int, float)) or not 0 <= q <= 1:
+                raise ValueError(f"Quantiles must be numbers between 0 and 1, got {q!r}")
+        return [float(q) for q in quantiles]
+
+    def _score_batch(self, inputs: List[Dict[str, Any]], intervals: bool = False,
+                     quantiles=None) -> List[Dict[str, Any]]:
+        """predict_batch for inputs already passed through normalize_input"""
+        if not inputs:
+            return []
+
+        rows, modifiers = zip(*(self._build_input_values(input_data) for input_data in inputs))
+        modifiers = list(modifiers)
+
+        if self.forest is None:
+            if self.model is None:
+                raise RuntimeError("No model loaded - call load_model() or train a model first")
+            self.compile_inference()
+
+        # Encode and scale with the precompiled transform and score with the flattened forest
+        features = self.inference_transform.transform_rows(rows)
+        if not intervals:
+            prediction_scaled = self._predict_scaled(features)
+            base_prediction = self.inference_transform.inverse_target(prediction_scaled)
+            return self._apply_modifiers(base_prediction, modifiers)
+
+        per_tree = self.forest.predict_per_tree(features)
+        base_prediction = self.inference_transform.inverse_target(self.forest.mean(per_tree))
+        predictions = self._apply_modifiers(base_prediction, modifiers)
+
+        # The target scaling is linear, so it can be undone tree by tree
+        per_tree_base = self.inference_transform.inverse_target(per_tree)
+        bands = self._prediction_intervals(per_tree_base, modifiers, quantiles or self.INTERVAL_QUANTILES)
+        for prediction, band in zip(predictions, bands):
+            prediction['intervals'] = band
+        return predictions
+
+    SWEEP_RANK_KEYS = ('yield_prediction', 'yield_per_hectare', 'success_rating')
+
+    # The full month x season x drought grid; larger sweeps can only be repeats
+    MAX_SWEEP_SCENARIOS = 12 * 4 * len(PRESSURE_LEVELS)
+
+    @staticmethod
+    def _sweep_axis(name, values, known):
+        """Validate one sweep axis: a list of known values"""
+        if not isinstance(values, (list, tuple)) or not values:
+            raise ValueError(f"{name} must be a non-empty list")
+        for value in values:
+            if not isinstance(value, str) or value not in known:
+                raise ValueError(f"Unknown {name} value: {value!r}")
+        return list(values)
+
+    def sweep_scenarios(self, input_data: Dict[str, Any], months: List[str] = None, seasons: List[str] = None,
+                        drought_levels: List[str] = None, rank_by: str = 'yield_prediction') -> List[Dict[str, Any]]:
+        """Score every harvest month x season (x drought level) scenario for one plot in a
+        single forest pass; returns the scenarios ranked best first"""
+        if rank_by not in self.SWEEP_RANK_KEYS:
+            raise ValueError(f"rank_by must be one of {', '.join(self.SWEEP_RANK_KEYS)}")
+        months = self.MONTHS if months is None else self._sweep_axis('months', months, self.MONTHLY_MODIFIERS)
+        seasons = (list(self.SEASONAL_DATA) if seasons is None
+                   else self._sweep_axis('seasons', seasons, self.SEASONAL_DATA))
+        if drought_levels is not None:
+            drought_levels = self._sweep_axis('drought_levels', drought_levels, PRESSURE_LEVELS)
+
+        n_scenarios = len(months) * len(seasons) * len(drought_levels or [None])
+        if n_scenarios > self.MAX_SWEEP_SCENARIOS:
+            raise ValueError(f"Sweep has {n_scenarios} scenarios; at most {self.MAX_SWEEP_SCENARIOS} are allowed")
+
+        scenarios = []
+        for month in months:
+            for season in seasons:
+                for drought in drought_levels or [None]:
+                    scenario = {'harvest_month': month, 'season': season}
+                    if drought is not None:
+                        scenario['drought_status'] = drought
+                    scenarios.append(scenario)
+
+        predictions = self.predict_batch([dict(input_data, **scenario) for scenario in scenarios])
+        ranked = sorted(
+            (dict(scenario, **prediction) for scenario, prediction in zip(scenarios, predictions)),
+            key=lambda result: (result[rank_by], result['success_rating']),
+            reverse=True
+        )
+        for rank, result in enumerate(ranked, start=1):
+            result['rank'] = rank
+        return ranked
+
+    def predict(self, input_data: Dict[str, Any], intervals: bool = False, quantiles=None) -> Dict[str, Any]:
+        input_data = self.normalize_input(input_data)
+        if intervals:
+            # Bands need the per-tree outputs, which the cache and grid do not keep
+            return self._score_batch([input_data], intervals=True,
+                                     quantiles=self._validate_quantiles(quantiles))[0]
+
+        cache_key = self.prediction_cache.make_key(input_data)
+        if cache_key is not None:
+            prediction = self.prediction_cache.get(cache_key)
+            if prediction is not None:
+                return prediction
+
+        # Default-form requests are served from the precomputed grid
+        prediction = None
+        if self.prediction_table is not None:
+            prediction = self.prediction_table.lookup(input_data)
+        if prediction is None:
+            if self.coalescer is not None:
+                prediction = self.coalescer.predict(input_data)
+            else:
+                prediction = self._score_batch([input_data])[0]
+
+        if cache_key is not None:
+            self.prediction_cache.put(cache_key, prediction)
+        return prediction
+
+    @property
+    def bundle_path(self):
+        return os.path.join(self.model_dir, BUNDLE_FILENAME)
+
+    def save_model(self, metadata=None):
+        """Write the forest, preprocessing state and feature schema as one bundle file"""
+        if self.inference_transform is None or self.forest is None:
+            self.compile_inference()
+
+        header = write_bundle(self.bundle_path, self.forest, self.inference_transform, metadata)
+        self.model_version = header['metadata']['model_version']
+        return header
 
     def load_model(self):
-        model_path = 'models/'
-        self.model = joblib.load(f'{model_path}farming_model.joblib')
-        self.scaler = joblib.load(f'{model_path}scaler.joblib')
-        self.label_encoders = joblib.load(f'{model_path}label_encoders.joblib')
-        self.target_scaler = joblib.load(f'{model_path}target_scaler.joblib')
+        """Load the model bundle, falling back to the legacy per-artifact joblib files"""
+        if not os.path.exists(self.bundle_path):
+            self.load_legacy_model()
+            return
+
+        bundle = read_bundle(self.bundle_path)
+        self.model_bundle = bundle
+        self.model = None
+        self.inference_transform = bundle.transform
+        self.forest = bundle.forest
+        self.model_version = bundle.model_version
+        self._prepare_serving()
+
+    def load_legacy_model(self):
+        """Load the four joblib artifacts written before the bundle format existed"""
+        model_path = self.model_dir
+        self.model = joblib.load(os.path.join(model_path, 'farming_model.joblib'))
+        self.scaler = joblib.load(os.path.join(model_path, 'scaler.joblib'))
+        self.label_encoders = joblib.load(os.path.join(model_path, 'label_encoders.joblib'))
+        self.target_scaler = joblib.load(os.path.join(model_path, 'target_scaler.joblib'))
+        self.model_bundle = None
+        self.model_version = 'legacy'
+        self.compile_inference()
+
+    def compile_inference(self):
+        """Build the inference-only transform and flattened forest from the trained artifacts"""
+        self.inference_transform = InferenceTransform.from_fitted(self.model.feature_names_in_, self.scaler,
+                                                                  self.label_encoders, self.target_scaler)
+        self.forest = CompiledForest.from_sklearn(self.model)
+        self._prepare_serving()
+
+    def _prepare_serving(self):
+        """Rebuild the state derived from the active artifacts"""
+        # The old pool's workers still hold the previous forest; the table below
+        # must be scored in-process against the new one
+        self.close_inference_pool()
+
+        self.prediction_table = PredictionTable.build(self)
+        # Results memoized for the previous artifacts are no longer valid
+        self.prediction_cache.clear()
+
+        n_workers = int(os.getenv('INFERENCE_WORKERS') or 0)
+        # Pool workers re-import the main module; never start a pool from inside one
+        if n_workers > 0 and multiprocessing.parent_process() is None:
+            try:
+                self.start_inference_pool(n_workers)
+            except Exception as e:
+                print(f"Could not start inference pool, predicting in-process: {e}")
+
+    def start_inference_pool(self, n_workers=None):
+        """Serve forest inference from worker processes sharing one copy of the model"""
+        pool = InferencePool(self.forest, n_workers)
+        try:
+            pool.warm_up()
+        except Exception:
+            pool.close(wait=False, drain=False)
+            raise
+        self.inference_pool = pool
+        print(f"Inference pool started: {pool.n_workers} workers, "
+              f"{pool.shared_bytes / 1024 / 1024:.1f} MB shared")
+        return pool
+
+    def close_inference_pool(self):
+        """Stop the pool in the background, letting requests already queued on it finish"""
+        pool, self.inference_pool = self.inference_pool, None
+        if pool is not None:
+            threading.Thread(target=pool.close, name='inference-pool-close', daemon=True).start()
+
@@ -1,5 +1,7 @@
+import config
+import json
 import os
-from flask import Flask, render_template, redirect, request, url_for, jsonify, session
+from flask import Flask, render_template, redirect, request, url_for, jsonify, session, Response, stream_with_context
 from FarmingAnalysis import FarmingAnalyzer
 from imageAnalysis import process_image_with_gemini
 from image_handler import save_image
@@ -10,8 +12,56 @@ from market_service import market_service
 from planting_calendar import planting_service
 from resource_calculator import resource_calculator
 from community_service import community_service
+from database import db_manager
+from startup import StartupManager
+from model_registry import ModelRegistry
+from llm_client import llm_client
+from llm_rate_limiter import LLMBackpressure
+
+
+def sse_event(data, event=None):
+    """One Server-Sent Events frame; data is JSON-encoded so newlines survive"""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data, default=str)}\n\n"
+
+
+def event_stream(result, text_key=None, error_prefix='AI error', meta=None):
+    """Stream a service result as SSE: a 'meta' event with any non-text fields, one
+    message per text chunk ({"text": ...}), then 'done' (or 'error' if generation fails)
+
+    result is an iterator of text chunks, a plain string (e.g. 'service unavailable'),
+    or a dict whose text_key holds either of those. It may also be a callable returning
+    one of those, called inside the stream so slow preparation (upstream lookups) happens
+    after the first byte; pass what is known up front as meta to send it immediately.
+    Later 'meta' events add to earlier ones.
+    """
+    def generate():
+        chunks = result
+        if meta is not None:
+            yield sse_event(meta, 'meta')
+        try:
+            if callable(chunks):
+                chunks = chunks()
+            if isinstance(chunks, dict):
+                details = dict(chunks)
+                chunks = details.pop(text_key, None)
+                yield sse_event(details, 'meta')
+            if isinstance(chunks, str):
+                yield sse_event({'text': chunks})
+            elif chunks is not None:
+                for chunk in chunks:
+                    yield sse_event({'text': chunk})
+        except LLMBackpressure as e:
+            yield sse_event({'error': str(e), 'retry_after': e.retry_after}, 'error')
+            return
+        except Exception as e:
+            yield sse_event({'error': f'{error_prefix}: {str(e)}'}, 'error')
+            return
+        yield sse_event({}, 'done')
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
-# Load environment variables
 
 def create_app():
     """Create and configure the Flask application"""
@@ -20,18 +70,54 @@ def create_app():
     # Initialize FarmingAnalyzer with Gemini API key
     analyzer = FarmingAnalyzer()
 
-    # Initialize or train the model
-    try:
-        analyzer.load_model()
-        print("Model loaded successfully")
-    except Exception as e:
-        print(f"Error loading model: {e}")
-        print("Training new model with simulated data...")
+    # Requests always read the active analyzer from the registry so that a
+    # newly activated model version can be swapped in without a restart
+    models = ModelRegistry(analyzer.model_dir)
+
+    def load_prediction_model():
+        """Initialize or train the model"""
+        version = os.getenv('MODEL_VERSION')
+        if version:
+            models.activate(version)
+            return
+
         try:
+            analyzer.load_model()
+            print("Model loaded successfully")
+        except Exception as e:
+            print(f"Error loading model: {e}")
+            print("Training new model with simulated data...")
             analyzer.train_model_with_simulated_data()
-        except Exception as train_error:
-            print(f"Error training model: {train_error}")
-            print("Continuing without ML model - using basic predictions")
+        models.set_active(analyzer)
+
+    def connect_database():
+        if not db_manager.connect():
+            raise RuntimeError("MongoDB is unavailable - data will not be persisted")
+
+    # Model loading/training and service connections run in the background so
+    # the server accepts traffic immediately; see /ready for progress
+    startup = StartupManager()
+    startup.register('model', load_prediction_model)
+    # MongoDB is optional: the app runs without persistence and keeps retrying
+    # (5s, 10s, ... up to 5 minutes apart); only the forum routes wait for it
+    startup.register('database', connect_database, required=False, retry_backoff=(5, 300))
+    # Imports and configures the Gemini SDK so the first AI request does not pay for it
+    startup.register('llm', llm_client.warm_up, required=False)
+    startup.start()
+    app.extensions['startup'] = startup
+
+    @app.errorhandler(LLMBackpressure)
+    def llm_backpressure(error):
+        """The LLM queue is saturated: 429 with a Retry-After hint instead of piling on"""
+        response = jsonify({'error': str(error), 'retry_after': error.retry_after})
+        response.headers['Retry-After'] = str(error.retry_after)
+        return response, 429
+
+    @app.route('/ready')
+    def ready():
+        """Readiness of the required startup components, with optional ones reported as degraded"""
+        status = startup.status()
+        return jsonify(status), 200 if status['ready'] else 503
 
     @app.route('/')
     def landing():
@@ -95,6 +181,7 @@ def create_app():
         return render_template('ImageAnalysis.html')
 
     @app.route('/submit_form', methods=['POST'])
+    @startup.requires('model')
     def submit_form():
         """Handle form submission and generate predictions"""
         try:
@@ -111,12 +198,13 @@ def create_app():
                 return "Error: Location and Plant Type are required!", 400
 
             # Make prediction
-            prediction = analyzer.predict(input_data)
+            current = models.active()
+            prediction = current.predict(input_data)
             
             # Get AI recommendations
-            ai_recommendations = analyzer.get_ai_recommendations(input_data, prediction)
+            ai_recommendations = current.get_ai_recommendations(input_data, prediction)
 
-            return render_template(
+            response = app.make_response(render_template(
                 'prediction_result.html',
                 location=input_data['location'],
                 plant_type=input_data['plant_type'],
@@ -124,12 +212,138 @@ def create_app():
                 harvest_month=input_data['harvest_month'],
                 yield_prediction=prediction['yield_prediction'],
                 success_rating=prediction['success_rating'],
-                ai_recommendations=ai_recommendations
-            )
+                ai_recommendations=ai_recommendations,
+                model_version=current.model_version
+            ))
+            response.headers['X-Model-Version'] = str(current.model_version)
+            return response
 
         except Exception as e:
             return f"Error processing request: {str(e)}", 500
 
+    # Largest /api/predict/batch request; bigger jobs should be split by the client
+    max_batch_size = int(os.getenv('PREDICT_BATCH_MAX_SIZE', '1000'))
+
+    @app.route('/api/predict/batch', methods=['POST'])
+    @startup.requires('model')
+    def predict_batch_api():
+        """Score many plots in a single forest pass; {"intervals": true} adds per-tree uncertainty bands"""
+        data = request.get_json(silent=True)
+        inputs = data.get('inputs') if isinstance(data, dict) else data
+        if not isinstance(inputs, list):
+            return jsonify({'error': 'Expected a JSON list of inputs or {"inputs": [...]}'}), 400
+        if len(inputs) > max_batch_size:
+            return jsonify({'error': f'Batch has {len(inputs)} inputs; at most {max_batch_size} are allowed'}), 413
+
+        try:
+            current = models.active()
+            predictions = current.predict_batch(
+                inputs,
+                intervals=bool(data.get('intervals')) if isinstance(data, dict) else False,
+                quantiles=data.get('quantiles') if isinstance(data, dict) else None
+            )
+            return jsonify({'model_version': current.model_version, 'predictions': predictions})
+        except (KeyError, ValueError) as e:
+            return jsonify({'error': f'Invalid prediction input: {str(e)}'}), 400
+        except Exception as e:
+            return jsonify({'error': f'Batch prediction error: {str(e)}'}), 500
+
+    @app.route('/api/predict/sweep', methods=['POST'])
+    @startup.requires('model')
+    def predict_sweep_api():
+        """Rank every harvest month x season (x drought level) for one plot in a single forest pass"""
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
+
+        input_data = {
+            'location': data.get('location'),
+            'plant_type': data.get('plant_type') or data.get('plantType'),
+            'plot_size': data.get('plot_size') or data.get('plotSize') or 'Medium'
+        }
+        if not input_data['location'] or not input_data['plant_type']:
+            return jsonify({'error': 'location and plant_type are required'}), 400
+
+        drought_levels = data.get('drought_levels')
+        if drought_levels is None and data.get('include_drought'):
+            drought_levels = ['Low', 'Medium', 'High']
+
+        try:
+            current = models.active()
+            scenarios = current.sweep_scenarios(
+                input_data,
+                months=data.get('months'),
+                seasons=data.get('seasons'),
+                drought_levels=drought_levels,
+                rank_by=data.get('rank_by', 'yield_prediction')
+            )
+        except (KeyError, ValueError) as e:
+            return jsonify({'error': f'Invalid sweep input: {str(e)}'}), 400
+        except Exception as e:
+            return jsonify({'error': f'Sweep prediction error: {str(e)}'}), 500
+
+        # A single Gemini call, for the winning scenario only
+        best = scenarios[0]
+        ai_recommendations = None
+        if data.get('recommendations', True):
+            ai_recommendations = current.get_ai_recommendations(dict(input_data, **best), best)
+
+        return jsonify({
+            'model_version': current.model_version,
+            'best': best,
+            'ai_recommendations': ai_recommendations,
+            'scenarios': scenarios
+        })
+
+    @app.route('/api/predict/cache/stats')
+    @startup.requires('model')
+    def prediction_cache_stats():
+        """Hit/miss/eviction counters of the prediction cache"""
+        current = models.active()
+        return jsonify(dict(current.prediction_cache.stats(), model_version=current.model_version))
+
+    @app.route('/api/predict/coalescer/stats')
+    @startup.requires('model')
+    def prediction_coalescer_stats():
+        """Micro-batching counters with batch-size and queue-depth histograms"""
+        current = models.active()
+        stats = current.coalescer.stats() if current.coalescer is not None else {'enabled': False}
+        return jsonify(dict(stats, model_version=current.model_version))
+
+    @app.route('/api/llm/stats')
+    def llm_stats():
+        """Gemini calls per call site, cache, single-flight, rate-limiter and circuit-breaker metrics"""
+        cache = llm_client.cache.stats() if llm_client.cache is not None else {'enabled': False}
+        limiter = llm_client.rate_limiter.stats() if llm_client.rate_limiter is not None else {'enabled': False}
+        return jsonify({'model': llm_client.model_name, 'calls': llm_client.stats(), 'cache': cache,
+                        'single_flight': llm_client.single_flight_stats(), 'rate_limiter': limiter,
+                        'resilience': llm_client.resilience_stats()})
+
+    def admin_authorized():
+        admin_token = os.getenv('ADMIN_TOKEN')
+        return bool(admin_token) and request.headers.get('X-Admin-Token') == admin_token
+
+    @app.route('/api/admin/models')
+    def list_model_versions():
+        """List registered model versions and activation jobs"""
+        if not admin_authorized():
+            return jsonify({'error': 'Admin token required'}), 403
+        return jsonify({
+            'active_version': models.active_version,
+            'versions': models.list_versions(),
+            'jobs': models.jobs()
+        })
+
+    @app.route('/api/admin/models/<version>/activate', methods=['POST'])
+    def activate_model_version(version):
+        """Load a model version in the background and swap it in atomically"""
+        if not admin_authorized():
+            return jsonify({'error': 'Admin token required'}), 403
+        if not any(entry['version'] == version for entry in models.list_versions()):
+            return jsonify({'error': f'Unknown model version: {version}'}), 404
+        job = models.activate_async(version)
+        return jsonify(job), 202
+
     @app.route('/view_image/<filename>')
     def view_image(filename):
         """View processed image results"""
@@ -156,9 +370,17 @@ def create_app():
                 return jsonify({'analysis': analysis})
             else:
                 return jsonify({'error': 'Unable to generate weather analysis'}), 500
+        except LLMBackpressure:
+            raise
         except Exception as e:
             return jsonify({'error': f'Weather analysis error: {str(e)}'}), 500
 
+    @app.route('/api/weather/analysis/<location>/<crop_type>/stream')
+    def stream_weather_analysis_api(location, crop_type):
+        """Weather analysis streamed as Server-Sent Events"""
+        analysis = weather_service.get_farming_weather_analysis(location, crop_type, stream=True)
+        return event_stream(analysis, error_prefix='Unable to generate weather analysis')
+
     # Market Routes
     @app.route('/market')
     def market_dashboard():
@@ -177,6 +399,12 @@ def create_app():
         analysis = market_service.get_market_analysis(crop_type)
         return jsonify({'analysis': analysis})
 
+    @app.route('/api/market/analysis/<crop_type>/stream')
+    def stream_market_analysis_api(crop_type):
+        """Market analysis streamed as Server-Sent Events"""
+        analysis = market_service.get_market_analysis(crop_type, stream=True)
+        return event_stream(analysis, error_prefix='Unable to generate market analysis')
+
     # Planting Calendar Routes
     @app.route('/calendar')
     def planting_calendar():
@@ -194,6 +422,21 @@ def create_app():
         )
         return jsonify(schedule)
 
+    @app.route('/api/planting/schedule/stream', methods=['POST'])
+    def stream_planting_schedule():
+        """Planting schedule as Server-Sent Events: schedule details first, then the AI calendar"""
+        data = request.get_json()
+        crop_type, location, plot_size = data['crop_type'], data['location'], data.get('plot_size')
+        # The weather/market lookups run inside the stream, after the crop details are sent
+        schedule = lambda: planting_service.get_optimal_planting_dates(crop_type, location, plot_size, stream=True)
+        meta = {
+            'crop_type': crop_type,
+            'location': location,
+            'plot_size': plot_size,
+            'crop_info': planting_service.crop_calendar.get(crop_type.lower())
+        }
+        return event_stream(schedule, 'ai_recommendations', 'Unable to generate AI recommendations', meta=meta)
+
     # Resource Calculator Routes
     @app.route('/calculator')
     def resource_calculator_page():
@@ -225,6 +468,20 @@ def create_app():
         )
         return jsonify(recommendations)
 
+    @app.route('/api/calculate/recommendations/stream', methods=['POST'])
+    def stream_resource_recommendations():
+        """Resource recommendations as Server-Sent Events: calculations first, then the AI text"""
+        data = request.get_json()
+        recommendations = resource_calculator.get_ai_resource_recommendations(
+            data['crop_type'],
+            data['plot_size_ha'],
+            data['soil_type'],
+            data['location'],
+            data.get('budget'),
+            stream=True
+        )
+        return event_stream(recommendations, 'ai_recommendations', 'Unable to generate AI recommendations')
+
     # Community Routes
     @app.route('/community')
     def community_forum():
@@ -232,6 +489,7 @@ def create_app():
         return render_template('community_forum.html')
 
     @app.route('/api/forum/posts')
+    @startup.requires('database')
     def get_forum_posts():
         """Get forum posts"""
         category = request.args.get('category')
@@ -239,6 +497,7 @@ def create_app():
         return jsonify(posts)
 
     @app.route('/api/forum/post', methods=['POST'])
+    @startup.requires('database')
     def create_forum_post():
         """Create a new forum post"""
         data = request.get_json()
@@ -260,6 +519,17 @@ def create_app():
         )
         return jsonify({'advice': advice})
 
+    @app.route('/api/ai/advice/stream', methods=['POST'])
+    def stream_ai_advice():
+        """AI farming advice streamed as Server-Sent Events"""
+        data = request.get_json()
+        advice = community_service.get_ai_farming_advice(
+            data['question'],
+            data.get('category', 'general'),
+            stream=True
+        )
+        return event_stream(advice, error_prefix='Unable to generate farming advice')
+
     return app
 
 # Create the Flask application
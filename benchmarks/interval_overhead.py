@@ -0,0 +1,58 @@
+"""Latency overhead of per-tree prediction intervals over mean-only predictions.
+
+    python benchmarks/interval_overhead.py [--batch-sizes 1 32 1024] [--repeats 50]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from FarmingAnalysis import FarmingAnalyzer  # noqa: E402
+
+
+def _inputs(analyzer, n_rows, seed=42):
+    rng = np.random.default_rng(seed)
+    return [{
+        'season': str(rng.choice(list(analyzer.SEASONAL_DATA))),
+        'plot_size': str(rng.choice(list(analyzer.PLOT_SIZES))),
+        'harvest_month': str(rng.choice(analyzer.MONTHS)),
+        'drought_status': str(rng.choice(['Low', 'Medium', 'High'])),
+        'soil_ph': round(float(rng.uniform(5.0, 8.0)), 1),
+        'fertilizer_usage': round(float(rng.uniform(100, 260)), 0)
+    } for _ in range(n_rows)]
+
+
+def _median_ms(fn, repeats):
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings)) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 32, 1024])
+    parser.add_argument('--repeats', type=int, default=50)
+    args = parser.parse_args()
+
+    analyzer = FarmingAnalyzer()
+    analyzer.load_model()
+    print(f"Model version {analyzer.model_version}, {analyzer.forest.n_trees} trees")
+    print(f"{'batch':>7}{'mean ms':>12}{'intervals ms':>14}{'overhead':>10}")
+    for batch_size in args.batch_sizes:
+        inputs = _inputs(analyzer, batch_size)
+        mean_only = _median_ms(lambda: analyzer.predict_batch(inputs), args.repeats)
+        with_intervals = _median_ms(lambda: analyzer.predict_batch(inputs, intervals=True), args.repeats)
+        overhead = (with_intervals / mean_only - 1) * 100
+        print(f"{batch_size:>7}{mean_only:>12.3f}{with_intervals:>14.3f}{overhead:>9.1f}%")
+
+
+if __name__ == '__main__':
+    main()
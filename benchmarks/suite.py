@@ -0,0 +1,231 @@
+"""Prediction latency, throughput and memory benchmarks.
+
+Each benchmark reports p50/p95/p99 latency, throughput and peak traced memory,
+and the whole run is written as JSON. With --compare, results are checked
+against a stored baseline and any benchmark slower (or hungrier) than the
+threshold allows is flagged; the exit code is 1 when something regressed.
+
+    python benchmarks/suite.py --output benchmarks/results.json
+    python benchmarks/suite.py --save-baseline benchmarks/baseline.json
+    python benchmarks/suite.py --compare benchmarks/baseline.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import sklearn
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from FarmingAnalysis import FarmingAnalyzer, peak_rss_mb  # noqa: E402
+from synthetic_data import generate_payloads  # noqa: E402
+
+# Metrics where a larger value is worse, and the one where a smaller value is worse
+LATENCY_METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'peak_memory_mb')
+THROUGHPUT_METRIC = 'throughput_per_s'
+
+
+def _inputs(n_rows, seed=42):
+    """Varied predict() inputs built from synthetic /submit_form payloads"""
+    soil_rng = np.random.default_rng(seed)
+    inputs = []
+    for payload in generate_payloads(n_rows, seed):
+        input_data = {
+            'location': payload['location'],
+            'plant_type': payload['plantType'],
+            'plot_size': payload['plotSize'],
+            'soil_ph': round(float(soil_rng.uniform(5.0, 8.0)), 2)
+        }
+        if 'harvestMonth' in payload:
+            input_data['harvest_month'] = payload['harvestMonth']
+        inputs.append(input_data)
+    return inputs
+
+
+def measure(fn, iterations, units_per_call=1, warmup=1):
+    """Run fn repeatedly; latency percentiles, throughput and peak traced allocation"""
+    for _ in range(warmup):
+        fn()
+
+    timings = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - call_started)
+    elapsed = time.perf_counter() - started
+
+    # Allocation tracing slows calls down, so memory is measured on a separate call
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings_ms = np.array(timings) * 1e3
+    return {
+        'iterations': iterations,
+        'p50_ms': round(float(np.percentile(timings_ms, 50)), 4),
+        'p95_ms': round(float(np.percentile(timings_ms, 95)), 4),
+        'p99_ms': round(float(np.percentile(timings_ms, 99)), 4),
+        'mean_ms': round(float(timings_ms.mean()), 4),
+        THROUGHPUT_METRIC: round(iterations * units_per_call / elapsed, 2),
+        'units': 'rows' if units_per_call > 1 else 'calls',
+        'peak_memory_mb': round(peak / 1024 / 1024, 3)
+    }
+
+
+def bench_predict_single(analyzer, scale):
+    """FarmingAnalyzer.predict on the model path (cache and precomputed table bypassed)"""
+    inputs = _inputs(500)
+    table, cache_size = analyzer.prediction_table, analyzer.prediction_cache.max_size
+    analyzer.prediction_table, analyzer.prediction_cache.max_size = None, 0
+    analyzer.prediction_cache.clear()
+    position = iter(range(10 ** 9))
+    try:
+        return measure(lambda: analyzer.predict(inputs[next(position) % len(inputs)]), 500 * scale)
+    finally:
+        analyzer.prediction_table, analyzer.prediction_cache.max_size = table, cache_size
+
+
+def bench_predict_served(analyzer, scale):
+    """FarmingAnalyzer.predict as served, with the prediction cache and table enabled"""
+    inputs = _inputs(500)
+    position = iter(range(10 ** 9))
+    return measure(lambda: analyzer.predict(inputs[next(position) % len(inputs)]), 1000 * scale)
+
+
+def bench_predict_batch(analyzer, scale, batch_size=256):
+    """FarmingAnalyzer.predict_batch on batch_size varied rows"""
+    inputs = _inputs(batch_size)
+    return measure(lambda: analyzer.predict_batch(inputs), 30 * scale, units_per_call=batch_size)
+
+
+def bench_preprocess_data(analyzer, scale):
+    """preprocess_data on the 1000-row simulated training frame"""
+    df = analyzer._load_training_data()
+    scratch = FarmingAnalyzer(model_dir=analyzer.model_dir)
+    return measure(lambda: scratch.preprocess_data(df.copy()), 30 * scale, units_per_call=len(df))
+
+
+def bench_load_model(analyzer, scale):
+    """Cold start: a fresh analyzer loading the model bundle and preparing serving state"""
+    def load():
+        FarmingAnalyzer(model_dir=analyzer.model_dir).load_model()
+    return measure(load, 5 * scale)
+
+
+def bench_train_simulated(analyzer, scale):
+    """train_model_with_simulated_data, saving into a throwaway model directory"""
+    model_dir = tempfile.mkdtemp(prefix='khula-bench-')
+    try:
+        def train():
+            FarmingAnalyzer(model_dir=model_dir).train_model_with_simulated_data()
+        return measure(train, 2 * scale, warmup=0)
+    finally:
+        shutil.rmtree(model_dir, ignore_errors=True)
+
+
+BENCHMARKS = {
+    'predict_single': bench_predict_single,
+    'predict_served': bench_predict_served,
+    'predict_batch': bench_predict_batch,
+    'preprocess_data': bench_preprocess_data,
+    'load_model': bench_load_model,
+    'train_model_with_simulated_data': bench_train_simulated,
+}
+
+
+def run(names=None, scale=1, model_dir=None):
+    analyzer = FarmingAnalyzer(model_dir=model_dir)
+    analyzer.load_model()
+    results = {}
+    for name in names or BENCHMARKS:
+        print(f"Running {name}...", flush=True)
+        results[name] = BENCHMARKS[name](analyzer, scale)
+
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'scikit_learn': sklearn.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'model_version': analyzer.model_version,
+            'scale': scale,
+            'peak_rss_mb': peak_rss_mb()
+        },
+        'results': results
+    }
+
+
+def compare(current, baseline, threshold=0.20):
+    """Regressions: latency/memory above baseline*(1+threshold) or throughput below baseline*(1-threshold)"""
+    regressions = []
+    for name, result in current['results'].items():
+        reference = baseline.get('results', {}).get(name)
+        if reference is None:
+            continue
+        for metric in LATENCY_METRICS:
+            if reference.get(metric) and result[metric] > reference[metric] * (1 + threshold):
+                regressions.append({'benchmark': name, 'metric': metric, 'baseline': reference[metric],
+                                    'current': result[metric], 'change': result[metric] / reference[metric] - 1})
+        if reference.get(THROUGHPUT_METRIC) and \
+                result[THROUGHPUT_METRIC] < reference[THROUGHPUT_METRIC] * (1 - threshold):
+            regressions.append({'benchmark': name, 'metric': THROUGHPUT_METRIC,
+                                'baseline': reference[THROUGHPUT_METRIC], 'current': result[THROUGHPUT_METRIC],
+                                'change': result[THROUGHPUT_METRIC] / reference[THROUGHPUT_METRIC] - 1})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Khula prediction benchmark suite')
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help='Benchmarks to run (default: all)')
+    parser.add_argument('--scale', type=int, default=1, help='Multiply every iteration count')
+    parser.add_argument('--model-dir', help='Model directory to benchmark (defaults to MODEL_DIR / models)')
+    parser.add_argument('--output', help='Write results as JSON')
+    parser.add_argument('--save-baseline', metavar='PATH', help='Write results as the new baseline')
+    parser.add_argument('--compare', metavar='BASELINE', help='Flag regressions against a baseline JSON')
+    parser.add_argument('--threshold', type=float, default=0.20, help='Allowed relative change (default 0.20)')
+    args = parser.parse_args()
+
+    report = run(args.only, args.scale, args.model_dir)
+
+    print(f"\n{'benchmark':34}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'throughput':>14}{'peak MB':>10}")
+    for name, result in report['results'].items():
+        print(f"{name:34}{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}{result['p99_ms']:>10.3f}"
+              f"{result[THROUGHPUT_METRIC]:>9.0f} {result['units'][:4]}/s{result['peak_memory_mb']:>8.2f}")
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        report['comparison'] = {'baseline': args.compare, 'threshold': args.threshold,
+                                'regressions': compare(report, baseline, args.threshold)}
+        regressions = report['comparison']['regressions']
+        if regressions:
+            exit_code = 1
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression['benchmark']}.{regression['metric']}: {regression['baseline']} -> "
+                      f"{regression['current']} ({regression['change']:+.1%})")
+        else:
+            print(f"\nNo regressions beyond {args.threshold:.0%} against {args.compare}")
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {path}")
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
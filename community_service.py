@@ -1,22 +1,15 @@
-import google.generativeai as genai
-import os
-from dotenv import load_dotenv
 from datetime import datetime
 from database import forum_db, user_db
 from bson import ObjectId
-
-load_dotenv()
+from llm_client import llm_client
+from llm_rate_limiter import LLMBackpressure
+from llm_resilience import fallback_text
 
 class CommunityService:
     def __init__(self):
         """Initialize community service with Gemini AI for content moderation"""
-        # Initialize Gemini AI
-        google_api_key = os.getenv('GOOGLE_API_KEY')
-        if google_api_key:
-            genai.configure(api_key=google_api_key)
-            self.genai_model = genai.GenerativeModel('gemini-1.5-flash')
-        else:
-            self.genai_model = None
+        # Gemini client shared by all services
+        self.llm = llm_client
 
         # Forum categories
         self.categories = [
@@ -99,9 +92,9 @@ class CommunityService:
                 'error': 'Comment not appropriate for community guidelines'
             }
 
-    def get_ai_farming_advice(self, question, category='general'):
-        """Get AI-powered farming advice for community questions"""
-        if not self.genai_model:
+    def get_ai_farming_advice(self, question, category='general', stream=False):
+        """Get AI-powered farming advice for community questions (an iterator of text chunks when stream=True)"""
+        if not self.llm.available:
             return "AI advice service unavailable"
 
         prompt = f"""
@@ -120,15 +113,31 @@ class CommunityService:
         Keep the advice practical, actionable, and suitable for farmers of all experience levels.
         """
 
+        fallback = lambda: self._fallback_advice(category)
+        if stream:
+            return self.llm.generate_stream(prompt, call_site='community.advice', fallback=fallback)
         try:
-            response = self.genai_model.generate_content(prompt)
-            return response.text
+            return self.llm.generate(prompt, call_site='community.advice', fallback=fallback)
+        except LLMBackpressure:
+            raise
         except Exception as e:
             return f"Unable to generate farming advice: {str(e)}"
 
+    def _fallback_advice(self, category):
+        """Pointers to Khula's own tools for the question's category, used when Gemini is down"""
+        return fallback_text(
+            f"We could not generate advice for your {category} question right now. Meanwhile:",
+            [
+                f"Post your question in the {category} forum, where other farmers and experts can answer it",
+                "Use the Planting Calendar for planting and harvest windows for your crop",
+                "Use the Resource Calculator for seed, fertilizer, water and labour requirements",
+                "Check the Weather dashboard for alerts that may affect your fields"
+            ]
+        )
+
     def get_trending_topics(self):
         """Get trending topics in the farming community"""
-        if not self.genai_model:
+        if not self.llm.available:
             return "Trending topics unavailable"
 
         # Get recent posts
@@ -156,14 +165,27 @@ class CommunityService:
         """
 
         try:
-            response = self.genai_model.generate_content(prompt)
-            return response.text
+            return self.llm.generate(prompt, call_site='community.trending_topics',
+                                     fallback=lambda: self._fallback_trending_topics(recent_posts))
         except Exception as e:
             return f"Unable to analyze trending topics: {str(e)}"
 
+    def _fallback_trending_topics(self, recent_posts):
+        """Most active categories and latest titles from recent posts, used when Gemini is down"""
+        counts = {}
+        for post in recent_posts:
+            counts[post['category']] = counts.get(post['category'], 0) + 1
+        categories = sorted(counts.items(), key=lambda item: item[1], reverse=True)[:5]
+        return fallback_text(
+            "Most active categories:",
+            [f"{category}: {count} recent posts" for category, count in categories] or ["No recent posts"],
+            "Latest discussions:",
+            [post['title'] for post in recent_posts[:5]]
+        )
+
     def get_expert_insights(self, topic):
         """Get expert insights on specific farming topics"""
-        if not self.genai_model:
+        if not self.llm.available:
             return "Expert insights unavailable"
 
         prompt = f"""
@@ -181,14 +203,15 @@ class CommunityService:
         """
 
         try:
-            response = self.genai_model.generate_content(prompt)
-            return response.text
+            return self.llm.generate(prompt, call_site='community.expert_insights', fallback=lambda: fallback_text(
+                f"Expert insights on {topic} will be available again shortly. "
+                "Meanwhile, search the community forum for discussions on this topic."))
         except Exception as e:
             return f"Unable to generate expert insights: {str(e)}"
 
     def create_knowledge_base_entry(self, title, content, category, tags):
         """Create a knowledge base entry with AI enhancement"""
-        if not self.genai_model:
+        if not self.llm.available:
             enhanced_content = content
         else:
             # Enhance content with AI
@@ -210,8 +233,8 @@ class CommunityService:
             """
 
             try:
-                response = self.genai_model.generate_content(prompt)
-                enhanced_content = content + "\n\n--- AI Enhanced Information ---\n" + response.text
+                response_text = self.llm.generate(prompt, call_site='community.knowledge_base')
+                enhanced_content = content + "\n\n--- AI Enhanced Information ---\n" + response_text
             except Exception as e:
                 enhanced_content = content
 
@@ -230,7 +253,7 @@ class CommunityService:
 
     def _moderate_content(self, content):
         """AI-powered content moderation"""
-        if not self.genai_model:
+        if not self.llm.available:
             return {'is_appropriate': True, 'suggestions': []}
 
         prompt = f"""
@@ -252,11 +275,11 @@ class CommunityService:
         """
 
         try:
-            response = self.genai_model.generate_content(prompt)
-            response_text = response.text.upper()
+            response = self.llm.generate(prompt, call_site='community.moderation')
+            response_text = response.upper()
 
             is_appropriate = "APPROPRIATE" in response_text
-            reason = response.text if not is_appropriate else None
+            reason = response if not is_appropriate else None
 
             return {
                 'is_appropriate': is_appropriate,
@@ -269,7 +292,7 @@ class CommunityService:
 
     def _generate_post_summary(self, content):
         """Generate AI summary for long posts"""
-        if not self.genai_model or len(content) < 200:
+        if not self.llm.available or len(content) < 200:
             return None
 
         prompt = f"""
@@ -281,10 +304,17 @@ class CommunityService:
         """
 
         try:
-            response = self.genai_model.generate_content(prompt)
-            return response.text
+            return self.llm.generate(prompt, call_site='community.post_summary',
+                                     fallback=lambda: self._fallback_post_summary(content))
         except Exception as e:
             return None
 
+    def _fallback_post_summary(self, content):
+        """The post's opening sentence, shortened, used when Gemini is down"""
+        first_sentence = content.strip().split('. ')[0].rstrip('.')
+        if len(first_sentence) > 200:
+            return first_sentence[:197].rsplit(' ', 1)[0] + '...'
+        return first_sentence + '.'
+
 # Initialize community service
 community_service = CommunityService()
\ No newline at end of file
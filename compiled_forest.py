@@ -0,0 +1,151 @@
+import numpy as np
+
+
+class CompiledForest:
+    """Random forest packed into contiguous node arrays.
+
+    Every tree's feature/threshold/child/value arrays are concatenated into one
+    buffer per field, with child indices rewritten to global node ids. Leaves keep
+    sklearn's negative feature id and point both children at themselves, so a
+    traversal step is the same branch-free gather for every node. Rows are pushed
+    through all trees at once, with no sklearn validation or per-tree dispatch.
+    """
+
+    ARRAY_FIELDS = ('feature', 'threshold', 'children', 'value', 'roots', 'n_node_samples')
+
+    # Rows scored per traversal block; keeps the working set cache-resident
+    BLOCK_SIZE = 1024
+
+    # Finished rows/trees are dropped from the active set every this many steps
+    COMPACT_EVERY = 4
+
+    def __init__(self, feature, threshold, children, value, roots, n_node_samples=None):
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold)
+        self.children = np.asarray(children, dtype=np.int32).reshape(-1, 2)
+        self.value = np.asarray(value)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.n_node_samples = None if n_node_samples is None else np.asarray(n_node_samples, dtype=np.int32)
+
+        if self.value.ndim == 1:
+            self.value = self.value.reshape(-1, 1)
+        self.n_trees = len(self.roots)
+        self.n_outputs = self.value.shape[1]
+        self.n_nodes = len(self.feature)
+
+        # Flat view for the "2 * node + go_right" child lookup
+        self._flat_children = self.children.reshape(-1)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Pack a fitted RandomForestRegressor (or any list of regression trees)"""
+        estimators = getattr(model, 'estimators_', model)
+
+        features, thresholds, children, values, samples, roots = [], [], [], [], [], []
+        offset = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count) + offset
+            is_leaf = tree.children_left < 0
+
+            roots.append(offset)
+            features.append(np.where(is_leaf, -2, tree.feature))
+            thresholds.append(tree.threshold)
+            children.append(np.stack([np.where(is_leaf, node_ids, tree.children_left + offset),
+                                      np.where(is_leaf, node_ids, tree.children_right + offset)], axis=1))
+            # Regression trees store value as (n_nodes, n_outputs, 1)
+            values.append(tree.value[:, :, 0])
+            samples.append(tree.n_node_samples)
+            offset += tree.node_count
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            children=np.concatenate(children),
+            value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            roots=np.array(roots),
+            n_node_samples=np.concatenate(samples)
+        )
+
+    def arrays(self):
+        """Name -> array mapping of every buffer backing the forest"""
+        arrays = {name: getattr(self, name) for name in self.ARRAY_FIELDS}
+        if self.n_node_samples is None:
+            del arrays['n_node_samples']
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild a forest around existing (possibly memory-mapped) buffers without copying"""
+        return cls(**{name: arrays[name] for name in cls.ARRAY_FIELDS if name in arrays})
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self.arrays().values())
+
+    def apply(self, X):
+        """Global leaf node id reached by every row in every tree, shape (n_rows, n_trees)"""
+        # sklearn compares float32 features against the stored thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        if X.shape[0] <= self.BLOCK_SIZE:
+            return self._apply_block(X)
+        return np.concatenate([self._apply_block(X[start:start + self.BLOCK_SIZE])
+                               for start in range(0, X.shape[0], self.BLOCK_SIZE)])
+
+    def _apply_block(self, X):
+        n_rows, n_features = X.shape
+        flat_X = X.reshape(-1)
+
+        # Offset of each (row, tree) pair's row inside the flattened feature matrix
+        row_offsets = np.repeat(np.arange(n_rows, dtype=np.intp) * n_features, self.n_trees)
+        leaves = np.tile(self.roots, n_rows)
+        active = None
+        offsets = row_offsets
+        current = leaves
+
+        step = 0
+        while True:
+            # Leaves index a harmless feature (-2 wraps) and loop back onto themselves
+            go_right = flat_X[offsets + self.feature[current]] > self.threshold[current]
+            following = self._flat_children[2 * current + go_right]
+            step += 1
+
+            if step % self.COMPACT_EVERY == 0:
+                finished = following == current
+                if finished.all():
+                    break
+                if finished.mean() > 0.3:
+                    if active is None:
+                        active = np.arange(leaves.size, dtype=np.intp)
+                    leaves[active] = following
+                    keep = ~finished
+                    active = active[keep]
+                    following = following[keep]
+                    offsets = row_offsets[active]
+            current = following
+
+        if active is None:
+            leaves = following
+        else:
+            leaves[active] = following
+        return leaves.reshape(n_rows, self.n_trees)
+
+    def predict_per_tree(self, X):
+        """Every tree's output for every row, shape (n_rows, n_trees, n_outputs)"""
+        return self.value[self.apply(X)]
+
+    def predict(self, X):
+        """Forest mean, bit-compatible with RandomForestRegressor.predict"""
+        per_tree = self.predict_per_tree(X)
+        return self.mean(per_tree)
+
+    def mean(self, per_tree):
+        """Average per-tree outputs the way sklearn does: sequential sum in tree order, then divide"""
+        total = np.cumsum(per_tree, axis=1, dtype=np.float64)[:, -1]
+        prediction = total / self.n_trees
+        if self.n_outputs == 1:
+            return prediction.ravel()
+        return prediction
@@ -0,0 +1,9 @@
+"""Loads .env into the process environment, once.
+
+Every module that reads settings with os.getenv imports this module first, so
+the values from .env are in place whichever module (app, service or command
+line script) is imported first. Variables already set in the environment win.
+"""
+from dotenv import load_dotenv
+
+load_dotenv()
@@ -1,11 +1,9 @@
+import config
 import os
 from pymongo import MongoClient
-from dotenv import load_dotenv
 from datetime import datetime
 import logging
-
-# Load environment variables
-load_dotenv()
+import threading
 
 class DatabaseManager:
     def __init__(self):
@@ -14,24 +12,31 @@ class DatabaseManager:
         self.db_name = os.getenv('DB_NAME', 'khula_farming')
         self.client = None
         self.db = None
-        self.connect()
+        # The connection is opened on first use (or by the app's background startup)
+        self.connection_attempted = False
+        self._connect_lock = threading.Lock()
 
     def connect(self):
-        """Establish connection to MongoDB"""
-        try:
-            self.client = MongoClient(self.mongo_uri, serverSelectionTimeoutMS=5000)
-            self.db = self.client[self.db_name]
-            # Test connection
-            self.client.admin.command('ping')
-            logging.info("Successfully connected to MongoDB")
-        except Exception as e:
-            logging.warning(f"Failed to connect to MongoDB: {e}")
-            logging.warning("Running without database - data will not be persisted")
-            self.client = None
-            self.db = None
+        """Establish connection to MongoDB; returns whether it succeeded"""
+        with self._connect_lock:
+            self.connection_attempted = True
+            try:
+                self.client = MongoClient(self.mongo_uri, serverSelectionTimeoutMS=5000)
+                self.db = self.client[self.db_name]
+                # Test connection
+                self.client.admin.command('ping')
+                logging.info("Successfully connected to MongoDB")
+            except Exception as e:
+                logging.warning(f"Failed to connect to MongoDB: {e}")
+                logging.warning("Running without database - data will not be persisted")
+                self.client = None
+                self.db = None
+            return self.db is not None
 
     def get_collection(self, collection_name):
         """Get a specific collection"""
+        if self.db is None and not self.connection_attempted and not self._connect_lock.locked():
+            self.connect()
         if self.db is None:
             return None
         return self.db[collection_name]
@@ -44,7 +49,11 @@ class DatabaseManager:
 # Collections for different features
 class WeatherData:
     def __init__(self, db_manager):
-        self.collection = db_manager.get_collection('weather_data')
+        self.db_manager = db_manager
+
+    @property
+    def collection(self):
+        return self.db_manager.get_collection('weather_data')
 
     def save_weather_data(self, location, weather_data):
         """Save weather data for a location"""
@@ -90,7 +99,11 @@ class WeatherData:
 
 class MarketPrices:
     def __init__(self, db_manager):
-        self.collection = db_manager.get_collection('market_prices')
+        self.db_manager = db_manager
+
+    @property
+    def collection(self):
+        return self.db_manager.get_collection('market_prices')
 
     def save_market_data(self, crop_type, price_data):
         """Save market price data"""
@@ -109,7 +122,11 @@ class MarketPrices:
 
 class PlantingCalendar:
     def __init__(self, db_manager):
-        self.collection = db_manager.get_collection('planting_calendar')
+        self.db_manager = db_manager
+
+    @property
+    def collection(self):
+        return self.db_manager.get_collection('planting_calendar')
 
     def save_planting_schedule(self, user_id, crop_type, location, schedule_data):
         """Save planting schedule"""
@@ -128,8 +145,15 @@ class PlantingCalendar:
 
 class CommunityForum:
     def __init__(self, db_manager):
-        self.posts_collection = db_manager.get_collection('forum_posts')
-        self.comments_collection = db_manager.get_collection('forum_comments')
+        self.db_manager = db_manager
+
+    @property
+    def posts_collection(self):
+        return self.db_manager.get_collection('forum_posts')
+
+    @property
+    def comments_collection(self):
+        return self.db_manager.get_collection('forum_comments')
 
     def create_post(self, user_id, title, content, category):
         """Create a new forum post"""
@@ -161,7 +185,11 @@ class CommunityForum:
 
 class UserProfiles:
     def __init__(self, db_manager):
-        self.collection = db_manager.get_collection('user_profiles')
+        self.db_manager = db_manager
+
+    @property
+    def collection(self):
+        return self.db_manager.get_collection('user_profiles')
 
     def create_user(self, user_data):
         """Create a new user profile"""
@@ -0,0 +1,303 @@
+"""Forest compaction: trade a bounded accuracy loss for a smaller, faster model.
+
+Works directly on the flattened forest from the model bundle:
+
+1. depth capping     - nodes at max_depth become leaves (an internal node's value
+                       is already the mean of the samples below it)
+2. leaf merging      - sibling leaves whose outputs differ by at most
+                       merge_tolerance (in target standard deviations), or that
+                       hold fewer than min_leaf_samples samples, fold into
+                       their parent, repeated bottom-up
+3. float32 storage   - thresholds are rounded *down* to float32, which keeps
+                       every split decision on float32 inputs identical;
+                       values are stored as float32
+4. tree pruning      - the forest keeps the fewest leading trees whose held-out
+                       R² is within error_budget of the original forest
+
+    python forest_compaction.py --max-depth 16 --error-budget 0.01 [--data HELD_OUT.csv] [--publish VERSION]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import r2_score
+from sklearn.model_selection import train_test_split
+
+from compiled_forest import CompiledForest
+from FarmingAnalysis import FarmingAnalyzer
+from model_bundle import read_bundle, write_bundle
+
+COMPACT_BUNDLE_FILENAME = 'farming_model.compact.bundle'
+
+
+def _node_depths(forest):
+    depths = np.full(forest.n_nodes, -1, dtype=np.int32)
+    frontier = forest.roots.astype(np.intp)
+    depth = 0
+    while frontier.size:
+        depths[frontier] = depth
+        internal = frontier[forest.feature[frontier] >= 0]
+        frontier = forest.children[internal].reshape(-1).astype(np.intp)
+        depth += 1
+    return depths
+
+
+def _make_leaves(feature, children, nodes):
+    feature[nodes] = -2
+    children[nodes, 0] = nodes
+    children[nodes, 1] = nodes
+
+
+def _repack(forest, feature, threshold, children, value, roots):
+    """Copy only the nodes reachable from the given roots into fresh contiguous arrays"""
+    order = []
+    for root in roots:
+        stack = [int(root)]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            if feature[node] >= 0:
+                stack.append(int(children[node, 1]))
+                stack.append(int(children[node, 0]))
+
+    order = np.array(order, dtype=np.intp)
+    remap = np.full(forest.n_nodes, -1, dtype=np.int64)
+    remap[order] = np.arange(len(order))
+
+    samples = forest.n_node_samples[order] if forest.n_node_samples is not None else None
+    return CompiledForest(
+        feature=feature[order],
+        threshold=threshold[order],
+        children=remap[children[order]],
+        value=value[order],
+        roots=remap[np.asarray(roots, dtype=np.intp)],
+        n_node_samples=samples
+    )
+
+
+def _float32_floor(values):
+    """Largest float32 <= each float64 value; float32 x <= t64 iff x <= floor32(t64)"""
+    rounded = values.astype(np.float32)
+    too_high = rounded.astype(np.float64) > values
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+def _select_trees(per_tree, y_val, target_score):
+    """Smallest prefix of trees whose mean reaches target_score on the held-out rows.
+
+    Trees are bootstrap replicas, so a prefix is an unbiased smaller forest;
+    picking individual trees by held-out score would overfit the held-out set.
+    """
+    running = np.cumsum(per_tree, axis=1) / np.arange(1, per_tree.shape[1] + 1)[None, :, None]
+    for n_trees in range(1, per_tree.shape[1] + 1):
+        score = r2_score(y_val, running[:, n_trees - 1])
+        if score >= target_score:
+            return list(range(n_trees)), score
+    return list(range(per_tree.shape[1])), score
+
+
+def compact_forest(forest, X_val, y_val, max_depth=None, merge_tolerance=0.0,
+                   min_leaf_samples=None, use_float32=True, prune_trees=True, error_budget=0.01):
+    """Compact a CompiledForest; y_val is in the forest's (scaled) output space.
+
+    The scores report whether the held-out R² loss stayed within error_budget.
+    """
+    feature = np.array(forest.feature)
+    threshold = np.array(forest.threshold, dtype=np.float64)
+    children = np.array(forest.children, dtype=np.int64)
+    value = np.array(forest.value, dtype=np.float64)
+    node_ids = np.arange(forest.n_nodes)
+
+    baseline = r2_score(y_val, forest.predict(X_val).reshape(len(y_val), -1))
+
+    if max_depth is not None:
+        depths = _node_depths(forest)
+        _make_leaves(feature, children, node_ids[(depths == max_depth) & (feature >= 0)])
+
+    if merge_tolerance > 0 or min_leaf_samples:
+        samples = forest.n_node_samples
+        while True:
+            is_leaf = feature < 0
+            left, right = children[:, 0], children[:, 1]
+            mergeable = ~is_leaf & is_leaf[left] & is_leaf[right]
+            close = np.zeros(forest.n_nodes, dtype=bool)
+            if merge_tolerance > 0:
+                close |= np.abs(value[left] - value[right]).max(axis=1) <= merge_tolerance
+            if min_leaf_samples and samples is not None:
+                close |= np.minimum(samples[left], samples[right]) < min_leaf_samples
+            collapse = node_ids[mergeable & close]
+            if not collapse.size:
+                break
+            _make_leaves(feature, children, collapse)
+
+    if use_float32:
+        threshold = _float32_floor(threshold)
+        value = value.astype(np.float32)
+
+    roots = forest.roots
+    compacted = _repack(forest, feature, threshold, children, value, roots)
+    score = r2_score(y_val, compacted.predict(X_val).reshape(len(y_val), -1))
+
+    if prune_trees:
+        per_tree = compacted.predict_per_tree(X_val).astype(np.float64)
+        selected, score = _select_trees(per_tree, y_val.reshape(len(y_val), -1), baseline - error_budget)
+        compacted = _repack(compacted, compacted.feature, compacted.threshold,
+                            compacted.children.astype(np.int64), compacted.value, compacted.roots[selected])
+        score = r2_score(y_val, compacted.predict(X_val).reshape(len(y_val), -1))
+
+    # Pruning only trades away what is left of the budget; depth capping and
+    # leaf merging can overspend it on their own
+    return compacted, {'baseline_r2': baseline, 'compacted_r2': score,
+                       'within_budget': bool(score >= baseline - error_budget)}
+
+
+def _current_rss_mb():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _profile_bundle(path, X_val):
+    """File size, RSS growth from loading and touching the bundle, and predict latency"""
+    rss_before = _current_rss_mb()
+    bundle = read_bundle(path)
+    bundle.forest.predict(X_val)
+    for array in bundle.forest.arrays().values():
+        np.add.reduce(array, axis=None)
+    rss_after = _current_rss_mb()
+
+    timings = []
+    for i in range(min(300, len(X_val))):
+        started = time.perf_counter()
+        bundle.forest.predict(X_val[i:i + 1])
+        timings.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    bundle.forest.predict(X_val)
+    batch_seconds = time.perf_counter() - started
+
+    return {
+        'file_mb': round(os.path.getsize(path) / 1024 / 1024, 3),
+        'resident_mb': round(bundle.forest.nbytes / 1024 / 1024, 3),
+        'rss_delta_mb': None if rss_before is None else round(rss_after - rss_before, 3),
+        'predict_1row_us': round(float(np.median(timings)) * 1e6, 1),
+        'predict_batch_ms': round(batch_seconds * 1e3, 3),
+        'n_trees': bundle.forest.n_trees,
+        'n_nodes': bundle.forest.n_nodes
+    }
+
+
+def _read_dataset(data_path):
+    if os.path.isdir(data_path) or data_path.endswith('.parquet'):
+        return pd.read_parquet(data_path)
+    return pd.read_csv(data_path)
+
+
+def validation_data(transform, data_path=None, analyzer=None):
+    """Held-out rows in model space: the file at data_path, else the simulated data's split.
+
+    The rows must carry the bundle's feature and target columns; a bundle trained
+    on a CSV cannot be validated against the simulated data.
+    """
+    if data_path:
+        df_test = _read_dataset(data_path)
+        source = data_path
+    else:
+        analyzer = analyzer or FarmingAnalyzer()
+        _, df_test = train_test_split(analyzer._load_training_data(), test_size=0.2, random_state=42)
+        source = 'the simulated training data (pass --data with a held-out dataset)'
+
+    columns = transform.feature_names + transform.target_columns
+    missing = [column for column in columns if column not in df_test.columns]
+    if missing:
+        raise ValueError(f"Validation rows from {source} lack the bundle's columns: {missing}")
+    df_test = df_test[columns].dropna()
+    if df_test.empty:
+        raise ValueError(f"No complete validation rows in {source}")
+
+    X_val = transform.transform_rows(df_test.to_dict('records'))
+    y = df_test[transform.target_columns].to_numpy(dtype=np.float64)
+    y_val = (y - transform.target_mean) / transform.target_scale
+    return X_val, y_val
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compact the persisted yield forest')
+    parser.add_argument('--model-dir', help='Directory holding farming_model.bundle')
+    parser.add_argument('--data', help='Held-out CSV or Parquet rows with the bundle\'s feature and target '
+                                       'columns (default: the simulated data\'s test split)')
+    parser.add_argument('--max-depth', type=int)
+    parser.add_argument('--merge-tolerance', type=float, default=0.0,
+                        help='Merge sibling leaves closer than this (target std units)')
+    parser.add_argument('--min-leaf-samples', type=int)
+    parser.add_argument('--error-budget', type=float, default=0.01, help='Allowed held-out R² loss')
+    parser.add_argument('--keep-float64', action='store_true')
+    parser.add_argument('--no-prune', action='store_true', help='Keep every tree')
+    parser.add_argument('--output', help=f'Compacted bundle path (default <model dir>/{COMPACT_BUNDLE_FILENAME})')
+    parser.add_argument('--publish', metavar='VERSION', help='Also publish the result to the model registry')
+    parser.add_argument('--ignore-budget', action='store_true',
+                        help='Write the result even when it loses more R² than the error budget')
+    args = parser.parse_args()
+
+    analyzer = FarmingAnalyzer(model_dir=args.model_dir)
+    registry = None
+    if args.publish:
+        from model_registry import ModelRegistry
+        registry = ModelRegistry(analyzer.model_dir)
+        # Fail before the work, not after it: published versions are immutable
+        try:
+            registry.new_version_path(args.publish)
+        except ValueError as e:
+            parser.error(str(e))
+    source = read_bundle(analyzer.bundle_path)
+    try:
+        X_val, y_val = validation_data(source.transform, args.data, analyzer)
+    except ValueError as e:
+        parser.error(str(e))
+
+    compacted, scores = compact_forest(
+        source.forest, X_val, y_val,
+        max_depth=args.max_depth,
+        merge_tolerance=args.merge_tolerance,
+        min_leaf_samples=args.min_leaf_samples,
+        use_float32=not args.keep_float64,
+        prune_trees=not args.no_prune,
+        error_budget=args.error_budget
+    )
+
+    if not scores['within_budget'] and not args.ignore_budget:
+        print(f"Held-out R² fell from {scores['baseline_r2']:.4f} to {scores['compacted_r2']:.4f}, "
+              f"more than the error budget of {args.error_budget}; nothing written "
+              f"(loosen the settings or pass --ignore-budget)")
+        sys.exit(1)
+
+    output = args.output or os.path.join(analyzer.model_dir, COMPACT_BUNDLE_FILENAME)
+    metadata = dict(source.metadata)
+    metadata.pop('created_at', None)
+    metadata['compacted_from'] = source.model_version
+    metadata['model_version'] = args.publish or f'{source.model_version}-compact'
+    metadata['compaction'] = {key: getattr(args, key) for key in
+                              ('max_depth', 'merge_tolerance', 'min_leaf_samples', 'error_budget')}
+    write_bundle(output, compacted, source.transform, metadata)
+
+    before = _profile_bundle(analyzer.bundle_path, X_val)
+    after = _profile_bundle(output, X_val)
+    print(f"{'':18}{'original':>12}{'compacted':>12}")
+    for key in before:
+        print(f"{key:18}{str(before[key]):>12}{str(after[key]):>12}")
+    print(f"{'held-out R²':18}{scores['baseline_r2']:>12.4f}{scores['compacted_r2']:>12.4f}")
+    print(f"Wrote {output}")
+
+    if registry is not None:
+        registry.publish_bundle(compacted, source.transform, args.publish, metadata)
+        print(f"Published as model version {args.publish}")
+
+
+if __name__ == '__main__':
+    main()
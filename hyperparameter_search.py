@@ -0,0 +1,185 @@
+"""Multi-core hyperparameter search for the yield forest.
+
+Preprocessing and the cross-validation folds are computed once in the parent
+process and shipped to each pool worker a single time (through the pool
+initializer), so trials only fit and score forests. Every trial reports CV
+accuracy, single-row latency of the compiled forest and its memory footprint;
+the accuracy/latency/memory Pareto front is what to choose from.
+
+    python hyperparameter_search.py --trials 40 --latency-budget-us 500 --apply
+"""
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import r2_score
+from sklearn.model_selection import KFold
+
+from compiled_forest import CompiledForest
+from FarmingAnalysis import FarmingAnalyzer
+
+PARAM_GRID = {
+    'n_estimators': [25, 50, 100, 200],
+    'max_depth': [None, 8, 12, 16],
+    'min_samples_leaf': [1, 2, 5, 10],
+    'max_features': [1.0, 0.6, 0.3],
+}
+
+# Data and folds shared by every trial in a pool worker
+_worker_data = None
+
+
+def _init_worker(X, y, folds):
+    global _worker_data
+    _worker_data = (X, y, folds)
+
+
+def _single_row_latency_us(forest, X, repeats=200):
+    """Median single-row predict time of the compiled forest in microseconds"""
+    rows = [X[i:i + 1] for i in range(min(repeats, len(X)))]
+    timings = []
+    for row in rows:
+        started = time.perf_counter()
+        forest.predict(row)
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings) * 1e6)
+
+
+def evaluate_params(params, random_state=42):
+    """Cross-validate one parameter set on the worker's cached folds"""
+    X, y, folds = _worker_data
+    scores = []
+    started = time.perf_counter()
+    model = None
+    for train_index, val_index in folds:
+        model = RandomForestRegressor(random_state=random_state, n_jobs=1, **params)
+        model.fit(X[train_index], y[train_index])
+        scores.append(r2_score(y[val_index], model.predict(X[val_index])))
+    fit_seconds = time.perf_counter() - started
+
+    forest = CompiledForest.from_sklearn(model)
+    return {
+        'params': params,
+        'r2_mean': float(np.mean(scores)),
+        'r2_std': float(np.std(scores)),
+        'latency_us': _single_row_latency_us(forest, X[folds[-1][1]]),
+        'memory_bytes': int(forest.nbytes),
+        'n_nodes': int(forest.n_nodes),
+        'fit_seconds': round(fit_seconds, 3)
+    }
+
+
+def pareto_front(results):
+    """Trials not dominated on (higher R², lower latency, lower memory)"""
+    def dominates(a, b):
+        no_worse = (a['r2_mean'] >= b['r2_mean'] and a['latency_us'] <= b['latency_us']
+                    and a['memory_bytes'] <= b['memory_bytes'])
+        better = (a['r2_mean'] > b['r2_mean'] or a['latency_us'] < b['latency_us']
+                  or a['memory_bytes'] < b['memory_bytes'])
+        return no_worse and better
+
+    front = [a for a in results if not any(dominates(b, a) for b in results if b is not a)]
+    return sorted(front, key=lambda result: result['latency_us'])
+
+
+def best_within_budget(results, latency_budget_us=None, memory_budget_bytes=None):
+    """Most accurate trial meeting the latency/memory budgets (None if none does)"""
+    candidates = [result for result in results
+                  if (latency_budget_us is None or result['latency_us'] <= latency_budget_us)
+                  and (memory_budget_bytes is None or result['memory_bytes'] <= memory_budget_bytes)]
+    return max(candidates, key=lambda result: result['r2_mean'], default=None)
+
+
+class HyperparameterSearch:
+    """Grid/random search over forest size, depth, leaf size and feature fraction"""
+
+    def __init__(self, X, y, n_folds=5, n_workers=None, random_state=42):
+        self.X = np.ascontiguousarray(X, dtype=np.float32)
+        self.y = np.ascontiguousarray(y, dtype=np.float64)
+        self.n_workers = n_workers or os.cpu_count()
+        self.random_state = random_state
+        # Folds are fixed up front so every trial is scored on identical splits
+        self.folds = list(KFold(n_splits=n_folds, shuffle=True, random_state=random_state).split(self.X))
+
+    @classmethod
+    def from_analyzer_data(cls, df=None, target=None, **kwargs):
+        """Preprocess a training frame once (defaults to the simulated training data)"""
+        analyzer = FarmingAnalyzer()
+        if df is None:
+            df = analyzer._load_training_data()
+            target = target or ['Yield_per_hectare', 'Success_Rating']
+        target = target or ['Yield_Tons_Per_Hectare', 'Success_Rating']
+
+        processed = analyzer.preprocess_data(df.copy())
+        X = processed[analyzer.FEATURES].to_numpy()
+        y = analyzer.target_scaler.fit_transform(df[target])
+        return cls(X, y, **kwargs)
+
+    def candidates(self, grid=None, n_trials=None):
+        grid = grid or PARAM_GRID
+        names = list(grid)
+        combinations = [dict(zip(names, values)) for values in itertools.product(*grid.values())]
+        if n_trials and n_trials < len(combinations):
+            rng = np.random.default_rng(self.random_state)
+            picked = rng.choice(len(combinations), size=n_trials, replace=False)
+            combinations = [combinations[i] for i in sorted(picked)]
+        return combinations
+
+    def run(self, grid=None, n_trials=None):
+        """Evaluate every candidate across the process pool; results sorted by R²"""
+        candidates = self.candidates(grid, n_trials)
+        print(f"Evaluating {len(candidates)} parameter sets on {len(self.folds)} folds "
+              f"with {self.n_workers} workers...")
+        with ProcessPoolExecutor(max_workers=self.n_workers, initializer=_init_worker,
+                                 initargs=(self.X, self.y, self.folds)) as pool:
+            results = list(pool.map(evaluate_params, candidates,
+                                    itertools.repeat(self.random_state)))
+        return sorted(results, key=lambda result: result['r2_mean'], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Hyperparameter search for the yield forest')
+    parser.add_argument('--data', help='Training CSV (defaults to the simulated training data)')
+    parser.add_argument('--trials', type=int, help='Random subset of the grid to evaluate')
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, help='Pool size (defaults to all cores)')
+    parser.add_argument('--latency-budget-us', type=float, help='Per-request single-row latency budget')
+    parser.add_argument('--memory-budget-mb', type=float, help='Compiled forest memory budget')
+    parser.add_argument('--output', help='Write all results and the Pareto front as JSON')
+    parser.add_argument('--apply', action='store_true',
+                        help='Save the chosen parameters to models/forest_params.json for training')
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data) if args.data else None
+    search = HyperparameterSearch.from_analyzer_data(df, n_folds=args.folds, n_workers=args.workers)
+    results = search.run(n_trials=args.trials)
+    front = pareto_front(results)
+    memory_budget = args.memory_budget_mb * 1024 * 1024 if args.memory_budget_mb else None
+    chosen = best_within_budget(results, args.latency_budget_us, memory_budget)
+
+    print("\nPareto front (R² / latency / memory):")
+    for result in front:
+        print(f"  r2={result['r2_mean']:.4f}  latency={result['latency_us']:.0f}us  "
+              f"memory={result['memory_bytes'] / 1024 / 1024:.2f}MB  {result['params']}")
+    print(f"\nChosen: {chosen['params'] if chosen else 'no trial meets the budget'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'results': results, 'pareto_front': front, 'chosen': chosen}, f, indent=2)
+
+    if args.apply and chosen:
+        analyzer = FarmingAnalyzer()
+        params = dict(chosen['params'], random_state=42)
+        with open(analyzer.forest_params_path, 'w') as f:
+            json.dump(params, f, indent=2)
+        print(f"Saved {params} to {analyzer.forest_params_path}")
+
+
+if __name__ == '__main__':
+    main()
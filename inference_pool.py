@@ -0,0 +1,107 @@
+"""Process-pool inference backend with the forest in shared memory.
+
+The parent copies every CompiledForest buffer into a multiprocessing.shared_memory
+segment once; worker processes attach to those segments and rebuild the forest
+with CompiledForest.from_arrays, so N workers share a single copy of the model.
+The web tier sends only the encoded float32 feature rows and receives the scaled
+forest means back, so inference runs outside the web server's threads and GIL.
+
+Workers are started with the "spawn" method so they do not inherit the web
+server's threads or open connections. This module is imported by the workers
+and must stay free of Flask/FarmingAnalysis imports.
+"""
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from compiled_forest import CompiledForest
+
+# Rows per task when a batch is split across workers
+MIN_ROWS_PER_TASK = 256
+
+# Forest and segments attached by each worker process
+_worker_forest = None
+_worker_segments = []
+
+
+def _attach(specs):
+    global _worker_forest
+    arrays = {}
+    for name, segment_name, dtype, shape in specs:
+        segment = shared_memory.SharedMemory(name=segment_name)
+        _worker_segments.append(segment)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+    _worker_forest = CompiledForest.from_arrays(arrays)
+
+
+def _predict(features):
+    return _worker_forest.predict(features)
+
+
+class InferencePool:
+    """N worker processes scoring feature rows against one shared copy of a CompiledForest"""
+
+    def __init__(self, forest, n_workers=None):
+        self.n_workers = n_workers or os.cpu_count()
+        self.n_features = int(forest.feature.max()) + 1
+        self._segments = []
+        specs = []
+        try:
+            for name, array in forest.arrays().items():
+                array = np.ascontiguousarray(array)
+                segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+                self._segments.append(segment)
+                specs.append((name, segment.name, array.dtype.str, array.shape))
+        except Exception:
+            self._release_segments()
+            raise
+
+        self.shared_bytes = sum(segment.size for segment in self._segments)
+        self._executor = ProcessPoolExecutor(max_workers=self.n_workers,
+                                             mp_context=multiprocessing.get_context('spawn'),
+                                             initializer=_attach, initargs=(specs,))
+
+    def submit(self, features):
+        """Score a feature matrix on one worker; returns a Future of the scaled forest means"""
+        return self._executor.submit(_predict, np.ascontiguousarray(features, dtype=np.float32))
+
+    def predict(self, features):
+        """Score a feature matrix, splitting large batches across the workers"""
+        features = np.ascontiguousarray(features, dtype=np.float32)
+        n_rows = features.shape[0]
+        rows_per_task = max(MIN_ROWS_PER_TASK, math.ceil(n_rows / self.n_workers))
+        if n_rows <= rows_per_task:
+            return self.submit(features).result()
+
+        futures = [self.submit(features[start:start + rows_per_task])
+                   for start in range(0, n_rows, rows_per_task)]
+        return np.concatenate([future.result() for future in futures])
+
+    def warm_up(self):
+        """Start every worker and attach the shared forest before traffic arrives"""
+        probe = np.zeros((1, self.n_features), dtype=np.float32)
+        for future in [self.submit(probe) for _ in range(self.n_workers)]:
+            future.result()
+
+    def _release_segments(self):
+        for segment in self._segments:
+            segment.close()
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+        self._segments = []
+
+    def close(self, wait=True, drain=True):
+        """Stop the workers and free the shared memory; later submits raise RuntimeError.
+
+        With drain=True, already queued tasks still run before the workers exit;
+        otherwise they are cancelled and their futures raise CancelledError.
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=not drain)
+        self._release_segments()
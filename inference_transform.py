@@ -0,0 +1,121 @@
+import numpy as np
+from typing import Dict, Any, List
+
+
+class InferenceTransform:
+    """Precompiled feature transform for the prediction path.
+
+    Built once from the trained scaler and label encoders so that requests never
+    refit (or overwrite) preprocessing state. Categories are mapped through
+    lookup tables and numeric columns are scaled with a single multiply-add.
+    The target scaler's inverse is folded in as well, so the serving path needs
+    no sklearn preprocessing objects at all.
+    """
+
+    def __init__(self, feature_names, numeric_columns, numeric_mean, numeric_scale,
+                 categories, target_columns, target_mean, target_scale):
+        self.feature_names = [str(name) for name in feature_names]
+        self.numeric_columns = [str(name) for name in numeric_columns]
+        self.numeric_mean = np.asarray(numeric_mean, dtype=np.float64)
+        self.numeric_std = np.asarray(numeric_scale, dtype=np.float64)
+
+        # StandardScaler computes (x - mean) / scale; fold it into x * scale + offset
+        self.numeric_scale = 1.0 / self.numeric_std
+        self.numeric_offset = -self.numeric_mean * self.numeric_scale
+
+        self.categorical_columns = [name for name in self.feature_names if name in categories]
+        self.categories = {column: list(categories[column]) for column in self.categorical_columns}
+        self.category_codes = {
+            column: {label: code for code, label in enumerate(labels)}
+            for column, labels in self.categories.items()
+        }
+
+        self.target_columns = [str(name) for name in target_columns]
+        self.target_mean = np.asarray(target_mean, dtype=np.float64)
+        self.target_scale = np.asarray(target_scale, dtype=np.float64)
+
+        position = {name: i for i, name in enumerate(self.feature_names)}
+        missing = [name for name in self.feature_names
+                   if name not in self.numeric_columns and name not in self.category_codes]
+        missing += [name for name in self.numeric_columns if name not in position]
+        if missing:
+            raise ValueError(f"Model features and preprocessing state disagree on: {missing}")
+
+        # Column positions of each group inside the model's feature matrix
+        self.numeric_positions = np.array([position[name] for name in self.numeric_columns], dtype=np.intp)
+        self.categorical_positions = np.array([position[name] for name in self.categorical_columns],
+                                              dtype=np.intp)
+
+    @classmethod
+    def from_fitted(cls, feature_names, scaler, label_encoders, target_scaler):
+        """Compile from the fitted sklearn scaler, label encoders and target scaler"""
+        numeric_columns = getattr(scaler, 'feature_names_in_', None)
+        if numeric_columns is None:
+            raise ValueError("Scaler was not fitted with feature names")
+
+        target_columns = getattr(target_scaler, 'feature_names_in_', None)
+        if target_columns is None:
+            target_columns = [f'target_{i}' for i in range(len(target_scaler.mean_))]
+
+        return cls(
+            feature_names=feature_names,
+            numeric_columns=numeric_columns,
+            numeric_mean=scaler.mean_,
+            numeric_scale=scaler.scale_,
+            categories={column: [str(label) for label in encoder.classes_]
+                        for column, encoder in label_encoders.items()},
+            target_columns=target_columns,
+            target_mean=target_scaler.mean_,
+            target_scale=target_scaler.scale_
+        )
+
+    def schema(self) -> Dict[str, Any]:
+        """JSON-serializable description of the features and preprocessing state"""
+        return {
+            'features': self.feature_names,
+            'numeric_columns': self.numeric_columns,
+            'numeric_mean': self.numeric_mean.tolist(),
+            'numeric_scale': self.numeric_std.tolist(),
+            'categories': self.categories,
+            'target_columns': self.target_columns,
+            'target_mean': self.target_mean.tolist(),
+            'target_scale': self.target_scale.tolist()
+        }
+
+    @classmethod
+    def from_schema(cls, schema: Dict[str, Any]):
+        return cls(
+            feature_names=schema['features'],
+            numeric_columns=schema['numeric_columns'],
+            numeric_mean=schema['numeric_mean'],
+            numeric_scale=schema['numeric_scale'],
+            categories=schema['categories'],
+            target_columns=schema['target_columns'],
+            target_mean=schema['target_mean'],
+            target_scale=schema['target_scale']
+        )
+
+    def _encode(self, column: str, label) -> int:
+        """Look up the label encoder code for one category value"""
+        try:
+            return self.category_codes[column][label]
+        except KeyError:
+            raise ValueError(f"Unknown {column} value: {label!r}")
+
+    def transform_rows(self, rows: List[Dict[str, Any]]) -> np.ndarray:
+        """Build the scaled, encoded feature matrix in model feature order"""
+        features = np.empty((len(rows), len(self.feature_names)), dtype=np.float64)
+
+        numeric = np.array([[row[name] for name in self.numeric_columns] for row in rows],
+                           dtype=np.float64).reshape(len(rows), len(self.numeric_columns))
+        features[:, self.numeric_positions] = numeric * self.numeric_scale + self.numeric_offset
+
+        codes = np.array([[self._encode(name, row[name]) for name in self.categorical_columns]
+                          for row in rows], dtype=np.float64).reshape(len(rows), len(self.categorical_columns))
+        features[:, self.categorical_positions] = codes
+
+        return features
+
+    def inverse_target(self, prediction_scaled: np.ndarray) -> np.ndarray:
+        """Undo target scaling the way StandardScaler.inverse_transform does"""
+        return prediction_scaled * self.target_scale + self.target_mean
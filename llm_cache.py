@@ -0,0 +1,184 @@
+"""Disk-backed Gemini response cache (SQLite, no external service).
+
+Responses are keyed by a SHA-256 of model name + prompt. Each call site has its
+own TTL: answers that depend only on their arguments (fertilizer programs,
+expert insights) live for weeks, while weather analysis expires within the
+hour. The table is bounded to max_entries by evicting the least recently used
+rows, and hit/miss counters are kept overall and per call site.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'llm_cache.sqlite3')
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Seconds a response stays valid per call site; 0 disables caching for that call site
+CALL_SITE_TTLS = {
+    'farming.recommendations': DAY,
+    'weather.farming_analysis': HOUR,
+    'market.analysis': 6 * HOUR,
+    'market.seasonal_trends': 7 * DAY,
+    'community.advice': DAY,
+    'community.trending_topics': HOUR,
+    'community.expert_insights': 7 * DAY,
+    'community.knowledge_base': 30 * DAY,
+    'community.moderation': 30 * DAY,
+    'community.post_summary': 30 * DAY,
+    'planting.schedule': DAY,
+    'planting.monthly_tasks': 7 * DAY,
+    'planting.seasonal_recommendations': 7 * DAY,
+    'resources.recommendations': DAY,
+    'resources.irrigation_schedule': 30 * DAY,
+    'resources.fertilizer_program': 30 * DAY,
+}
+
+DEFAULT_TTL = HOUR
+
+
+def parse_ttls(value):
+    """'call.site=seconds,other.site=0' overrides, e.g. from LLM_CACHE_TTLS"""
+    ttls = {}
+    for item in filter(None, (part.strip() for part in (value or '').split(','))):
+        call_site, _, seconds = item.partition('=')
+        ttls[call_site.strip()] = int(seconds)
+    return ttls
+
+
+class LLMCache:
+    def __init__(self, path=None, max_entries=10000, ttls=None, default_ttl=DEFAULT_TTL):
+        self.path = path or DEFAULT_CACHE_PATH
+        self.max_entries = max_entries
+        self.ttls = dict(CALL_SITE_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0, 'expired': 0}
+        self._call_sites = {}
+        self._writes_since_trim = 0
+        self._connect().execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                call_site TEXT NOT NULL,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )""")
+        self._connect().execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+
+    def _connect(self):
+        """One connection per thread; WAL lets readers and the writer proceed concurrently"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def make_key(model, prompt):
+        return hashlib.sha256(f'{model}\0{prompt}'.encode('utf-8')).hexdigest()
+
+    def ttl_for(self, call_site):
+        return self.ttls.get(call_site, self.default_ttl)
+
+    def _count(self, call_site, outcome):
+        with self._lock:
+            self._counters[outcome] += 1
+            if call_site is not None:
+                site = self._call_sites.setdefault(call_site, {'hits': 0, 'misses': 0})
+                if outcome in site:
+                    site[outcome] += 1
+
+    def get(self, model, prompt, call_site):
+        """Cached response text, or None on a miss (expired rows are deleted)"""
+        if self.max_entries <= 0 or self.ttl_for(call_site) <= 0:
+            return None
+        key = self.make_key(model, prompt)
+        now = time.time()
+        connection = self._connect()
+        row = connection.execute('SELECT response, expires_at FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self._count(call_site, 'misses')
+            return None
+        if row[1] <= now:
+            connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+            self._count(None, 'expired')
+            self._count(call_site, 'misses')
+            return None
+
+        connection.execute('UPDATE responses SET last_access = ? WHERE key = ?', (now, key))
+        self._count(call_site, 'hits')
+        return row[0]
+
+    def put(self, model, prompt, call_site, response):
+        ttl = self.ttl_for(call_site)
+        if self.max_entries <= 0 or ttl <= 0 or not response:
+            return
+        now = time.time()
+        self._connect().execute(
+            'INSERT OR REPLACE INTO responses (key, call_site, model, response, created_at, expires_at, last_access) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (self.make_key(model, prompt), call_site, model, response, now, now + ttl, now)
+        )
+        self._count(None, 'writes')
+        with self._lock:
+            self._writes_since_trim += 1
+            # Trimming scans the table, so it runs every few writes rather than on each one
+            trim = self._writes_since_trim >= max(1, self.max_entries // 100)
+            if trim:
+                self._writes_since_trim = 0
+        if trim:
+            self.trim()
+
+    def trim(self):
+        """Drop expired rows, then least recently used rows beyond max_entries"""
+        connection = self._connect()
+        expired = connection.execute('DELETE FROM responses WHERE expires_at <= ?', (time.time(),)).rowcount
+        excess = connection.execute('SELECT COUNT(*) FROM responses').fetchone()[0] - self.max_entries
+        evicted = 0
+        if excess > 0:
+            evicted = connection.execute(
+                'DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_access LIMIT ?)',
+                (excess,)
+            ).rowcount
+        with self._lock:
+            self._counters['expired'] += expired
+            self._counters['evictions'] += evicted
+
+    def clear(self, call_site=None):
+        """Delete every cached response, or only those of one call site"""
+        if call_site is None:
+            self._connect().execute('DELETE FROM responses')
+        else:
+            self._connect().execute('DELETE FROM responses WHERE call_site = ?', (call_site,))
+
+    def stats(self):
+        """Hit/miss/eviction counters, per-call-site hit rates and the size of the table"""
+        entries = self._connect().execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        with self._lock:
+            counters = dict(self._counters)
+            call_sites = {
+                name: dict(site, hit_rate=round(site['hits'] / (site['hits'] + site['misses']), 4)
+                           if site['hits'] + site['misses'] else 0.0)
+                for name, site in self._call_sites.items()
+            }
+        lookups = counters['hits'] + counters['misses']
+        return dict(
+            counters,
+            hit_rate=round(counters['hits'] / lookups, 4) if lookups else 0.0,
+            entries=entries,
+            max_entries=self.max_entries,
+            size_bytes=os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+            call_sites=call_sites
+        )
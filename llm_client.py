@@ -0,0 +1,393 @@
+"""Shared Gemini client used by every service.
+
+google.generativeai is imported, configured and its GenerativeModel built once,
+on the first generate() call, and reused by all services (one gRPC channel).
+Configuration lives here only: GOOGLE_API_KEY, LLM_MODEL and LLM_TIMEOUT_SECONDS.
+
+Each call names its call site (e.g. 'weather.farming_analysis') so per-call-site
+behaviour and statistics can be attached in one place. Text prompts are answered
+from the SQLite response cache in llm_cache.py when a fresh entry exists, and
+concurrent identical prompts share one in-flight call; every other call is
+admitted by the rate limiter in llm_rate_limiter.py first. The circuit breaker
+and per-call-site timeouts in llm_resilience.py bound every upstream call, and a
+caller-supplied fallback answers when Gemini cannot.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import config
+from llm_cache import LLMCache, parse_ttls
+from llm_rate_limiter import LLMBackpressure, LLMRateLimiter
+from llm_resilience import CALL_SITE_TIMEOUTS, CircuitBreaker, counts_as_failure, parse_timeouts
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = 'gemini-1.5-flash'
+
+
+class LLMUnavailable(RuntimeError):
+    """No API key is configured (or the Gemini SDK cannot be loaded)"""
+
+
+class _Flight:
+    """One upstream call that concurrent identical prompts wait on; chunks are replayed to every follower"""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.followers = 0
+        self._condition = threading.Condition()
+
+    def publish(self, chunk):
+        with self._condition:
+            self.chunks.append(chunk)
+            self._condition.notify_all()
+
+    def finish(self, error=None):
+        with self._condition:
+            self.done = True
+            self.error = error
+            self._condition.notify_all()
+
+    def follow(self):
+        position = 0
+        while True:
+            with self._condition:
+                while position == len(self.chunks) and not self.done:
+                    self._condition.wait()
+                new_chunks = self.chunks[position:]
+                position = len(self.chunks)
+                done, error = self.done, self.error
+            yield from new_chunks
+            if done:
+                if error is not None:
+                    raise error
+                return
+
+
+def _cache_from_env():
+    """Response cache configured by LLM_CACHE_PATH/_MAX_ENTRIES/_TTLS; None when disabled or unusable"""
+    max_entries = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '10000'))
+    if max_entries <= 0:
+        return None
+    try:
+        return LLMCache(os.getenv('LLM_CACHE_PATH') or None, max_entries, parse_ttls(os.getenv('LLM_CACHE_TTLS')))
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"LLM response cache disabled: {e}")
+        return None
+
+
+def _rate_limiter_from_env():
+    """Admission control configured by LLM_RATE_LIMIT_* / LLM_QUEUE_*; None when the rate is 0"""
+    rate_per_minute = float(os.getenv('LLM_RATE_LIMIT_PER_MINUTE', '60'))
+    if rate_per_minute <= 0:
+        return None
+    return LLMRateLimiter(rate_per_minute,
+                          burst=int(os.getenv('LLM_RATE_LIMIT_BURST', '10')),
+                          max_queue=int(os.getenv('LLM_QUEUE_SIZE', '50')),
+                          max_wait=float(os.getenv('LLM_QUEUE_MAX_WAIT_SECONDS', '10')))
+
+
+def _breaker_from_env():
+    """Circuit breaker configured by LLM_BREAKER_FAILURES/_RESET_SECONDS; None when failures is 0"""
+    failure_threshold = int(os.getenv('LLM_BREAKER_FAILURES', '5'))
+    if failure_threshold <= 0:
+        return None
+    return CircuitBreaker(failure_threshold, float(os.getenv('LLM_BREAKER_RESET_SECONDS', '30')))
+
+
+class LLMClient:
+    def __init__(self, model_name=None, api_key=None, timeout=None, cache=None, rate_limiter=None,
+                 breaker=None, timeouts=None):
+        self.model_name = model_name or os.getenv('LLM_MODEL', DEFAULT_MODEL)
+        self.api_key = api_key or os.getenv('GOOGLE_API_KEY')
+        self.timeout = timeout or float(os.getenv('LLM_TIMEOUT_SECONDS', '30'))
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.breaker = breaker
+        self.timeouts = dict(CALL_SITE_TIMEOUTS, **(timeouts or {}))
+        self._fallbacks = {}
+        self._model = None
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+        self._flights = {}
+        self._flight_stats = {}
+        self._flights_lock = threading.Lock()
+
+    @property
+    def available(self):
+        """Whether an API key is configured; does not import the SDK"""
+        return bool(self.api_key)
+
+    def _get_model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    if not self.available:
+                        raise LLMUnavailable("GOOGLE_API_KEY is not configured")
+                    import google.generativeai as genai
+
+                    genai.configure(api_key=self.api_key)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def warm_up(self):
+        """Import and configure the SDK ahead of the first request (no API call is made)"""
+        if self.available:
+            self._get_model()
+
+    @staticmethod
+    def _request_options(timeout):
+        from google.api_core import retry
+
+        # The SDK's default retry keeps retrying transient errors for minutes;
+        # bound the whole call, retries included, by the timeout
+        return {'timeout': timeout, 'retry': retry.Retry(timeout=timeout)}
+
+    def _record(self, call_site, outcome, seconds):
+        with self._stats_lock:
+            stats = self._stats.setdefault(call_site, {'calls': 0, 'errors': 0, 'total_seconds': 0.0})
+            stats['calls'] += 1
+            stats['total_seconds'] += seconds
+            if outcome != 'ok':
+                stats['errors'] += 1
+
+    def _cache_get(self, contents, call_site):
+        # Only plain text prompts are cached; multimodal contents (images) always go upstream
+        if self.cache is None or not isinstance(contents, str):
+            return None
+        try:
+            return self.cache.get(self.model_name, contents, call_site)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            return None
+
+    def _cache_put(self, contents, call_site, text):
+        if self.cache is None or not isinstance(contents, str):
+            return
+        try:
+            self.cache.put(self.model_name, contents, call_site, text)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def _admit(self, call_site):
+        """Fail fast while the breaker is open, then wait for the rate limiter"""
+        if self.breaker is not None:
+            self.breaker.before_call()
+        if self.rate_limiter is not None:
+            try:
+                self.rate_limiter.acquire(call_site)
+            except LLMBackpressure:
+                if self.breaker is not None:
+                    self.breaker.release()
+                raise
+
+    def timeout_for(self, call_site):
+        return self.timeouts.get(call_site, self.timeout)
+
+    def _outcome(self, call_site, seconds, error=None):
+        """Record a finished upstream call in the stats and the breaker"""
+        self._record(call_site, 'ok' if error is None else 'error', seconds)
+        if self.breaker is None:
+            return
+        if error is None:
+            self.breaker.record_success()
+        elif counts_as_failure(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.release()
+
+    def _use_fallback(self, call_site, error, fallback):
+        logger.warning(f"LLM call {call_site} failed ({type(error).__name__}: {error}); using fallback answer")
+        with self._stats_lock:
+            self._fallbacks[call_site] = self._fallbacks.get(call_site, 0) + 1
+        return fallback()
+
+    def _upstream(self, model, contents, call_site, timeout, stream):
+        """Admit the call, then yield its text from Gemini (one chunk unless streaming) and cache it"""
+        self._admit(call_site)
+
+        timeout = timeout or self.timeout_for(call_site)
+        started = time.perf_counter()
+        parts = []
+        try:
+            if stream:
+                response = model.generate_content(contents, stream=True,
+                                                  request_options=self._request_options(timeout))
+                for chunk in response:
+                    text = chunk.text
+                    if text:
+                        parts.append(text)
+                        yield text
+            else:
+                response = model.generate_content(contents, request_options=self._request_options(timeout))
+                parts.append(response.text)
+        except GeneratorExit:
+            # The client disconnected; an incomplete answer is neither an error nor cacheable
+            self._record(call_site, 'ok', time.perf_counter() - started)
+            if self.breaker is not None:
+                self.breaker.release()
+            raise
+        except Exception as e:
+            self._outcome(call_site, time.perf_counter() - started, e)
+            raise
+        self._outcome(call_site, time.perf_counter() - started)
+        text = ''.join(parts)
+        self._cache_put(contents, call_site, text)
+        if not stream:
+            yield text
+
+    def _single_flight(self, model, contents, call_site, timeout, stream):
+        """Chunks of the answer, sharing one upstream call between concurrent identical prompts"""
+        if not isinstance(contents, str):
+            yield from self._upstream(model, contents, call_site, timeout, stream)
+            return
+
+        key = (self.model_name, contents)
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.followers += 1
+            counters = self._flight_stats.setdefault(call_site, {'leaders': 0, 'coalesced': 0})
+            counters['leaders' if leader else 'coalesced'] += 1
+
+        if not leader:
+            try:
+                yield from flight.follow()
+            finally:
+                with self._flights_lock:
+                    flight.followers -= 1
+            return
+
+        upstream = self._upstream(model, contents, call_site, timeout, stream)
+        try:
+            for chunk in upstream:
+                flight.publish(chunk)
+                yield chunk
+        except GeneratorExit:
+            # The leader's client went away; followers still want the whole answer,
+            # so the call keeps running for them on a background thread
+            with self._flights_lock:
+                handed_off = flight.followers > 0
+                if not handed_off:
+                    self._flights.pop(key, None)
+            if handed_off:
+                threading.Thread(target=self._finish_flight, args=(upstream, flight, key),
+                                 name='llm-single-flight', daemon=True).start()
+            else:
+                upstream.close()
+                flight.finish(RuntimeError("The shared Gemini stream was cancelled by its requester"))
+            raise
+        except BaseException as e:
+            self._end_flight(flight, key, e)
+            raise
+        else:
+            self._end_flight(flight, key)
+
+    def _end_flight(self, flight, key, error=None):
+        with self._flights_lock:
+            self._flights.pop(key, None)
+        flight.finish(error)
+
+    def _finish_flight(self, upstream, flight, key):
+        """Drain a flight whose leader disconnected, publishing the rest to its followers"""
+        try:
+            for chunk in upstream:
+                flight.publish(chunk)
+        except BaseException as e:
+            self._end_flight(flight, key, e)
+        else:
+            self._end_flight(flight, key)
+
+    def generate(self, contents, call_site='default', timeout=None, fallback=None):
+        """Text of a generate_content call; raises LLMUnavailable, LLMBackpressure or the SDK's error
+
+        Order: response cache, then single-flight (identical in-flight prompts share
+        one call), then the circuit breaker and rate limiter, then Gemini. When the
+        call fails (no API key, open breaker, timeout, upstream error), fallback()
+        is returned instead if given; backpressure is always raised so the caller
+        can retry.
+        """
+        cached = self._cache_get(contents, call_site)
+        if cached is not None:
+            return cached
+        try:
+            model = self._get_model()
+            return ''.join(self._single_flight(model, contents, call_site, timeout, stream=False))
+        except LLMBackpressure:
+            raise
+        except Exception as e:
+            if fallback is None:
+                raise
+            return self._use_fallback(call_site, e, fallback)
+
+    def generate_stream(self, contents, call_site='default', timeout=None, fallback=None):
+        """Yield the response text in chunks as Gemini produces them (a cache hit is one chunk)
+
+        Errors surface while iterating, since nothing is requested before the first next().
+        fallback() is yielded as one chunk if the call fails before producing any text.
+        """
+        cached = self._cache_get(contents, call_site)
+        if cached is not None:
+            yield cached
+            return
+        produced = False
+        try:
+            model = self._get_model()
+            for chunk in self._single_flight(model, contents, call_site, timeout, stream=True):
+                produced = True
+                yield chunk
+        except LLMBackpressure:
+            raise
+        except Exception as e:
+            if fallback is None or produced:
+                raise
+            yield self._use_fallback(call_site, e, fallback)
+
+    def single_flight_stats(self):
+        """Upstream calls (leaders) and calls that shared them instead (coalesced), per call site"""
+        with self._flights_lock:
+            call_sites = {call_site: dict(counters) for call_site, counters in self._flight_stats.items()}
+            in_flight = len(self._flights)
+        leaders = sum(counters['leaders'] for counters in call_sites.values())
+        coalesced = sum(counters['coalesced'] for counters in call_sites.values())
+        return {
+            'in_flight': in_flight,
+            'leaders': leaders,
+            'coalesced': coalesced,
+            'coalesced_ratio': round(coalesced / (leaders + coalesced), 4) if leaders + coalesced else 0.0,
+            'call_sites': call_sites
+        }
+
+    def resilience_stats(self):
+        """Breaker state and counters, fallback answers per call site and the timeout budgets"""
+        with self._stats_lock:
+            fallbacks = dict(self._fallbacks)
+        return {
+            'breaker': self.breaker.stats() if self.breaker is not None else {'enabled': False},
+            'fallbacks': fallbacks,
+            'timeouts': dict(self.timeouts, default=self.timeout)
+        }
+
+    def stats(self):
+        """Calls, errors and mean latency per call site (cache hits are not calls)"""
+        with self._stats_lock:
+            return {
+                call_site: dict(stats,
+                                total_seconds=round(stats['total_seconds'], 3),
+                                mean_seconds=round(stats['total_seconds'] / stats['calls'], 3))
+                for call_site, stats in self._stats.items()
+            }
+
+
+# Global client instance shared by all services
+llm_client = LLMClient(cache=_cache_from_env(), rate_limiter=_rate_limiter_from_env(), breaker=_breaker_from_env(),
+                       timeouts=parse_timeouts(os.getenv('LLM_TIMEOUTS')))
@@ -0,0 +1,173 @@
+"""Admission control for Gemini calls: a token bucket in front of a bounded priority queue.
+
+The bucket refills at the configured quota (LLM_RATE_LIMIT_PER_MINUTE) and allows
+bursts of up to LLM_RATE_LIMIT_BURST calls. A call that finds no token waits in a
+priority queue: interactive, farmer-facing call sites (AI advice) are admitted
+before standard ones, which go before background work (forum summaries, trending
+topics). When the queue is full, an arriving call displaces the lowest-priority
+waiter if it outranks it; otherwise it fails fast with LLMBackpressure carrying a
+retry hint. Waiting longer than LLM_QUEUE_MAX_WAIT_SECONDS also fails.
+"""
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+INTERACTIVE = 0
+STANDARD = 1
+BACKGROUND = 2
+
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', STANDARD: 'standard', BACKGROUND: 'background'}
+
+# Call sites not listed here are STANDARD
+CALL_SITE_PRIORITIES = {
+    'community.advice': INTERACTIVE,
+    'farming.recommendations': INTERACTIVE,
+    'image.analysis': INTERACTIVE,
+    'community.trending_topics': BACKGROUND,
+    'community.post_summary': BACKGROUND,
+    'community.knowledge_base': BACKGROUND,
+}
+
+# Recent admission waits kept for the percentiles in stats()
+WAIT_SAMPLES = 1000
+
+
+class LLMBackpressure(RuntimeError):
+    """The LLM queue is full (or the wait exceeded its limit); retry after retry_after seconds"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ('rejected',)
+
+    def __init__(self):
+        # Reason the waiter was turned away, set by whoever displaced it
+        self.rejected = None
+
+
+class LLMRateLimiter:
+    def __init__(self, rate_per_minute=60, burst=10, max_queue=50, max_wait=10.0, priorities=None):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.priorities = dict(CALL_SITE_PRIORITIES, **(priorities or {}))
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self._max_depth = 0
+        self._counters = {
+            name: {'admitted': 0, 'queued': 0, 'rejected': 0, 'displaced': 0, 'timed_out': 0}
+            for name in PRIORITY_NAMES.values()
+        }
+
+    def priority_for(self, call_site):
+        return self.priorities.get(call_site, STANDARD)
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+
+    def _retry_after(self):
+        """Seconds until the queue ahead of a new caller should have drained"""
+        return max(1, math.ceil((len(self._queue) + 1) / self.rate))
+
+    def _remove(self, entry):
+        self._queue.remove(entry)
+        heapq.heapify(self._queue)
+
+    def acquire(self, call_site):
+        """Block until the call may proceed; returns the seconds spent waiting, raises LLMBackpressure"""
+        priority = self.priority_for(call_site)
+        counters = self._counters[PRIORITY_NAMES[priority]]
+        started = time.monotonic()
+        with self._condition:
+            self._refill(started)
+            if not self._queue and self._tokens >= 1:
+                self._tokens -= 1
+                counters['admitted'] += 1
+                self._waits.append(0.0)
+                return 0.0
+
+            if len(self._queue) >= self.max_queue:
+                lowest = max(self._queue) if self._queue else None
+                if lowest is None or lowest[0] <= priority:
+                    counters['rejected'] += 1
+                    raise LLMBackpressure("LLM queue is full", self._retry_after())
+                # Make room by turning away the lowest-priority, most recent waiter
+                self._remove(lowest)
+                lowest[2].rejected = "Displaced from the LLM queue by a higher-priority request"
+                self._counters[PRIORITY_NAMES[lowest[0]]]['displaced'] += 1
+                self._condition.notify_all()
+
+            waiter = _Waiter()
+            entry = (priority, next(self._sequence), waiter)
+            heapq.heappush(self._queue, entry)
+            counters['queued'] += 1
+            self._max_depth = max(self._max_depth, len(self._queue))
+            deadline = started + self.max_wait
+
+            while True:
+                if waiter.rejected:
+                    raise LLMBackpressure(waiter.rejected, self._retry_after())
+                now = time.monotonic()
+                self._refill(now)
+                if self._queue[0] is entry and self._tokens >= 1:
+                    heapq.heappop(self._queue)
+                    self._tokens -= 1
+                    counters['admitted'] += 1
+                    waited = now - started
+                    self._waits.append(waited)
+                    # The next waiter may be able to go too
+                    self._condition.notify_all()
+                    return waited
+                if now >= deadline:
+                    self._remove(entry)
+                    counters['timed_out'] += 1
+                    self._condition.notify_all()
+                    raise LLMBackpressure(f"Waited more than {self.max_wait:g}s for the LLM queue",
+                                          self._retry_after())
+                # The head sleeps until its token is due; everyone else until they are notified
+                timeout = deadline - now
+                if self._queue[0] is entry:
+                    timeout = min(timeout, (1 - self._tokens) / self.rate)
+                self._condition.wait(timeout)
+
+    def stats(self):
+        """Queue depth (now and peak), wait-time percentiles and per-priority admission counters"""
+        with self._condition:
+            self._refill(time.monotonic())
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for priority, _, _ in self._queue:
+                depth[PRIORITY_NAMES[priority]] += 1
+            waits_ms = np.array(self._waits) * 1e3
+            counters = {name: dict(values) for name, values in self._counters.items()}
+            return {
+                'enabled': True,
+                'rate_per_minute': round(self.rate * 60, 2),
+                'burst': self.burst,
+                'tokens': round(self._tokens, 2),
+                'max_queue': self.max_queue,
+                'queue_depth': len(self._queue),
+                'queue_depth_by_priority': depth,
+                'max_queue_depth': self._max_depth,
+                'wait_ms': {
+                    'samples': len(waits_ms),
+                    'mean': round(float(waits_ms.mean()), 2) if len(waits_ms) else 0.0,
+                    'p50': round(float(np.percentile(waits_ms, 50)), 2) if len(waits_ms) else 0.0,
+                    'p95': round(float(np.percentile(waits_ms, 95)), 2) if len(waits_ms) else 0.0,
+                    'max': round(float(waits_ms.max()), 2) if len(waits_ms) else 0.0
+                },
+                'priorities': counters
+            }
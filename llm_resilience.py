@@ -0,0 +1,142 @@
+"""Timeouts, circuit breaking and fallback answers for Gemini calls.
+
+Every call site has its own timeout budget: farmer-facing pages get a few
+seconds, while background work may take longer. The circuit breaker counts
+consecutive upstream failures (timeouts, 5xx, quota errors). After
+LLM_BREAKER_FAILURES of them, it opens and every call fails fast for
+LLM_BREAKER_RESET_SECONDS. It then half-opens and lets a single probe through:
+success closes it, failure opens it again.
+
+While a call cannot be answered, services return a deterministic fallback built
+from data they already hold (crop calendar, crop requirements, weather alerts,
+price changes), prefixed with FALLBACK_NOTICE, so pages still render.
+"""
+import threading
+import time
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Seconds each call site may take, retries included; unlisted call sites use LLM_TIMEOUT_SECONDS
+CALL_SITE_TIMEOUTS = {
+    'community.advice': 12,
+    'farming.recommendations': 10,
+    'weather.farming_analysis': 10,
+    'market.analysis': 10,
+    'planting.schedule': 15,
+    'resources.recommendations': 12,
+    'image.analysis': 20,
+    # Run while a forum post is being created
+    'community.moderation': 6,
+    'community.post_summary': 6,
+}
+
+FALLBACK_NOTICE = "AI analysis is temporarily unavailable. Here is a summary based on Khula's own data:"
+
+
+def parse_timeouts(value):
+    """'call.site=seconds,other.site=seconds' overrides, e.g. from LLM_TIMEOUTS"""
+    timeouts = {}
+    for item in filter(None, (part.strip() for part in (value or '').split(','))):
+        call_site, _, seconds = item.partition('=')
+        timeouts[call_site.strip()] = float(seconds)
+    return timeouts
+
+
+def fallback_text(*sections):
+    """FALLBACK_NOTICE followed by the given sections (strings or lists of bullet lines)"""
+    parts = [FALLBACK_NOTICE]
+    for section in sections:
+        if isinstance(section, (list, tuple)):
+            section = "\n".join(f"- {line}" for line in section)
+        if section:
+            parts.append(section)
+    return "\n\n".join(parts)
+
+
+def counts_as_failure(error):
+    """Whether an error says Gemini is unhealthy, as opposed to a problem with this one request"""
+    if isinstance(error, ValueError):
+        # response.text on a blocked or empty response
+        return False
+    try:
+        from google.api_core import exceptions
+    except ImportError:
+        return True
+    if isinstance(error, exceptions.ClientError):
+        return isinstance(error, exceptions.TooManyRequests)
+    return True
+
+
+class LLMCircuitOpen(RuntimeError):
+    """Gemini calls are failing; the breaker rejects calls until retry_after seconds have passed"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self._counters = {'short_circuited': 0, 'failures': 0, 'successes': 0, 'opened': 0, 'probes': 0}
+
+    def _retry_after(self, now):
+        return max(0.0, self._opened_at + self.reset_timeout - now)
+
+    def before_call(self):
+        """Raise LLMCircuitOpen unless the call may go upstream (in half-open, only one probe may)"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN and now - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                self._counters['probes'] += 1
+                return
+            self._counters['short_circuited'] += 1
+            raise LLMCircuitOpen("Gemini circuit breaker is open", round(self._retry_after(now), 1))
+
+    def record_success(self):
+        with self._lock:
+            self._counters['successes'] += 1
+            self._failures = 0
+            self._probing = False
+            self.state = CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self._counters['failures'] += 1
+            self._failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self._counters['opened'] += 1
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+    def release(self):
+        """A call that was let through ended without an answer either way (e.g. the client left)"""
+        with self._lock:
+            self._probing = False
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            return dict(
+                self._counters,
+                state=self.state,
+                consecutive_failures=self._failures,
+                failure_threshold=self.failure_threshold,
+                reset_timeout=self.reset_timeout,
+                retry_after=round(self._retry_after(now), 1) if self.state == OPEN else 0.0
+            )
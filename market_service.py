@@ -1,24 +1,18 @@
 import requests
-import google.generativeai as genai
-import os
-from dotenv import load_dotenv
 from datetime import datetime, timedelta
 import random
 import json
 from database import market_db
-
-load_dotenv()
+from llm_client import llm_client
+from llm_rate_limiter import LLMBackpressure
+from llm_resilience import fallback_text
+from prompt_canonicalizer import prompt_canonicalizer
 
 class MarketService:
     def __init__(self):
         """Initialize market service with Gemini AI for analysis"""
-        # Initialize Gemini AI
-        google_api_key = os.getenv('GOOGLE_API_KEY')
-        if google_api_key:
-            genai.configure(api_key=google_api_key)
-            self.genai_model = genai.GenerativeModel('gemini-1.5-flash')
-        else:
-            self.genai_model = None
+        # Gemini client shared by all services
+        self.llm = llm_client
 
     def get_simulated_market_prices(self):
         """Get simulated market prices for South African crops"""
@@ -93,9 +87,9 @@ class MarketService:
             print(f"Error fetching market trends: {e}")
             return {}
 
-    def get_market_analysis(self, crop_type, location="South Africa"):
-        """Get AI-powered market analysis for a specific crop"""
-        if not self.genai_model:
+    def get_market_analysis(self, crop_type, location="South Africa", stream=False):
+        """Get AI-powered market analysis for a specific crop (an iterator of text chunks when stream=True)"""
+        if not self.llm.available:
             return "Market analysis unavailable - AI service not configured"
 
         # Get market data
@@ -111,15 +105,16 @@ class MarketService:
         # Calculate average price from history
         history = crop_data['history']
         avg_price = sum([day['price'] for day in history]) / len(history)
+        band = lambda field, value: prompt_canonicalizer.format('market.analysis', field, value)
 
         prompt = f"""
         As an agricultural market analyst, provide analysis for {crop_type} in {location}:
 
         Current Market Data:
-        - Current Price: R{current_price}/ton
-        - Price Change: {change_percent}%
-        - 30-day Average: R{avg_price:.0f}/ton
-        - Price vs Average: {((current_price - avg_price) / avg_price * 100):.1f}%
+        - Current Price: {band('price', current_price)}
+        - Price Change: {band('change_percent', change_percent)}
+        - 30-day Average: {band('price', avg_price)}
+        - Price vs Average: {band('price_vs_average', (current_price - avg_price) / avg_price * 100)}
 
         Please provide:
         1. Market outlook for {crop_type} (bullish/bearish/neutral)
@@ -132,12 +127,43 @@ class MarketService:
         Keep the analysis practical and actionable for South African farmers.
         """
 
+        fallback = lambda: self._fallback_market_analysis(crop_type, current_price, change_percent, avg_price)
+        if stream:
+            return self.llm.generate_stream(prompt, call_site='market.analysis', fallback=fallback)
         try:
-            response = self.genai_model.generate_content(prompt)
-            return response.text
+            return self.llm.generate(prompt, call_site='market.analysis', fallback=fallback)
+        except LLMBackpressure:
+            raise
         except Exception as e:
             return f"Unable to generate market analysis: {str(e)}"
 
+    def _fallback_market_analysis(self, crop_type, current_price, change_percent, avg_price):
+        """Deterministic outlook from the price change and 30-day average, used when Gemini is down"""
+        # Same ±3% threshold as the price movement alerts
+        if change_percent > 3:
+            outlook = 'bullish'
+        elif change_percent < -3:
+            outlook = 'bearish'
+        else:
+            outlook = 'neutral'
+
+        vs_average = (current_price - avg_price) / avg_price * 100
+        if vs_average > 3:
+            strategy = "Prices are above the 30-day average: consider selling part of your stock now."
+        elif vs_average < -3:
+            strategy = "Prices are below the 30-day average: store produce if you can and sell into a recovery."
+        else:
+            strategy = "Prices are close to the 30-day average: spread sales over the coming weeks to limit risk."
+
+        return fallback_text(
+            f"{crop_type.title()} market outlook: {outlook}",
+            [
+                f"Current price: R{current_price:,.0f}/ton ({change_percent:+.2f}% today)",
+                f"30-day average: R{avg_price:,.0f}/ton ({vs_average:+.1f}% vs average)",
+                strategy
+            ]
+        )
+
     def get_price_alerts(self, crop_type, target_price=None):
         """Get price alerts for specific crops"""
         market_data = self.get_market_trends(crop_type)
@@ -177,7 +203,7 @@ class MarketService:
 
     def get_seasonal_trends(self, crop_type):
         """Get seasonal price trends for crop planning"""
-        if not self.genai_model:
+        if not self.llm.available:
             return "Seasonal analysis unavailable"
 
         prompt = f"""
@@ -195,10 +221,21 @@ class MarketService:
         """
 
         try:
-            response = self.genai_model.generate_content(prompt)
-            return response.text
+            return self.llm.generate(prompt, call_site='market.seasonal_trends',
+                                     fallback=lambda: self._fallback_seasonal_trends(crop_type))
         except Exception as e:
             return f"Unable to generate seasonal analysis: {str(e)}"
 
+    def _fallback_seasonal_trends(self, crop_type):
+        """General seasonal price pattern with today's price, used when Gemini is down"""
+        lines = [
+            "Prices usually fall at harvest, when supply peaks, and rise through the months before the next harvest.",
+            "Storing part of the crop and selling later in the season tends to earn more, if storage losses are low."
+        ]
+        price = self.get_simulated_market_prices().get(crop_type.lower())
+        if price:
+            lines.insert(0, f"Current {crop_type} price: R{price['price']:,.0f}/ton ({price['change']:+.2f}% today)")
+        return fallback_text(f"Seasonal price pattern for {crop_type}:", lines)
+
 # Initialize market service
 market_service = MarketService()
\ No newline at end of file
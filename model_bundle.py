@@ -0,0 +1,166 @@
+"""Single-file, memory-mappable model bundle.
+
+Layout::
+
+    magic (8 bytes) | format version (uint32) | header length (uint32)
+    JSON header (padded so the data section starts on a 64-byte boundary)
+    data section: every forest array, each aligned to 64 bytes
+
+The header carries the feature schema, preprocessing constants, model version,
+array descriptors and a SHA-256 checksum of the data section. Arrays are opened
+as read-only views over an mmap of the file, so forked workers share one
+physical copy of the forest through the page cache and loading is near-instant.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from datetime import datetime
+
+import numpy as np
+
+from compiled_forest import CompiledForest
+from inference_transform import InferenceTransform
+
+BUNDLE_MAGIC = b'KHULAFB\x00'
+BUNDLE_FORMAT_VERSION = 1
+BUNDLE_FILENAME = 'farming_model.bundle'
+ALIGNMENT = 64
+
+_PREAMBLE = struct.Struct('<8sII')
+
+
+def _padding(offset):
+    return (-offset) % ALIGNMENT
+
+
+class ModelBundle:
+    """Forest, inference transform and metadata read from a bundle file"""
+
+    def __init__(self, forest, transform, metadata, path=None, _buffer=None):
+        self.forest = forest
+        self.transform = transform
+        self.metadata = metadata
+        self.path = path
+        # Keeps the mmap alive for as long as the array views are in use
+        self._buffer = _buffer
+
+    @property
+    def model_version(self):
+        return self.metadata.get('model_version')
+
+
+def write_bundle(path, forest, transform, metadata=None):
+    """Write a bundle atomically (temp file + rename) and return its header"""
+    arrays = {name: np.ascontiguousarray(array) for name, array in forest.arrays().items()}
+
+    descriptors = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset += _padding(offset)
+        descriptors[name] = {'offset': offset, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+        offset += array.nbytes
+    data_size = offset
+
+    digest = hashlib.sha256()
+    chunks = []
+    position = 0
+    for name, array in arrays.items():
+        pad = b'\x00' * (descriptors[name]['offset'] - position)
+        data = array.tobytes()
+        digest.update(pad)
+        digest.update(data)
+        chunks.append(pad)
+        chunks.append(data)
+        position = descriptors[name]['offset'] + len(data)
+
+    metadata = dict(metadata or {})
+    metadata.setdefault('model_version', datetime.now().strftime('%Y%m%d%H%M%S'))
+    metadata.setdefault('created_at', datetime.now().isoformat())
+
+    header = {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'metadata': metadata,
+        'schema': transform.schema(),
+        'forest': {'n_trees': forest.n_trees, 'n_outputs': forest.n_outputs, 'n_nodes': forest.n_nodes},
+        'arrays': descriptors,
+        'data_size': data_size,
+        'checksum': {'algorithm': 'sha256', 'digest': digest.hexdigest()}
+    }
+    header_bytes = json.dumps(header).encode('utf-8')
+    header_bytes += b' ' * _padding(_PREAMBLE.size + len(header_bytes))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(_PREAMBLE.pack(BUNDLE_MAGIC, BUNDLE_FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for chunk in chunks:
+            f.write(chunk)
+    os.replace(temp_path, path)
+
+    return header
+
+
+def read_header(path):
+    """Read only the JSON header of a bundle"""
+    with open(path, 'rb') as f:
+        header, _ = _parse_preamble(f.read(_PREAMBLE.size), f)
+    return header
+
+
+def _parse_preamble(preamble, f):
+    if len(preamble) < _PREAMBLE.size:
+        raise ValueError("Not a model bundle: file too short")
+    magic, format_version, header_length = _PREAMBLE.unpack(preamble)
+    if magic != BUNDLE_MAGIC:
+        raise ValueError("Not a model bundle: bad magic bytes")
+    if format_version != BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported bundle format version {format_version}")
+    header = json.loads(f.read(header_length).decode('utf-8'))
+    return header, _PREAMBLE.size + header_length
+
+
+def read_bundle(path, verify=True):
+    """Open a bundle with its arrays memory-mapped read-only"""
+    with open(path, 'rb') as f:
+        header, data_start = _parse_preamble(f.read(_PREAMBLE.size), f)
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    data = memoryview(buffer)[data_start:data_start + header['data_size']]
+    if len(data) != header['data_size']:
+        raise ValueError("Model bundle is truncated")
+
+    if verify:
+        digest = hashlib.sha256(data).hexdigest()
+        if digest != header['checksum']['digest']:
+            raise ValueError("Model bundle checksum mismatch")
+
+    arrays = {}
+    for name, descriptor in header['arrays'].items():
+        dtype = np.dtype(descriptor['dtype'])
+        count = int(np.prod(descriptor['shape'], dtype=np.int64))
+        arrays[name] = np.frombuffer(buffer, dtype=dtype, count=count,
+                                     offset=data_start + descriptor['offset']).reshape(descriptor['shape'])
+
+    return ModelBundle(
+        forest=CompiledForest.from_arrays(arrays),
+        transform=InferenceTransform.from_schema(header['schema']),
+        metadata=header['metadata'],
+        path=path,
+        _buffer=buffer
+    )
+
+
+if __name__ == '__main__':
+    # python model_bundle.py [model_dir] -- convert the legacy joblib artifacts into a bundle
+    from FarmingAnalysis import FarmingAnalyzer
+
+    analyzer = FarmingAnalyzer(model_dir=sys.argv[1] if len(sys.argv) > 1 else None)
+    analyzer.load_legacy_model()
+    header = analyzer.save_model()
+    print(f"Wrote {analyzer.bundle_path} (version {header['metadata']['model_version']}, "
+          f"{header['forest']['n_trees']} trees, {header['forest']['n_nodes']} nodes)")
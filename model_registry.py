@@ -0,0 +1,153 @@
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+from FarmingAnalysis import FarmingAnalyzer
+from model_bundle import BUNDLE_FILENAME, read_header, write_bundle
+
+VERSION_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$')
+
+
+class ModelRegistry:
+    """Versioned model bundles under models/versions/<version>/ with atomic hot-swap.
+
+    Each version is loaded into its own FarmingAnalyzer (with its own prediction
+    table and cache). Activating a version loads it in a background thread and
+    then replaces the active analyzer with a single reference assignment, so a
+    request that grabbed the active analyzer keeps using that version to the end
+    and no request ever sees a half-loaded model.
+    """
+
+    def __init__(self, model_dir):
+        self.model_dir = model_dir
+        self.versions_dir = os.path.join(model_dir, 'versions')
+        self._active = None
+        self._lock = threading.Lock()
+        self._jobs = {}
+
+    def _version_dir(self, version):
+        if not VERSION_PATTERN.match(version or ''):
+            raise ValueError(f"Invalid model version: {version!r}")
+        return os.path.join(self.versions_dir, version)
+
+    def list_versions(self):
+        """Metadata of every published version, newest first"""
+        versions = []
+        if os.path.isdir(self.versions_dir):
+            for version in os.listdir(self.versions_dir):
+                bundle_path = os.path.join(self.versions_dir, version, BUNDLE_FILENAME)
+                if not VERSION_PATTERN.match(version) or not os.path.exists(bundle_path):
+                    continue
+                try:
+                    metadata = read_header(bundle_path)['metadata']
+                except Exception as e:
+                    metadata = {'error': f'Unreadable bundle: {e}'}
+                versions.append({'version': version, 'metadata': metadata})
+        versions.sort(key=lambda entry: str(entry['metadata'].get('created_at', '')), reverse=True)
+        return versions
+
+    def new_version_path(self, version):
+        """Bundle path for a version that must not exist yet; versions are immutable"""
+        bundle_path = os.path.join(self._version_dir(version), BUNDLE_FILENAME)
+        if os.path.exists(bundle_path):
+            raise ValueError(f"Model version {version} already exists")
+        return bundle_path
+
+    def publish(self, analyzer, version=None, metadata=None):
+        """Store an analyzer's compiled artifacts as a new immutable version"""
+        if analyzer.forest is None or analyzer.inference_transform is None:
+            analyzer.compile_inference()
+        return self.publish_bundle(analyzer.forest, analyzer.inference_transform, version, metadata)
+
+    def publish_bundle(self, forest, transform, version=None, metadata=None):
+        """Store a compiled forest and its inference transform as a new immutable version"""
+        version = version or datetime.now().strftime('%Y%m%d%H%M%S')
+        bundle_path = self.new_version_path(version)
+
+        metadata = dict(metadata or {})
+        metadata['model_version'] = version
+        write_bundle(bundle_path, forest, transform, metadata)
+        return version
+
+    def load(self, version):
+        """Load a published version into a fresh analyzer"""
+        version_dir = self._version_dir(version)
+        if not os.path.exists(os.path.join(version_dir, BUNDLE_FILENAME)):
+            raise KeyError(f"Unknown model version: {version}")
+
+        analyzer = FarmingAnalyzer(model_dir=version_dir)
+        analyzer.load_model()
+        # The directory name is the registry's identity for the version
+        analyzer.model_version = version
+        return analyzer
+
+    def set_active(self, analyzer):
+        """Atomically make an already loaded analyzer the one serving requests"""
+        with self._lock:
+            previous = self._active
+            self._active = analyzer
+        return previous
+
+    def active(self):
+        """The analyzer serving requests; callers should fetch it once per request"""
+        return self._active
+
+    @property
+    def active_version(self):
+        analyzer = self._active
+        return analyzer.model_version if analyzer is not None else None
+
+    def activate(self, version):
+        """Load a version and swap it in; raises if loading fails (the old version keeps serving)"""
+        started = time.perf_counter()
+        analyzer = self.load(version)
+        previous = self.set_active(analyzer)
+        if previous is not None and previous is not analyzer:
+            # Work already queued on the old pool drains; later requests holding the
+            # old analyzer score in-process
+            previous.close_inference_pool()
+        print(f"Activated model version {version} in {time.perf_counter() - started:.3f}s")
+        return analyzer
+
+    def activate_async(self, version):
+        """Load and swap in a version on a background thread; returns the job status"""
+        self._version_dir(version)
+        with self._lock:
+            job = self._jobs.get(version)
+            if job is not None and job['state'] == 'loading':
+                return dict(job)
+            job = {'version': version, 'state': 'loading', 'started_at': datetime.now().isoformat(),
+                   'load_time': None, 'error': None}
+            self._jobs[version] = job
+
+        def run():
+            started = time.perf_counter()
+            try:
+                self.activate(version)
+                job['state'] = 'activated'
+            except Exception as e:
+                job['state'] = 'failed'
+                job['error'] = str(e)
+            finally:
+                job['load_time'] = round(time.perf_counter() - started, 3)
+
+        threading.Thread(target=run, name=f'model-activate-{version}', daemon=True).start()
+        return dict(job)
+
+    def jobs(self):
+        with self._lock:
+            return {version: dict(job) for version, job in self._jobs.items()}
+
+
+if __name__ == '__main__':
+    # python model_registry.py [version] -- publish the current models/ bundle as a registry version
+    import sys
+
+    analyzer = FarmingAnalyzer()
+    analyzer.load_model()
+    registry = ModelRegistry(analyzer.model_dir)
+    published = registry.publish(analyzer, sys.argv[1] if len(sys.argv) > 1 else None,
+                                 metadata={'source_version': analyzer.model_version})
+    print(f"Published model version {published} to {registry.versions_dir}")
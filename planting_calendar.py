@@ -1,23 +1,40 @@
-import google.generativeai as genai
+import config
 import os
-from dotenv import load_dotenv
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
 from database import calendar_db
 from weather_service import weather_service
 from market_service import market_service
+from llm_client import llm_client
+from llm_rate_limiter import LLMBackpressure
+from llm_resilience import fallback_text
 
-load_dotenv()
+# Slack on top of a branch's upstream timeouts for the work around them (cache lookups, parsing)
+BRANCH_MARGIN_SECONDS = 1.0
 
 class PlantingCalendarService:
     def __init__(self):
         """Initialize planting calendar service with Gemini AI"""
-        # Initialize Gemini AI
-        google_api_key = os.getenv('GOOGLE_API_KEY')
-        if google_api_key:
-            genai.configure(api_key=google_api_key)
-            self.genai_model = genai.GenerativeModel('gemini-1.5-flash')
-        else:
-            self.genai_model = None
+        # Gemini client shared by all services
+        self.llm = llm_client
+
+        # Weather and market lookups are independent, so they run side by side;
+        # a branch that misses its timeout is dropped from the prompt
+        upstream_workers = int(os.getenv('PLANTING_UPSTREAM_WORKERS', '8'))
+        self.upstream_pool = ThreadPoolExecutor(max_workers=upstream_workers, thread_name_prefix='planting-upstream')
+        # One slot per worker: a branch only starts when a worker is free, never queues behind
+        # timed-out branches that are still running
+        self.upstream_slots = threading.BoundedSemaphore(upstream_workers)
+        self.branch_timeouts = {
+            # Two OpenWeatherMap requests in sequence
+            'weather': float(os.getenv('PLANTING_WEATHER_TIMEOUT_SECONDS')
+                             or 2 * weather_service.request_timeout + BRANCH_MARGIN_SECONDS),
+            # The market.analysis Gemini budget; its fallback answers within it
+            'market': float(os.getenv('PLANTING_MARKET_TIMEOUT_SECONDS')
+                            or llm_client.timeout_for('market.analysis') + BRANCH_MARGIN_SECONDS)
+        }
 
         # South African crop planting data
         self.crop_calendar = {
@@ -71,20 +88,25 @@ class PlantingCalendarService:
             }
         }
 
-    def get_optimal_planting_dates(self, crop_type, location, plot_size=None):
-        """Get optimal planting dates based on crop, location, and weather"""
+    def get_optimal_planting_dates(self, crop_type, location, plot_size=None, stream=False):
+        """Get optimal planting dates based on crop, location, and weather
+
+        With stream=True, 'ai_recommendations' is an iterator of text chunks.
+        """
         if crop_type.lower() not in self.crop_calendar:
             return f"Crop data not available for {crop_type}"
 
         crop_info = self.crop_calendar[crop_type.lower()]
 
-        # Get weather data for location
-        weather_data = weather_service.get_current_weather(location)
-
-        # Get market analysis
-        market_analysis = market_service.get_market_analysis(crop_type, location)
+        # Fetch weather data and market analysis concurrently
+        branches = {'weather': (weather_service.get_current_weather, (location,))}
+        if self.llm.available:
+            branches['market'] = (market_service.get_market_analysis, (crop_type, location))
+        results, degraded = self._fan_out(branches)
+        weather_data = results.get('weather')
+        market_analysis = results.get('market') or 'Market analysis unavailable'
 
-        if not self.genai_model:
+        if not self.llm.available:
             return {
                 'crop_info': crop_info,
                 'weather_data': weather_data,
@@ -129,8 +151,12 @@ class PlantingCalendarService:
         Format as a practical farming calendar with specific dates and actions.
         """
 
+        fallback = lambda: self._fallback_schedule(crop_type, location, crop_info, weather_data)
         try:
-            response = self.genai_model.generate_content(prompt)
+            if stream:
+                response_text = self.llm.generate_stream(prompt, call_site='planting.schedule', fallback=fallback)
+            else:
+                response_text = self.llm.generate(prompt, call_site='planting.schedule', fallback=fallback)
 
             # Create schedule data
             schedule_data = {
@@ -139,19 +165,89 @@ class PlantingCalendarService:
                 'plot_size': plot_size,
                 'crop_info': crop_info,
                 'weather_summary': weather_data['current'] if weather_data else None,
-                'ai_recommendations': response.text,
+                'ai_recommendations': response_text,
+                'degraded': degraded,
                 'generated_date': datetime.now().isoformat()
             }
 
             return schedule_data
 
+        except LLMBackpressure:
+            raise
         except Exception as e:
             return {
                 'crop_info': crop_info,
                 'weather_data': weather_data,
+                'degraded': degraded,
                 'recommendation': f"Unable to generate AI recommendations: {str(e)}"
             }
 
+    def _fallback_schedule(self, crop_type, location, crop_info, weather_data):
+        """Planting calendar straight from crop_calendar, used when Gemini is down"""
+        lines = [
+            f"Plant: {crop_info['planting_season']}",
+            f"Harvest: {crop_info['harvest_season']} (about {crop_info['growing_days']} days after planting)",
+            f"Optimal temperature: {crop_info['optimal_temp']}; rainfall needs: {crop_info['rainfall_needs']}",
+            f"Main producing regions: {', '.join(crop_info['regions'])}"
+        ]
+        if datetime.now().month in self._season_months(crop_info['planting_season']):
+            lines.append("This month is within the planting window.")
+        if weather_data:
+            low, high = (float(t) for t in crop_info['optimal_temp'].rstrip('°C').split('-'))
+            temperature = weather_data['current']['temperature']
+            if temperature < low:
+                lines.append(f"It is currently {temperature}°C, below the optimal range: wait for soils to warm.")
+            elif temperature > high:
+                lines.append(f"It is currently {temperature}°C, above the optimal range: plant early in the day and irrigate.")
+        return fallback_text(f"Planting calendar for {crop_type} in {location}:", lines)
+
+    @staticmethod
+    def _season_months(season):
+        """Month numbers covered by a season such as 'August - October, February - April'"""
+        months = set()
+        for span in season.split(','):
+            start, _, end = span.partition('-')
+            first = datetime.strptime(start.strip(), '%B').month
+            last = datetime.strptime((end or start).strip(), '%B').month
+            months.update((first - 1 + offset) % 12 + 1 for offset in range((last - first) % 12 + 1))
+        return months
+
+    def _crops_in_season(self, month, field):
+        return [crop for crop, info in self.crop_calendar.items() if month in self._season_months(info[field])]
+
+    def _fan_out(self, branches):
+        """Run {name: (fn, args)} concurrently; results of the branches that finished in time, plus the names that did not"""
+        started = time.monotonic()
+        futures, results, degraded = {}, {}, []
+        for name, (fn, args) in branches.items():
+            if not self.upstream_slots.acquire(blocking=False):
+                # Every worker is busy: degrade now rather than time out waiting in the queue
+                print(f"Planting schedule: {name} lookup skipped, upstream pool saturated")
+                degraded.append(name)
+                continue
+            futures[name] = self.upstream_pool.submit(self._run_branch, fn, args)
+
+        for name, future in futures.items():
+            # Each branch's timeout counts from the shared start, not from when we begin waiting on it
+            remaining = max(self.branch_timeouts.get(name, 10) - (time.monotonic() - started), 0)
+            try:
+                results[name] = future.result(timeout=remaining)
+                if results[name] is None:
+                    degraded.append(name)
+            except FutureTimeoutError:
+                print(f"Planting schedule: {name} lookup timed out after {self.branch_timeouts.get(name, 10)}s")
+                degraded.append(name)
+            except Exception as e:
+                print(f"Planting schedule: {name} lookup failed: {e}")
+                degraded.append(name)
+        return results, degraded
+
+    def _run_branch(self, fn, args):
+        try:
+            return fn(*args)
+        finally:
+            self.upstream_slots.release()
+
     def create_farming_calendar(self, user_id, crops_and_locations):
         """Create a comprehensive farming calendar for multiple crops"""
         calendar_data = {
@@ -180,7 +276,7 @@ class PlantingCalendarService:
 
     def get_monthly_tasks(self, month, location, crops):
         """Get farming tasks for a specific month"""
-        if not self.genai_model:
+        if not self.llm.available:
             return "Monthly task recommendations unavailable"
 
         prompt = f"""
@@ -201,14 +297,14 @@ class PlantingCalendarService:
         """
 
         try:
-            response = self.genai_model.generate_content(prompt)
-            return response.text
+            return self.llm.generate(prompt, call_site='planting.monthly_tasks',
+                                     fallback=lambda: self._fallback_monthly_tasks(month, location, crops))
         except Exception as e:
             return f"Unable to generate monthly tasks: {str(e)}"
 
     def get_seasonal_recommendations(self, location, farming_type="mixed"):
         """Get seasonal farming recommendations"""
-        if not self.genai_model:
+        if not self.llm.available:
             return "Seasonal recommendations unavailable"
 
         current_month = datetime.now().strftime("%B")
@@ -234,11 +330,44 @@ class PlantingCalendarService:
         """
 
         try:
-            response = self.genai_model.generate_content(prompt)
-            return response.text
+            return self.llm.generate(prompt, call_site='planting.seasonal_recommendations',
+                                     fallback=lambda: self._fallback_seasonal_recommendations(location, current_season))
         except Exception as e:
             return f"Unable to generate seasonal recommendations: {str(e)}"
 
+    def _fallback_monthly_tasks(self, month, location, crops):
+        """Planting and harvesting tasks for the month from crop_calendar, used when Gemini is down"""
+        try:
+            month_number = datetime.strptime(str(month).strip().title()[:3], '%b').month
+        except ValueError:
+            return fallback_text(f"Farming tasks for {month} in {location}: check the planting calendar for each crop.")
+
+        tasks = []
+        for crop in crops:
+            info = self.crop_calendar.get(crop.lower())
+            if info is None:
+                continue
+            if month_number in self._season_months(info['planting_season']):
+                tasks.append(f"{crop}: prepare soil and plant (planting season {info['planting_season']})")
+            if month_number in self._season_months(info['harvest_season']):
+                tasks.append(f"{crop}: harvest and prepare for market (harvest season {info['harvest_season']})")
+        if not tasks:
+            tasks.append("No planting or harvesting due for these crops: focus on weeding, pest scouting and irrigation.")
+        return fallback_text(f"Farming tasks for {month} in {location}:", tasks)
+
+    def _fallback_seasonal_recommendations(self, location, season):
+        """Crops in their planting and harvest windows this month, used when Gemini is down"""
+        month = datetime.now().month
+        planting = self._crops_in_season(month, 'planting_season')
+        harvesting = self._crops_in_season(month, 'harvest_season')
+        return fallback_text(
+            f"{season} recommendations for {location}:",
+            [
+                f"Crops to plant now: {', '.join(planting) if planting else 'none of the tracked crops'}",
+                f"Crops being harvested now: {', '.join(harvesting) if harvesting else 'none of the tracked crops'}"
+            ]
+        )
+
     def _get_season(self, month):
         """Get season based on month (Southern Hemisphere)"""
         if month in [12, 1, 2]:
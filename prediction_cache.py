@@ -0,0 +1,84 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+# Sentinel so "no harvest month" and an explicit harvest month stay distinct keys
+_MISSING = object()
+
+
+class PredictionCache:
+    """Bounded LRU memoization of FarmingAnalyzer.predict results with hit-rate counters"""
+
+    # (input name, default) for every input that influences a prediction
+    KEY_FIELDS = (
+        ('plot_size', 'Medium'),
+        ('season', 'Summer'),
+        ('harvest_month', _MISSING),
+        ('drought_status', 'Low'),
+        ('pest_pressure', 'Low'),
+        ('disease_pressure', 'Low'),
+        ('soil_ph', 6.2),
+        ('fertilizer_usage', 180.0),
+        ('plot_size_value', None),
+    )
+
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def make_key(self, input_data: Dict[str, Any]) -> Optional[tuple]:
+        """Key for an input already normalized by FarmingAnalyzer.normalize_input.
+
+        Location/plant type do not affect the model so they are left out. Values
+        are used as given; None when the key is not hashable.
+        """
+        key = tuple(input_data.get(name, default) for name, default in self.KEY_FIELDS)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def get(self, key) -> Optional[Dict[str, float]]:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(result)
+
+    def put(self, key, result: Dict[str, float]):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = dict(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry, e.g. when new model artifacts are loaded"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,127 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+
+def _bucket(value):
+    """Power-of-two histogram bucket label: 1, 2, 4, 8, ..."""
+    bucket = 1
+    while bucket < value:
+        bucket *= 2
+    return bucket
+
+
+class PredictionCoalescer:
+    """Micro-batches concurrent single-row predictions into one forest call.
+
+    Request threads submit an input and wait on a Future. A dispatcher thread
+    takes the first waiting request, keeps collecting until window_ms has passed
+    or max_batch requests are queued, scores them all with one predict_batch call
+    and resolves every Future. The dispatcher starts on the first submit and exits
+    after idle_seconds without traffic, so analyzers that are swapped out by the
+    model registry do not keep a thread alive.
+    """
+
+    def __init__(self, predict_batch: Callable[[List[Dict[str, Any]]], List[Dict[str, Any]]],
+                 window_ms: float = 3.0, max_batch: int = 64, idle_seconds: float = 30.0):
+        self.predict_batch = predict_batch
+        self.window = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self.idle_seconds = idle_seconds
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._dispatcher = None
+
+        self.requests = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.fallbacks = 0
+        self.batch_sizes = {}
+        self.queue_depths = {}
+
+    def submit(self, input_data: Dict[str, Any]) -> Future:
+        future = Future()
+        self._queue.put((input_data, future))
+        with self._lock:
+            self.requests += 1
+            if self._dispatcher is None or not self._dispatcher.is_alive():
+                self._dispatcher = threading.Thread(target=self._run, name='prediction-coalescer', daemon=True)
+                self._dispatcher.start()
+        return future
+
+    def predict(self, input_data: Dict[str, Any], timeout: float = None) -> Dict[str, Any]:
+        """Score one input as part of the next micro-batch; raises what predict_batch raised"""
+        return self.submit(input_data).result(timeout)
+
+    def _collect(self):
+        try:
+            first = self._queue.get(timeout=self.idle_seconds)
+        except queue.Empty:
+            return None
+
+        depth = self._queue.qsize() + 1
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        with self._lock:
+            self.batches += 1
+            self.batched_requests += len(batch)
+            size_bucket, depth_bucket = _bucket(len(batch)), _bucket(depth)
+            self.batch_sizes[size_bucket] = self.batch_sizes.get(size_bucket, 0) + 1
+            self.queue_depths[depth_bucket] = self.queue_depths.get(depth_bucket, 0) + 1
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                with self._lock:
+                    # A submit that raced the idle timeout is picked up by a new dispatcher
+                    self._dispatcher = None
+                    if self._queue.empty():
+                        return
+                    self._dispatcher = threading.current_thread()
+                continue
+
+            inputs = [input_data for input_data, _ in batch]
+            try:
+                results = self.predict_batch(inputs)
+            except Exception:
+                # One invalid input must not fail its batch-mates: score them one by one
+                with self._lock:
+                    self.fallbacks += 1
+                for input_data, future in batch:
+                    try:
+                        future.set_result(self.predict_batch([input_data])[0])
+                    except Exception as e:
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Request/batch counters with batch-size and queue-depth histograms (power-of-two buckets)"""
+        with self._lock:
+            return {
+                'enabled': True,
+                'window_ms': self.window * 1000,
+                'max_batch': self.max_batch,
+                'requests': self.requests,
+                'batches': self.batches,
+                'mean_batch_size': round(self.batched_requests / self.batches, 2) if self.batches else 0.0,
+                'fallbacks': self.fallbacks,
+                'queue_depth': self._queue.qsize(),
+                'batch_size_histogram': {str(k): v for k, v in sorted(self.batch_sizes.items())},
+                'queue_depth_histogram': {str(k): v for k, v in sorted(self.queue_depths.items())}
+            }
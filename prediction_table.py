@@ -0,0 +1,89 @@
+import itertools
+import numpy as np
+from typing import Dict, Any, Optional
+
+# Levels shared by the drought, pest and disease inputs
+PRESSURE_LEVELS = ['Low', 'Medium', 'High']
+
+# Inputs that take arbitrary numbers; requests carrying any of them are scored live
+CUSTOM_FIELDS = ('soil_ph', 'fertilizer_usage', 'plot_size_value')
+
+
+class PredictionTable:
+    """Materialized predictions for the whole discrete input grid of FarmingAnalyzer.predict.
+
+    Each default-form request (season, plot size, harvest month and the three
+    pressure levels, with no custom soil pH/fertilizer/plot area) maps to a
+    packed mixed-radix integer key. Results are stored as integer hundredths and
+    tenths, which reproduce the rounded values of the live path exactly.
+    """
+
+    def __init__(self, axes, values):
+        self.axes = axes
+        self.values = values
+        self._index = [{value: i for i, value in enumerate(levels)} for _, levels, _ in axes]
+
+    @staticmethod
+    def grid_axes(analyzer):
+        """(input name, levels, default) for every axis; a None month means "no harvest month given" """
+        return [
+            ('season', list(analyzer.SEASONAL_DATA), 'Summer'),
+            ('plot_size', list(analyzer.PLOT_SIZES), 'Medium'),
+            ('harvest_month', list(analyzer.MONTHS) + [None], None),
+            ('drought_status', PRESSURE_LEVELS, 'Low'),
+            ('pest_pressure', PRESSURE_LEVELS, 'Low'),
+            ('disease_pressure', PRESSURE_LEVELS, 'Low'),
+        ]
+
+    @classmethod
+    def build(cls, analyzer):
+        """Score every grid point with one batch pass through the live prediction path"""
+        axes = cls.grid_axes(analyzer)
+        inputs = []
+        for combination in itertools.product(*(levels for _, levels, _ in axes)):
+            input_data = {name: value for (name, _, _), value in zip(axes, combination)}
+            if input_data['harvest_month'] is None:
+                del input_data['harvest_month']
+            inputs.append(input_data)
+
+        predictions = analyzer.predict_batch(inputs)
+
+        values = np.empty((len(predictions), 3), dtype=np.int32)
+        values[:, 0] = np.rint([p['yield_prediction'] * 100 for p in predictions])
+        values[:, 1] = np.rint([p['yield_per_hectare'] * 100 for p in predictions])
+        values[:, 2] = np.rint([p['success_rating'] * 10 for p in predictions])
+        return cls(axes, values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def key_for(self, input_data: Dict[str, Any]) -> Optional[int]:
+        """Packed grid key for a request, or None when it has to be scored live"""
+        if any(field in input_data for field in CUSTOM_FIELDS):
+            return None
+
+        key = 0
+        for (name, levels, default), index in zip(self.axes, self._index):
+            value = input_data.get(name, default)
+            try:
+                position = index[value]
+            except (KeyError, TypeError):
+                return None
+            if name == 'harvest_month' and value is None and name in input_data:
+                # An explicit empty month is an error on the live path; keep it that way
+                return None
+            key = key * len(levels) + position
+        return key
+
+    def lookup(self, input_data: Dict[str, Any]) -> Optional[Dict[str, float]]:
+        """O(1) prediction for default-form requests"""
+        key = self.key_for(input_data)
+        if key is None:
+            return None
+
+        yield_hundredths, per_hectare_hundredths, success_tenths = self.values[key].tolist()
+        return {
+            'yield_prediction': yield_hundredths / 100,
+            'yield_per_hectare': per_hectare_hundredths / 100,
+            'success_rating': success_tenths / 10
+        }
@@ -0,0 +1,137 @@
+"""Bucket the numbers embedded in Gemini prompts into agronomically meaningful bands.
+
+Weather and market prompts used to carry raw readings (21.4°C, R4,573/ton,
++2.37%), so two farmers in the same town a minute apart never produced the same
+prompt and the response cache in llm_cache.py could not serve either of them.
+Rendering each reading as the band it falls in (20-25°C (warm), rising +1 to +3%)
+keeps what matters for the advice and makes near-identical prompts identical.
+
+Rules are configured per prompt template (call site) and per field. Set
+PROMPT_CANONICALIZATION to 'none' to embed raw values again, or to a
+comma-separated list of templates to canonicalise only those.
+"""
+import math
+import os
+
+import config
+from bisect import bisect_right
+
+
+class Raw:
+    """The value itself, formatted (used when a template is not canonicalised)"""
+
+    def __init__(self, fmt):
+        self.fmt = fmt
+
+    def __call__(self, value):
+        return self.fmt.format(value)
+
+
+class Bands:
+    """Fixed bands: edges split the number line and each interval has a label"""
+
+    def __init__(self, edges, labels):
+        if len(labels) != len(edges) + 1:
+            raise ValueError("Bands need one more label than edges")
+        self.edges = list(edges)
+        self.labels = list(labels)
+
+    @classmethod
+    def ranges(cls, edges, unit, names):
+        """Labels such as 'below 0°C (frost)', '0-5°C (frost risk)', 'above 35°C (heat stress)'"""
+        spans = [f"below {edges[0]:g}{unit}"]
+        spans += [f"{low:g}-{high:g}{unit}" for low, high in zip(edges, edges[1:])]
+        spans.append(f"above {edges[-1]:g}{unit}")
+        return cls(edges, [f"{span} ({name})" if name else span for span, name in zip(spans, names)])
+
+    def __call__(self, value):
+        return self.labels[bisect_right(self.edges, value)]
+
+
+class RelativeBands:
+    """Geometric bands `width` wide (0.05 = 5%) for quantities without natural edges, such as prices"""
+
+    def __init__(self, width, fmt):
+        self.width = width
+        self.fmt = fmt
+        self._log_step = math.log1p(width)
+
+    def __call__(self, value):
+        if value <= 0:
+            return self.fmt.format(value, value)
+        index = math.floor(math.log(value) / self._log_step)
+        return self.fmt.format(self._edge(index), self._edge(index + 1))
+
+    def _edge(self, index):
+        # Three significant digits keep the label readable; rounding each edge on
+        # its own keeps neighbouring bands contiguous across powers of ten
+        edge = math.exp(index * self._log_step)
+        magnitude = 10 ** max(int(math.log10(edge)) - 2, 0)
+        return round(edge / magnitude) * magnitude
+
+
+TEMPERATURE = Bands.ranges(
+    [0, 5, 10, 15, 20, 25, 30, 35], '°C',
+    ['frost', 'frost risk', 'cold', 'cool', 'mild', 'warm', 'very warm', 'hot', 'heat stress']
+)
+HUMIDITY = Bands.ranges([30, 50, 70, 85], '%', ['dry', 'moderate', 'humid', 'very humid', 'saturated'])
+PRECIPITATION = Bands([0.1, 1, 5, 20, 50], [
+    'none', 'trace (under 1mm)', 'light (1-5mm)', 'moderate (5-20mm)', 'heavy (20-50mm)', 'very heavy (over 50mm)'
+])
+WIND_SPEED = Bands.ranges([10, 20, 40, 60], ' km/h', ['calm', 'light', 'moderate', 'strong', 'gale'])
+
+# The ±3% and ±5% edges match the price alert thresholds in MarketService
+PERCENT_CHANGE = Bands([-5, -3, -1, 1, 3, 5], [
+    'falling sharply (below -5%)', 'falling (-5 to -3%)', 'easing (-3 to -1%)', 'stable (-1 to +1%)',
+    'firming (+1 to +3%)', 'rising (+3 to +5%)', 'rising sharply (above +5%)'
+])
+PRICE = RelativeBands(0.05, 'R{:,.0f}-{:,.0f}/ton')
+
+# Per template: field -> (raw format, canonical rule)
+TEMPLATE_RULES = {
+    'weather.farming_analysis': {
+        'temperature': (Raw('{}°C'), TEMPERATURE),
+        'humidity': (Raw('{}%'), HUMIDITY),
+        'precipitation': (Raw('{}mm'), PRECIPITATION),
+        'wind_speed': (Raw('{} km/h'), WIND_SPEED),
+    },
+    'market.analysis': {
+        'price': (Raw('R{:.0f}/ton'), PRICE),
+        'change_percent': (Raw('{}%'), PERCENT_CHANGE),
+        'price_vs_average': (Raw('{:.1f}%'), PERCENT_CHANGE),
+    },
+}
+
+
+class PromptCanonicalizer:
+    def __init__(self, rules=None, templates=None):
+        self.rules = {template: dict(fields) for template, fields in (rules or TEMPLATE_RULES).items()}
+        # Templates whose numbers are bucketed; None means all of them
+        self.templates = templates
+
+    @classmethod
+    def from_env(cls):
+        setting = os.getenv('PROMPT_CANONICALIZATION', 'all').strip().lower()
+        if setting == 'all':
+            return cls()
+        if setting == 'none':
+            return cls(templates=set())
+        return cls(templates={template.strip() for template in setting.split(',') if template.strip()})
+
+    def enabled(self, template):
+        return self.templates is None or template in self.templates
+
+    def configure(self, template, field, rule, raw=None):
+        """Replace (or add) the rule for one field of a template"""
+        fields = self.rules.setdefault(template, {})
+        raw = raw or (fields[field][0] if field in fields else Raw('{}'))
+        fields[field] = (raw, rule)
+
+    def format(self, template, field, value):
+        """Text for one value in a prompt: its band when canonicalised, otherwise the raw value"""
+        raw, rule = self.rules[template][field]
+        return rule(value) if self.enabled(template) else raw(value)
+
+
+# Global canonicalizer used by the prompt builders
+prompt_canonicalizer = PromptCanonicalizer.from_env()
@@ -1,21 +1,14 @@
-import google.generativeai as genai
-import os
-from dotenv import load_dotenv
 from datetime import datetime
 import math
-
-load_dotenv()
+from llm_client import llm_client
+from llm_rate_limiter import LLMBackpressure
+from llm_resilience import fallback_text
 
 class ResourceCalculator:
     def __init__(self):
         """Initialize resource calculator with Gemini AI"""
-        # Initialize Gemini AI
-        google_api_key = os.getenv('GOOGLE_API_KEY')
-        if google_api_key:
-            genai.configure(api_key=google_api_key)
-            self.genai_model = genai.GenerativeModel('gemini-1.5-flash')
-        else:
-            self.genai_model = None
+        # Gemini client shared by all services
+        self.llm = llm_client
 
         # Resource requirements per hectare for common crops
         self.crop_requirements = {
@@ -146,9 +139,9 @@ class ResourceCalculator:
 
         return calculations
 
-    def get_ai_resource_recommendations(self, crop_type, plot_size_ha, soil_type, location, budget=None):
-        """Get AI-powered resource recommendations"""
-        if not self.genai_model:
+    def get_ai_resource_recommendations(self, crop_type, plot_size_ha, soil_type, location, budget=None, stream=False):
+        """Get AI-powered resource recommendations; with stream=True 'ai_recommendations' is an iterator of text chunks"""
+        if not self.llm.available:
             return "AI recommendations unavailable"
 
         # Get basic calculations
@@ -190,13 +183,23 @@ class ResourceCalculator:
         if budget and budget < calculations['total_cost']:
             prompt += f"\nIMPORTANT: The budget (R{budget}) is below estimated costs (R{calculations['total_cost']}). Provide budget-friendly alternatives."
 
+        fallback = lambda: self._fallback_recommendations(calculations, budget)
+        if stream:
+            return {
+                'calculations': calculations,
+                'ai_recommendations': self.llm.generate_stream(prompt, call_site='resources.recommendations',
+                                                               fallback=fallback),
+                'budget_status': 'sufficient' if not budget or budget >= calculations['total_cost'] else 'insufficient'
+            }
         try:
-            response = self.genai_model.generate_content(prompt)
+            response_text = self.llm.generate(prompt, call_site='resources.recommendations', fallback=fallback)
             return {
                 'calculations': calculations,
-                'ai_recommendations': response.text,
+                'ai_recommendations': response_text,
                 'budget_status': 'sufficient' if not budget or budget >= calculations['total_cost'] else 'insufficient'
             }
+        except LLMBackpressure:
+            raise
         except Exception as e:
             return {
                 'calculations': calculations,
@@ -204,9 +207,22 @@ class ResourceCalculator:
                 'budget_status': 'unknown'
             }
 
+    def _fallback_recommendations(self, calculations, budget=None):
+        """Cost breakdown and budget check from the calculations, used when Gemini is down"""
+        total = calculations['total_cost']
+        breakdown = sorted(calculations['cost_breakdown'].items(), key=lambda item: item[1], reverse=True)
+        lines = [f"{name.title()}: R{cost:,.2f} ({cost / total * 100:.0f}% of total)" for name, cost in breakdown]
+        lines.append(f"Total estimated cost: R{total:,.2f}")
+        if budget and budget < total:
+            lines.append(f"Budget shortfall: R{total - budget:,.2f}. Start with savings on {breakdown[0][0]}, "
+                         "the largest cost, e.g. by buying in bulk or applying fertilizer based on a soil test.")
+        elif budget:
+            lines.append(f"Your budget of R{budget:,.2f} covers the estimated costs.")
+        return fallback_text(f"Resource plan for {calculations['plot_size_ha']} ha of {calculations['crop_type']}:", lines)
+
     def calculate_irrigation_schedule(self, crop_type, plot_size_ha, location, irrigation_type="drip"):
         """Calculate optimal irrigation schedule"""
-        if not self.genai_model:
+        if not self.llm.available:
             return "Irrigation schedule unavailable"
 
         if crop_type.lower() not in self.crop_requirements:
@@ -237,14 +253,14 @@ class ResourceCalculator:
         """
 
         try:
-            response = self.genai_model.generate_content(prompt)
-            return response.text
+            return self.llm.generate(prompt, call_site='resources.irrigation_schedule',
+                                     fallback=lambda: self._fallback_irrigation(crop_type, plot_size_ha, irrigation_type))
         except Exception as e:
             return f"Unable to generate irrigation schedule: {str(e)}"
 
     def calculate_fertilizer_program(self, crop_type, plot_size_ha, soil_test_results=None):
         """Calculate detailed fertilizer application program"""
-        if not self.genai_model:
+        if not self.llm.available:
             return "Fertilizer program unavailable"
 
         if crop_type.lower() not in self.crop_requirements:
@@ -282,10 +298,34 @@ class ResourceCalculator:
         """
 
         try:
-            response = self.genai_model.generate_content(prompt)
-            return response.text
+            return self.llm.generate(prompt, call_site='resources.fertilizer_program',
+                                     fallback=lambda: self._fallback_fertilizer(crop_type, plot_size_ha))
         except Exception as e:
             return f"Unable to generate fertilizer program: {str(e)}"
 
+    def _fallback_irrigation(self, crop_type, plot_size_ha, irrigation_type):
+        """Seasonal water budget from crop_requirements, used when Gemini is down"""
+        water = self.crop_requirements[crop_type.lower()]['water']
+        multiplier = {'drip': 0.8, 'sprinkler': 1.0, 'flood': 1.3}.get(irrigation_type, 1.0)
+        return fallback_text(f"Irrigation plan for {plot_size_ha} ha of {crop_type} ({irrigation_type}):", [
+            f"Seasonal water need: {water['amount']} {water['unit']}, about {water['amount'] * multiplier:.0f}mm "
+            f"to apply with {irrigation_type} irrigation after efficiency",
+            "Subtract rainfall from each week's need and irrigate only the shortfall",
+            "Keep soil moisture steady during flowering and fruit or grain fill, when water stress costs the most yield",
+            "Irrigate early in the morning to reduce evaporation losses"
+        ])
+
+    def _fallback_fertilizer(self, crop_type, plot_size_ha):
+        """N-P-K amounts from crop_requirements with a standard split, used when Gemini is down"""
+        fertilizer = self.crop_requirements[crop_type.lower()]['fertilizer']
+        nitrogen, phosphorus, potassium = (fertilizer[n]['amount'] * plot_size_ha
+                                           for n in ('nitrogen', 'phosphorus', 'potassium'))
+        return fallback_text(f"Fertilizer program for {plot_size_ha} ha of {crop_type}:", [
+            f"Total: {nitrogen:.0f} kg N, {phosphorus:.0f} kg P, {potassium:.0f} kg K",
+            f"At planting: all P ({phosphorus:.0f} kg), all K ({potassium:.0f} kg) and a third of N ({nitrogen / 3:.0f} kg)",
+            f"Side-dressing: the remaining N ({nitrogen * 2 / 3:.0f} kg) in two equal applications during early growth",
+            "Adjust the amounts to a soil test where one is available"
+        ])
+
 # Initialize resource calculator
 resource_calculator = ResourceCalculator()
\ No newline at end of file
@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+
+from flask import jsonify
+
+PENDING = 'pending'
+LOADING = 'loading'
+READY = 'ready'
+FAILED = 'failed'
+
+
+class StartupManager:
+    """Runs slow startup work (model load, service connections) in background threads.
+
+    The HTTP server can accept traffic immediately; each registered component
+    reports its own state and load time, and routes that depend on a component
+    answer with a fast 503 until it is ready. Only required components decide
+    overall readiness; optional ones (e.g. MongoDB) can be retried in the
+    background while the rest of the app serves traffic.
+    """
+
+    def __init__(self):
+        self._components = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader, required=True, retry_backoff=None):
+        """Register a loader callable; it is ready once the loader returns without raising.
+
+        Optional components (required=False) are reported but do not hold back
+        overall readiness. With retry_backoff=(initial, maximum) seconds a failed
+        loader is retried, doubling the delay each time, until it succeeds.
+        """
+        with self._lock:
+            self._components[name] = {
+                'loader': loader,
+                'required': required,
+                'retry_backoff': retry_backoff,
+                'state': PENDING,
+                'started_at': None,
+                'load_time': None,
+                'error': None,
+                'attempts': 0,
+                'next_retry_seconds': None,
+                'done': threading.Event()
+            }
+
+    def start(self):
+        """Start every pending component in its own daemon thread"""
+        with self._lock:
+            pending = [name for name, component in self._components.items() if component['state'] == PENDING]
+            for name in pending:
+                self._components[name]['state'] = LOADING
+
+        for name in pending:
+            thread = threading.Thread(target=self._run, args=(name,), name=f'startup-{name}', daemon=True)
+            thread.start()
+
+    def _run(self, name):
+        component = self._components[name]
+        delay = None
+        while True:
+            component['started_at'] = datetime.now().isoformat()
+            component['attempts'] += 1
+            started = time.perf_counter()
+            try:
+                component['loader']()
+                component['error'] = None
+                component['next_retry_seconds'] = None
+                component['state'] = READY
+            except Exception as e:
+                logging.error(f"Startup component '{name}' failed: {e}")
+                component['error'] = str(e)
+                component['state'] = FAILED
+            finally:
+                component['load_time'] = round(time.perf_counter() - started, 3)
+                # wait() returns after the first attempt; retries carry on in the background
+                component['done'].set()
+
+            if component['state'] == READY or not component['retry_backoff']:
+                return
+            initial, maximum = component['retry_backoff']
+            delay = initial if delay is None else min(delay * 2, maximum)
+            component['next_retry_seconds'] = delay
+            time.sleep(delay)
+
+    def is_ready(self, name):
+        component = self._components.get(name)
+        return component is not None and component['state'] == READY
+
+    def wait(self, name, timeout=None):
+        """Block until a component has finished loading; returns whether it is ready"""
+        component = self._components[name]
+        component['done'].wait(timeout)
+        return component['state'] == READY
+
+    def status(self):
+        """State, start time, load time and error of every component.
+
+        'ready' only considers required components; optional ones that are not
+        ready are listed under 'degraded'.
+        """
+        with self._lock:
+            components = {
+                name: {key: component[key] for key in ('state', 'required', 'started_at', 'load_time',
+                                                       'error', 'attempts', 'next_retry_seconds')}
+                for name, component in self._components.items()
+            }
+        return {
+            'ready': all(component['state'] == READY
+                         for component in components.values() if component['required']),
+            'degraded': [name for name, component in components.items()
+                         if not component['required'] and component['state'] != READY],
+            'components': components
+        }
+
+    def requires(self, *names):
+        """Route decorator returning 503 until the named components are ready"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                for name in names:
+                    if not self.is_ready(name):
+                        component = self._components.get(name, {})
+                        response = jsonify({
+                            'error': f'Service component "{name}" is not ready',
+                            'state': component.get('state'),
+                            'detail': component.get('error')
+                        })
+                        response.status_code = 503
+                        response.headers['Retry-After'] = '5'
+                        return response
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
@@ -0,0 +1,39 @@
+// Read a Server-Sent Events response from the /stream AI endpoints.
+// fetch() is used instead of EventSource so POST endpoints can stream too.
+// handlers: onText(chunk), onMeta(data), onError(message), onDone()
+async function streamEvents(url, options, handlers) {
+    const response = await fetch(url, options);
+    if (!response.ok || !response.body) {
+        throw new Error(`Stream request failed (${response.status})`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Frames are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            let event = 'message';
+            let data = '';
+            frame.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) event = line.slice(7);
+                else if (line.startsWith('data: ')) data += line.slice(6);
+            });
+            const payload = data ? JSON.parse(data) : {};
+
+            if (event === 'message' && handlers.onText) handlers.onText(payload.text);
+            else if (event === 'meta' && handlers.onMeta) handlers.onMeta(payload);
+            else if (event === 'error' && handlers.onError) handlers.onError(payload.error);
+            else if (event === 'done' && handlers.onDone) handlers.onDone();
+        }
+    }
+}
@@ -0,0 +1,174 @@
+"""Scalable synthetic data for training and serving benchmarks.
+
+Rows follow the same schema and distributions as
+FarmingAnalyzer._load_training_data (including the 30% yield loss under high
+drought), but any number of rows can be produced. Rows are generated in
+fixed-size chunks, each seeded from its own SeedSequence child, so a dataset is
+reproducible from (seed, chunk_rows) regardless of how or in what order chunks
+are written. Datasets are written as a directory of Parquet parts (or one CSV)
+that train_model_streaming reads chunk by chunk.
+
+    python synthetic_data.py training data/train --rows 10000000
+    python synthetic_data.py payloads data/submit_form.jsonl --rows 100000
+"""
+import argparse
+import json
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from FarmingAnalysis import FarmingAnalyzer
+
+SEASONS = ['Summer', 'Winter', 'Spring', 'Fall']
+LEVELS = ['Low', 'Medium', 'High']
+
+# (mean, std) of the normally distributed columns, as in _load_training_data
+NORMAL_COLUMNS = {
+    'Rainfall_mm': (450, 100),
+    'Avg_Temp_C': (25, 5),
+    'Soil_Moisture_Percentage': (70, 5),
+    'Growing_Days': (135, 15),
+    'Soil_pH': (6.5, 0.5),
+    'Fertilizer_Usage_kg_per_ha': (180, 20),
+    'Yield_per_hectare': (3500, 500),
+    'Success_Rating': (7, 1),
+}
+
+HIGH_DROUGHT_YIELD_FACTOR = 0.7
+
+# Values the prediction form (templates/FarmingAnalysis.html) can submit
+PROVINCES = ['Eastern Cape', 'Free State', 'Gauteng', 'KwaZulu-Natal', 'Limpopo',
+             'Mpumalanga', 'Northern Cape', 'North West', 'Western Cape']
+# Every plant option on the form currently submits "Maize"
+PLANT_TYPES = ['Maize']
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+def chunk_seeds(n_rows, chunk_rows=DEFAULT_CHUNK_ROWS, seed=42):
+    """(row count, SeedSequence) for every chunk of an n_rows dataset"""
+    n_chunks = math.ceil(n_rows / chunk_rows)
+    children = np.random.SeedSequence(seed).spawn(n_chunks)
+    return [(min(chunk_rows, n_rows - i * chunk_rows), child) for i, child in enumerate(children)]
+
+
+def generate_chunk(n_rows, seed_sequence, yield_column='Yield_per_hectare'):
+    """One chunk of training rows in the _load_training_data schema"""
+    rng = np.random.default_rng(seed_sequence)
+    data = {
+        'Season': rng.choice(SEASONS, n_rows),
+        'Drought_Status': rng.choice(LEVELS, n_rows),
+        'Pest_Pressure': rng.choice(LEVELS, n_rows),
+        'Disease_Pressure': rng.choice(LEVELS, n_rows),
+    }
+    for column, (mean, std) in NORMAL_COLUMNS.items():
+        data[column] = rng.normal(mean, std, n_rows)
+
+    data['Yield_per_hectare'] = np.where(
+        data['Drought_Status'] == 'High',
+        data['Yield_per_hectare'] * HIGH_DROUGHT_YIELD_FACTOR,
+        data['Yield_per_hectare']
+    )
+
+    columns = ['Season', 'Rainfall_mm', 'Avg_Temp_C', 'Soil_Moisture_Percentage', 'Drought_Status',
+               'Pest_Pressure', 'Disease_Pressure', 'Growing_Days', 'Soil_pH',
+               'Fertilizer_Usage_kg_per_ha', 'Yield_per_hectare', 'Success_Rating']
+    df = pd.DataFrame({column: data[column] for column in columns})
+    if yield_column != 'Yield_per_hectare':
+        df = df.rename(columns={'Yield_per_hectare': yield_column})
+    return df
+
+
+def iter_training_chunks(n_rows, chunk_rows=DEFAULT_CHUNK_ROWS, seed=42, yield_column='Yield_per_hectare'):
+    for size, seed_sequence in chunk_seeds(n_rows, chunk_rows, seed):
+        yield generate_chunk(size, seed_sequence, yield_column)
+
+
+def write_training_data(path, n_rows, chunk_rows=DEFAULT_CHUNK_ROWS, seed=42,
+                        file_format='parquet', yield_column='Yield_per_hectare'):
+    """Write n_rows of training data; returns the list of files written.
+
+    Parquet output is a directory of part-NNNNN.parquet files, one per chunk;
+    CSV output is a single file with a header.
+    """
+    written = []
+    if file_format == 'parquet':
+        os.makedirs(path, exist_ok=True)
+        for index, chunk in enumerate(iter_training_chunks(n_rows, chunk_rows, seed, yield_column)):
+            part = os.path.join(path, f'part-{index:05d}.parquet')
+            chunk.to_parquet(part, index=False)
+            written.append(part)
+    elif file_format == 'csv':
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        for index, chunk in enumerate(iter_training_chunks(n_rows, chunk_rows, seed, yield_column)):
+            chunk.to_csv(path, mode='w' if index == 0 else 'a', header=index == 0, index=False)
+        written.append(path)
+    else:
+        raise ValueError(f"Unsupported format: {file_format}")
+    return written
+
+
+def generate_payloads(n_rows, seed=42, missing_month_rate=0.1):
+    """/submit_form field dicts (location, plantType, plotSize, harvestMonth)"""
+    rng = np.random.default_rng(seed)
+    plot_sizes = list(FarmingAnalyzer.PLOT_SIZES)
+    locations = rng.choice(PROVINCES, n_rows)
+    plants = rng.choice(PLANT_TYPES, n_rows)
+    sizes = rng.choice(plot_sizes, n_rows)
+    months = rng.choice(FarmingAnalyzer.MONTHS, n_rows)
+    missing = rng.random(n_rows) < missing_month_rate
+
+    for i in range(n_rows):
+        payload = {'location': str(locations[i]), 'plantType': str(plants[i]), 'plotSize': str(sizes[i])}
+        # The month select is optional, so some submissions leave it out
+        if not missing[i]:
+            payload['harvestMonth'] = str(months[i])
+        yield payload
+
+
+def write_payloads(path, n_rows, seed=42, missing_month_rate=0.1):
+    """Write /submit_form payloads as JSON lines"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        for payload in generate_payloads(n_rows, seed, missing_month_rate):
+            f.write(json.dumps(payload) + '\n')
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic Khula data at scale')
+    subparsers = parser.add_subparsers(dest='kind', required=True)
+
+    training = subparsers.add_parser('training', help='Training rows (Parquet parts or CSV)')
+    training.add_argument('output', help='Output directory (parquet) or file (csv)')
+    training.add_argument('--rows', type=int, default=1_000_000)
+    training.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    training.add_argument('--seed', type=int, default=42)
+    training.add_argument('--format', choices=['parquet', 'csv'], default='parquet')
+    training.add_argument('--yield-column', default='Yield_per_hectare',
+                          help='Name of the yield target column (train_model expects Yield_Tons_Per_Hectare)')
+
+    payloads = subparsers.add_parser('payloads', help='/submit_form payloads as JSON lines')
+    payloads.add_argument('output')
+    payloads.add_argument('--rows', type=int, default=10_000)
+    payloads.add_argument('--seed', type=int, default=42)
+    payloads.add_argument('--missing-month-rate', type=float, default=0.1)
+
+    args = parser.parse_args()
+    if args.kind == 'training':
+        files = write_training_data(args.output, args.rows, args.chunk_rows, args.seed,
+                                    args.format, args.yield_column)
+        print(f"Wrote {args.rows} training rows to {len(files)} file(s) under {args.output}")
+    else:
+        write_payloads(args.output, args.rows, args.seed, args.missing_month_rate)
+        print(f"Wrote {args.rows} /submit_form payloads to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+import pytest
+
+from FarmingAnalysis import FarmingAnalyzer
+
+# Small forest so the suite trains in a couple of seconds
+TEST_FOREST_PARAMS = {'n_estimators': 12, 'max_depth': 8, 'random_state': 42}
+
+
+@pytest.fixture(autouse=True)
+def serving_env(monkeypatch):
+    """Keep the analyzer in-process and free of request coalescing unless a test opts in"""
+    for name in ('INFERENCE_WORKERS', 'PREDICTION_COALESCE_WINDOW_MS', 'MODEL_DIR'):
+        monkeypatch.delenv(name, raising=False)
+
+
+def train_analyzer(model_dir):
+    analyzer = FarmingAnalyzer(model_dir=str(model_dir), forest_params=dict(TEST_FOREST_PARAMS))
+    analyzer.train_model_with_simulated_data()
+    return analyzer
+
+
+@pytest.fixture(scope='session')
+def trained_model_dir(tmp_path_factory):
+    """Model directory holding a bundle trained on the simulated data"""
+    model_dir = tmp_path_factory.mktemp('models')
+    train_analyzer(model_dir)
+    return model_dir
+
+
+@pytest.fixture
+def analyzer(trained_model_dir):
+    """Analyzer serving the session's trained bundle"""
+    analyzer = FarmingAnalyzer(model_dir=str(trained_model_dir))
+    analyzer.load_model()
+    return analyzer
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from compiled_forest import CompiledForest
+
+
+def fitted_forest(n_outputs, n_estimators=15, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(400, 6))
+    y = X[:, :n_outputs] * 3 + rng.normal(size=(400, n_outputs))
+    model = RandomForestRegressor(n_estimators=n_estimators, max_depth=10, random_state=seed)
+    model.fit(X, y if n_outputs > 1 else y.ravel())
+    return model
+
+
+@pytest.mark.parametrize('n_outputs', [1, 2])
+def test_predict_is_bit_exact_with_sklearn(n_outputs):
+    model = fitted_forest(n_outputs)
+    forest = CompiledForest.from_sklearn(model)
+    # More rows than one traversal block, so the blocked path is covered too
+    X = np.random.default_rng(1).normal(size=(CompiledForest.BLOCK_SIZE * 2 + 7, 6))
+
+    np.testing.assert_array_equal(forest.predict(X), model.predict(X))
+
+
+def test_apply_matches_sklearn_leaves():
+    model = fitted_forest(2)
+    forest = CompiledForest.from_sklearn(model)
+    X = np.random.default_rng(2).normal(size=(50, 6))
+
+    leaves = forest.apply(X) - forest.roots
+    np.testing.assert_array_equal(leaves, model.apply(X))
+
+
+def test_per_tree_outputs_match_estimators():
+    model = fitted_forest(2, n_estimators=5)
+    forest = CompiledForest.from_sklearn(model)
+    X = np.random.default_rng(3).normal(size=(20, 6))
+
+    per_tree = forest.predict_per_tree(X)
+    assert per_tree.shape == (20, 5, 2)
+    for i, estimator in enumerate(model.estimators_):
+        np.testing.assert_array_equal(per_tree[:, i], estimator.predict(X))
+
+
+def test_from_arrays_round_trip():
+    model = fitted_forest(2)
+    forest = CompiledForest.from_sklearn(model)
+    rebuilt = CompiledForest.from_arrays({name: array.copy() for name, array in forest.arrays().items()})
+    X = np.random.default_rng(4).normal(size=(30, 6))
+
+    np.testing.assert_array_equal(rebuilt.predict(X), forest.predict(X))
+    assert rebuilt.nbytes == forest.nbytes
+
+
+@pytest.mark.parametrize('n_outputs', [1, 2])
+def test_batch_equals_single_row_calls_bit_for_bit(n_outputs):
+    model = fitted_forest(n_outputs)
+    forest = CompiledForest.from_sklearn(model)
+    X = np.random.default_rng(5).normal(size=(CompiledForest.BLOCK_SIZE + 3, 6))
+
+    batch = forest.predict(X)
+    single = np.concatenate([forest.predict(X[i:i + 1]) for i in range(len(X))])
+    sklearn_single = np.concatenate([model.predict(X[i:i + 1]) for i in range(len(X))])
+
+    np.testing.assert_array_equal(batch, single)
+    np.testing.assert_array_equal(batch, model.predict(X))
+    np.testing.assert_array_equal(single, sklearn_single)
+
+
+def test_analyzer_batch_equals_single_predictions(analyzer):
+    inputs = [{'harvest_month': month, 'soil_ph': 5.5 + i / 10, 'season': season}
+              for i, (month, season) in enumerate(zip(analyzer.MONTHS, ['Summer', 'Winter', 'Spring', 'Fall'] * 3))]
+
+    batch = analyzer.predict_batch(inputs)
+    assert batch == [analyzer._score_batch([analyzer.normalize_input(input_data)])[0] for input_data in inputs]
+    assert batch == [analyzer.predict(input_data) for input_data in inputs]
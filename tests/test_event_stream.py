@@ -0,0 +1,78 @@
+import json
+import threading
+
+from flask import Flask
+
+from app import create_app, event_stream
+from llm_rate_limiter import LLMBackpressure
+from planting_calendar import planting_service
+
+
+def frames(response):
+    """(event, data) for every SSE frame of a streamed response"""
+    for frame in response.get_data(as_text=True).strip().split('\n\n'):
+        event = 'message'
+        for line in frame.split('\n'):
+            if line.startswith('event: '):
+                event = line[7:]
+            elif line.startswith('data: '):
+                data = json.loads(line[6:])
+        yield event, data
+
+
+def streamed(result, **kwargs):
+    app = Flask(__name__)
+    with app.test_request_context():
+        return list(frames(app.make_response(event_stream(result, **kwargs))))
+
+
+def test_dict_result_sends_meta_then_text_then_done():
+    events = streamed({'crop': 'maize', 'advice': iter(['Plant ', 'now'])}, text_key='advice')
+
+    assert events == [('meta', {'crop': 'maize'}), ('message', {'text': 'Plant '}),
+                      ('message', {'text': 'now'}), ('done', {})]
+
+
+def test_backpressure_becomes_an_error_event_with_retry_after():
+    def chunks():
+        yield 'partial'
+        raise LLMBackpressure('LLM queue is full', 3)
+
+    events = streamed(chunks())
+
+    assert events[-1] == ('error', {'error': 'LLM queue is full', 'retry_after': 3})
+
+
+def test_callable_result_runs_after_the_up_front_meta():
+    calls = []
+    events = streamed(lambda: calls.append('ran') or {'weather': 'sunny', 'text': 'Go'},
+                      text_key='text', meta={'crop': 'maize'})
+
+    assert calls == ['ran']
+    assert events == [('meta', {'crop': 'maize'}), ('meta', {'weather': 'sunny'}),
+                      ('message', {'text': 'Go'}), ('done', {})]
+
+
+def test_planting_stream_sends_its_first_event_before_the_lookups(monkeypatch):
+    release = threading.Event()
+
+    def slow_schedule(crop_type, location, plot_size=None, stream=False):
+        # Stands in for the weather/market fan-out and its blocking market Gemini call
+        assert release.wait(5)
+        return {'degraded': [], 'ai_recommendations': iter(['Plant in October'])}
+
+    monkeypatch.setattr(planting_service, 'get_optimal_planting_dates', slow_schedule)
+    client = create_app().test_client()
+    response = client.post('/api/planting/schedule/stream', json={'crop_type': 'Maize', 'location': 'Durban'},
+                           buffered=False)
+    body = iter(response.response)
+
+    first = next(body).decode()
+    assert first.startswith('event: meta')
+    assert json.loads(first.split('data: ', 1)[1])['crop_info']['growing_days'] == 120
+    assert not release.is_set()
+
+    release.set()
+    rest = ''.join(chunk.decode() for chunk in body)
+    assert 'Plant in October' in rest and 'event: done' in rest
+    response.close()
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from compiled_forest import CompiledForest
+from forest_compaction import compact_forest, validation_data
+from inference_transform import InferenceTransform
+from model_registry import ModelRegistry
+
+
+@pytest.fixture(scope='module')
+def forest_and_data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 5))
+    y = np.stack([X[:, 0] * 2 + X[:, 1] ** 2, X[:, 2] - X[:, 3]], axis=1) + rng.normal(scale=0.1, size=(600, 2))
+    model = RandomForestRegressor(n_estimators=20, random_state=0).fit(X[:400], y[:400])
+    return CompiledForest.from_sklearn(model), X[400:], y[400:]
+
+
+def test_float32_storage_keeps_every_split(forest_and_data):
+    forest, X_val, y_val = forest_and_data
+    compacted, scores = compact_forest(forest, X_val, y_val, prune_trees=False)
+
+    np.testing.assert_array_equal(compacted.apply(X_val) - compacted.roots, forest.apply(X_val) - forest.roots)
+    np.testing.assert_allclose(compacted.predict(X_val), forest.predict(X_val), rtol=1e-6, atol=1e-6)
+    assert compacted.threshold.dtype == np.float32
+    assert scores['within_budget']
+
+
+def test_pruning_stays_within_the_budget(forest_and_data):
+    forest, X_val, y_val = forest_and_data
+    compacted, scores = compact_forest(forest, X_val, y_val, use_float32=False, error_budget=0.05)
+
+    assert compacted.n_trees < forest.n_trees
+    assert scores['compacted_r2'] >= scores['baseline_r2'] - 0.05
+    assert scores['within_budget']
+
+
+def test_depth_capping_beyond_the_budget_is_reported(forest_and_data):
+    forest, X_val, y_val = forest_and_data
+    _, scores = compact_forest(forest, X_val, y_val, max_depth=1, prune_trees=False, error_budget=0.01)
+
+    assert scores['compacted_r2'] < scores['baseline_r2'] - 0.01
+    assert not scores['within_budget']
+
+
+def test_registry_never_overwrites_a_published_version(trained_model_dir, tmp_path, analyzer):
+    registry = ModelRegistry(str(tmp_path))
+    registry.publish(analyzer, 'v1')
+
+    with pytest.raises(ValueError, match='already exists'):
+        registry.publish_bundle(analyzer.forest, analyzer.inference_transform, 'v1')
+    with pytest.raises(ValueError, match='already exists'):
+        registry.new_version_path('v1')
+    assert registry.load('v1').predict({'harvest_month': 'May'}) == analyzer.predict({'harvest_month': 'May'})
+
+
+def test_validation_data_defaults_to_the_simulated_split(analyzer):
+    X_val, y_val = validation_data(analyzer.inference_transform, analyzer=analyzer)
+
+    assert X_val.shape == (200, len(analyzer.inference_transform.feature_names))
+    assert y_val.shape == (200, 2)
+
+
+def test_validation_data_reads_a_held_out_file(analyzer, tmp_path):
+    rows = analyzer._load_training_data().iloc[:50]
+    path = tmp_path / 'held_out.csv'
+    rows.to_csv(path, index=False)
+
+    X_val, y_val = validation_data(analyzer.inference_transform, str(path))
+
+    transform = analyzer.inference_transform
+    np.testing.assert_allclose(X_val, transform.transform_rows(rows.to_dict('records')))
+    np.testing.assert_allclose(y_val * transform.target_scale + transform.target_mean,
+                               rows[transform.target_columns].to_numpy())
+
+
+def test_validation_data_rejects_rows_without_the_bundle_columns(analyzer, tmp_path):
+    path = tmp_path / 'csv_trained.csv'
+    analyzer._load_training_data().rename(columns={'Yield_per_hectare': 'Yield_Tons_Per_Hectare'}).to_csv(path)
+
+    with pytest.raises(ValueError, match=r"lack the bundle's columns: \['Yield_per_hectare'\]"):
+        validation_data(analyzer.inference_transform, str(path))
+
+
+def test_csv_trained_bundle_needs_explicit_validation_data(analyzer):
+    schema = dict(analyzer.inference_transform.schema(), target_columns=['Yield_Tons_Per_Hectare', 'Success_Rating'])
+
+    with pytest.raises(ValueError, match='--data'):
+        validation_data(InferenceTransform.from_schema(schema), analyzer=analyzer)
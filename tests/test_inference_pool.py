@@ -0,0 +1,69 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from FarmingAnalysis import FarmingAnalyzer
+from conftest import TEST_FOREST_PARAMS
+from inference_pool import InferencePool
+
+INPUTS = [{'harvest_month': month, 'soil_ph': 5.5 + i / 20}
+          for i, month in enumerate(FarmingAnalyzer.MONTHS * 30)]
+
+
+@pytest.fixture
+def pooled_analyzer(trained_model_dir, monkeypatch):
+    monkeypatch.setenv('INFERENCE_WORKERS', '2')
+    analyzer = FarmingAnalyzer(model_dir=str(trained_model_dir))
+    analyzer.load_model()
+    assert analyzer.inference_pool is not None
+    yield analyzer
+    analyzer.close_inference_pool()
+
+
+def test_pool_matches_in_process_scoring(analyzer):
+    pool = InferencePool(analyzer.forest, n_workers=2)
+    try:
+        X = np.random.default_rng(0).normal(size=(1000, len(analyzer.inference_transform.feature_names)))
+        np.testing.assert_array_equal(pool.predict(X), analyzer.forest.predict(X))
+    finally:
+        pool.close()
+
+
+@pytest.mark.parametrize('drain', [True, False])
+def test_closing_the_pool_mid_traffic_drops_no_requests(pooled_analyzer, drain):
+    expected = pooled_analyzer._score_batch(INPUTS[:1])
+    pool = pooled_analyzer.inference_pool
+    started = threading.Barrier(17)
+
+    def request(i):
+        if i == 0:
+            started.wait()
+            # What a model swap does to the old analyzer's pool
+            pool.close(wait=False, drain=drain)
+            return None
+        started.wait()
+        return [pooled_analyzer.predict_batch(INPUTS[:1]) for _ in range(20)]
+
+    with ThreadPoolExecutor(17) as executor:
+        results = list(executor.map(request, range(17)))
+
+    assert all(batch == expected for batches in results[1:] for batch in batches)
+
+
+def test_retraining_with_the_pool_rebuilds_the_table_from_the_new_forest(tmp_path, monkeypatch):
+    monkeypatch.setenv('INFERENCE_WORKERS', '2')
+    analyzer = FarmingAnalyzer(model_dir=str(tmp_path), forest_params=dict(TEST_FOREST_PARAMS))
+    analyzer.train_model_with_simulated_data()
+    try:
+        analyzer.forest_params = dict(TEST_FOREST_PARAMS, max_depth=4, random_state=7)
+        analyzer.train_model_with_simulated_data()
+        assert analyzer.inference_pool is not None
+
+        default_form = {}
+        live = analyzer._score_batch([default_form])[0]
+        assert analyzer.prediction_table.lookup(default_form) == live
+        assert analyzer.predict(default_form) == live
+    finally:
+        analyzer.close_inference_pool()
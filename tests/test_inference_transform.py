@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from FarmingAnalysis import FarmingAnalyzer
+from inference_transform import InferenceTransform
+
+FEATURES = FarmingAnalyzer.FEATURES
+NUMERIC = FarmingAnalyzer.NUMERICAL_FEATURES
+CATEGORICAL = FarmingAnalyzer.CATEGORICAL_FEATURES
+TARGETS = ['Yield_per_hectare', 'Success_Rating']
+
+
+@pytest.fixture(scope='module')
+def fitted():
+    """The training preprocessing, fitted the way FarmingAnalysis.preprocess_data does it"""
+    df = FarmingAnalyzer()._load_training_data()
+    encoders = {column: LabelEncoder().fit(df[column]) for column in CATEGORICAL}
+    scaler = StandardScaler().fit(df[NUMERIC])
+    target_scaler = StandardScaler().fit(df[TARGETS])
+    transform = InferenceTransform.from_fitted(FEATURES, scaler, encoders, target_scaler)
+    return transform, scaler, encoders, target_scaler
+
+
+def random_rows(encoders, n_rows, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({column: rng.normal(loc, spread, n_rows) for column, loc, spread in
+                       zip(NUMERIC, (450, 25, 70, 135, 6.5, 180), (300, 15, 20, 50, 2, 80))})
+    for column in CATEGORICAL:
+        df[column] = rng.choice(encoders[column].classes_, n_rows)
+    return df[FEATURES]
+
+
+def sklearn_features(df, scaler, encoders):
+    expected = df.copy()
+    for column in CATEGORICAL:
+        expected[column] = encoders[column].transform(df[column])
+    expected[NUMERIC] = scaler.transform(df[NUMERIC])
+    return expected.to_numpy(dtype=np.float64)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_features_match_the_fitted_sklearn_pipeline(fitted, seed):
+    transform, scaler, encoders, _ = fitted
+    df = random_rows(encoders, 2000, seed)
+
+    features = transform.transform_rows(df.to_dict('records'))
+    expected = sklearn_features(df, scaler, encoders)
+
+    # Categorical codes are exact; the folded multiply-add differs from
+    # (x - mean) / scale by at most a rounding step
+    categorical = [FEATURES.index(column) for column in CATEGORICAL]
+    np.testing.assert_array_equal(features[:, categorical], expected[:, categorical])
+    np.testing.assert_allclose(features, expected, rtol=1e-12, atol=1e-12)
+
+
+def test_inverse_target_matches_the_target_scaler(fitted):
+    transform, _, _, target_scaler = fitted
+    scaled = np.random.default_rng(7).normal(size=(500, 2))
+
+    np.testing.assert_array_equal(transform.inverse_target(scaled),
+                                  target_scaler.inverse_transform(pd.DataFrame(scaled, columns=TARGETS)))
+
+
+@pytest.mark.parametrize('column, label', [('Season', 'Monsoon'), ('Drought_Status', 'Severe'),
+                                           ('Pest_Pressure', 'low'), ('Disease_Pressure', None)])
+def test_unseen_categories_are_rejected_like_the_label_encoder(fitted, column, label):
+    transform, _, encoders, _ = fitted
+    row = random_rows(encoders, 1, 0).to_dict('records')[0]
+    row[column] = label
+
+    with pytest.raises(ValueError):
+        encoders[column].transform([label])
+    with pytest.raises(ValueError, match=f'Unknown {column} value'):
+        transform.transform_rows([row])
+
+
+def test_schema_round_trip_is_exact(fitted):
+    transform, _, encoders, _ = fitted
+    rebuilt = InferenceTransform.from_schema(transform.schema())
+    rows = random_rows(encoders, 200, 11).to_dict('records')
+
+    np.testing.assert_array_equal(rebuilt.transform_rows(rows), transform.transform_rows(rows))
@@ -0,0 +1,109 @@
+from types import SimpleNamespace
+
+import pytest
+
+import llm_cache
+from llm_cache import LLMCache, parse_ttls
+
+MODEL = 'gemini-1.5-flash'
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Wall clock seen by the cache, advanced by hand"""
+    now = SimpleNamespace(value=1_700_000_000.0)
+    monkeypatch.setattr(llm_cache, 'time', SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / 'llm_cache.sqlite3')
+
+
+def test_fresh_entries_hit_until_their_ttl_expires(cache_path, clock):
+    cache = LLMCache(cache_path, ttls={'weather.farming_analysis': 60})
+    cache.put(MODEL, 'weather prompt', 'weather.farming_analysis', 'Irrigate tomorrow')
+
+    clock.value += 59
+    assert cache.get(MODEL, 'weather prompt', 'weather.farming_analysis') == 'Irrigate tomorrow'
+
+    clock.value += 1
+    assert cache.get(MODEL, 'weather prompt', 'weather.farming_analysis') is None
+    assert cache.stats()['expired'] == 1
+    assert cache.stats()['entries'] == 0
+
+
+def test_zero_ttl_bypasses_the_cache_for_that_call_site(cache_path, clock):
+    cache = LLMCache(cache_path, ttls=parse_ttls('market.analysis=0'))
+    cache.put(MODEL, 'prompt', 'market.analysis', 'Prices are rising')
+    cache.put(MODEL, 'prompt', 'planting.schedule', 'Plant in October')
+
+    assert cache.get(MODEL, 'prompt', 'market.analysis') is None
+    assert cache.get(MODEL, 'prompt', 'planting.schedule') == 'Plant in October'
+    stats = cache.stats()
+    # A bypassed lookup is neither a hit nor a miss
+    assert (stats['hits'], stats['misses'], stats['writes'], stats['entries']) == (1, 0, 1, 1)
+
+
+def test_model_and_prompt_both_key_the_entry(cache_path, clock):
+    cache = LLMCache(cache_path)
+    cache.put(MODEL, 'prompt', 'planting.schedule', 'flash answer')
+
+    assert cache.get('gemini-1.5-pro', 'prompt', 'planting.schedule') is None
+    assert cache.get(MODEL, 'prompt ', 'planting.schedule') is None
+
+
+def test_trimming_evicts_the_least_recently_used_entries(cache_path, clock):
+    cache = LLMCache(cache_path, max_entries=3)
+    for prompt in ('a', 'b', 'c'):
+        clock.value += 1
+        cache.put(MODEL, prompt, 'planting.schedule', f'answer {prompt}')
+    clock.value += 1
+    assert cache.get(MODEL, 'a', 'planting.schedule') == 'answer a'
+
+    clock.value += 1
+    cache.put(MODEL, 'd', 'planting.schedule', 'answer d')
+
+    assert cache.get(MODEL, 'b', 'planting.schedule') is None
+    assert [cache.get(MODEL, prompt, 'planting.schedule') for prompt in 'acd'] == \
+        ['answer a', 'answer c', 'answer d']
+    stats = cache.stats()
+    assert (stats['entries'], stats['evictions']) == (3, 1)
+
+
+def test_counters_are_kept_overall_and_per_call_site(cache_path, clock):
+    cache = LLMCache(cache_path)
+    cache.put(MODEL, 'advice', 'community.advice', 'Rotate crops')
+    for _ in range(3):
+        cache.get(MODEL, 'advice', 'community.advice')
+    cache.get(MODEL, 'other advice', 'community.advice')
+    cache.get(MODEL, 'weather', 'weather.farming_analysis')
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['writes']) == (3, 2, 1)
+    assert stats['hit_rate'] == 0.6
+    assert stats['call_sites'] == {
+        'community.advice': {'hits': 3, 'misses': 1, 'hit_rate': 0.75},
+        'weather.farming_analysis': {'hits': 0, 'misses': 1, 'hit_rate': 0.0},
+    }
+
+
+def test_entries_persist_across_instances(cache_path, clock):
+    LLMCache(cache_path).put(MODEL, 'prompt', 'resources.fertilizer_program', 'Apply 180 kg/ha')
+
+    reopened = LLMCache(cache_path)
+
+    assert reopened.get(MODEL, 'prompt', 'resources.fertilizer_program') == 'Apply 180 kg/ha'
+    assert reopened.stats()['entries'] == 1
+
+
+def test_clear_by_call_site(cache_path, clock):
+    cache = LLMCache(cache_path)
+    cache.put(MODEL, 'market prompt', 'market.analysis', 'market')
+    cache.put(MODEL, 'planting prompt', 'planting.schedule', 'planting')
+
+    cache.clear('market.analysis')
+
+    assert cache.get(MODEL, 'market prompt', 'market.analysis') is None
+    assert cache.get(MODEL, 'planting prompt', 'planting.schedule') == 'planting'
@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+from llm_rate_limiter import LLMBackpressure, LLMRateLimiter
+
+
+def queue_waiters(limiter, call_sites, admitted):
+    """Start one waiting thread per call site, in order, once each is queued"""
+    threads = []
+    for call_site in call_sites:
+        def run(call_site=call_site):
+            try:
+                limiter.acquire(call_site)
+                admitted.append(call_site)
+            except LLMBackpressure as e:
+                admitted.append(('rejected', call_site, str(e)))
+        thread = threading.Thread(target=run)
+        thread.start()
+        depth = len(threads) + 1
+        deadline = time.monotonic() + 2
+        while limiter.stats()['queue_depth'] < depth and time.monotonic() < deadline:
+            time.sleep(0.001)
+        threads.append(thread)
+    return threads
+
+
+def test_burst_is_admitted_without_waiting():
+    limiter = LLMRateLimiter(rate_per_minute=60, burst=3)
+
+    assert [limiter.acquire('market.analysis') for _ in range(3)] == [0.0, 0.0, 0.0]
+
+
+def test_waiters_are_admitted_in_priority_order():
+    # One token every 100 ms, none in the bucket at the start
+    limiter = LLMRateLimiter(rate_per_minute=600, burst=1, max_queue=10, max_wait=5)
+    limiter.acquire('market.analysis')
+    admitted = []
+    threads = queue_waiters(limiter, ['community.post_summary', 'market.analysis', 'community.advice'], admitted)
+    for thread in threads:
+        thread.join(5)
+
+    assert admitted == ['community.advice', 'market.analysis', 'community.post_summary']
+
+
+def test_full_queue_rejects_with_a_retry_hint():
+    limiter = LLMRateLimiter(rate_per_minute=6, burst=1, max_queue=1, max_wait=0.5)
+    limiter.acquire('market.analysis')
+    admitted = []
+    threads = queue_waiters(limiter, ['market.analysis'], admitted)
+
+    with pytest.raises(LLMBackpressure) as error:
+        limiter.acquire('market.analysis')
+    assert error.value.retry_after >= 1
+    for thread in threads:
+        thread.join(5)
+
+
+def test_higher_priority_displaces_the_lowest_waiter():
+    limiter = LLMRateLimiter(rate_per_minute=1200, burst=1, max_queue=1, max_wait=5)
+    limiter.acquire('market.analysis')
+    admitted = []
+    threads = queue_waiters(limiter, ['community.trending_topics'], admitted)
+
+    limiter.acquire('community.advice')
+    for thread in threads:
+        thread.join(5)
+
+    assert admitted[0][:2] == ('rejected', 'community.trending_topics')
+    assert limiter.stats()['priorities']['background']['displaced'] == 1
+
+
+def test_waiting_past_max_wait_fails():
+    limiter = LLMRateLimiter(rate_per_minute=1, burst=1, max_queue=5, max_wait=0.05)
+    limiter.acquire('market.analysis')
+
+    with pytest.raises(LLMBackpressure, match='Waited more than'):
+        limiter.acquire('market.analysis')
+    assert limiter.stats()['queue_depth'] == 0
+
+
+def test_zero_queue_rejects_once_the_bucket_is_empty():
+    limiter = LLMRateLimiter(rate_per_minute=1, burst=1, max_queue=0)
+    limiter.acquire('community.advice')
+
+    with pytest.raises(LLMBackpressure):
+        limiter.acquire('community.advice')
@@ -0,0 +1,174 @@
+from types import SimpleNamespace
+
+import pytest
+from google.api_core import exceptions
+
+import llm_resilience
+from llm_client import LLMClient, LLMUnavailable
+from llm_resilience import (CLOSED, FALLBACK_NOTICE, HALF_OPEN, OPEN, CircuitBreaker, LLMCircuitOpen,
+                            counts_as_failure, fallback_text, parse_timeouts)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A monotonic clock the test advances by hand"""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(llm_resilience.time, 'monotonic', lambda: now.value)
+    return now
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.before_call()
+        breaker.record_failure()
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.stats()['opened'] == 1
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == CLOSED
+    assert breaker.stats()['consecutive_failures'] == 1
+
+
+def test_open_breaker_fails_fast_with_retry_after(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+    clock.value += 12
+
+    with pytest.raises(LLMCircuitOpen) as excinfo:
+        breaker.before_call()
+
+    assert excinfo.value.retry_after == 18.0
+    assert breaker.stats()['short_circuited'] == 1
+
+
+def test_half_open_lets_a_single_probe_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+    clock.value += 30
+
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(LLMCircuitOpen):
+        breaker.before_call()
+    assert breaker.stats()['probes'] == 1
+
+
+def test_successful_probe_closes_the_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+    clock.value += 30
+
+    breaker.before_call()
+    breaker.record_success()
+
+    assert breaker.state == CLOSED
+    breaker.before_call()
+    breaker.before_call()
+
+
+def test_failed_probe_reopens_the_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    open_breaker(breaker)
+    clock.value += 30
+
+    breaker.before_call()
+    breaker.record_failure()
+
+    assert breaker.state == OPEN
+    assert breaker.stats()['opened'] == 2
+    with pytest.raises(LLMCircuitOpen) as excinfo:
+        breaker.before_call()
+    assert excinfo.value.retry_after == 30.0
+
+
+def test_released_probe_lets_the_next_call_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+    clock.value += 30
+
+    breaker.before_call()
+    breaker.release()
+
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    assert breaker.stats()['probes'] == 2
+
+
+@pytest.mark.parametrize('error, expected', [
+    (TimeoutError('deadline'), True),
+    (exceptions.DeadlineExceeded('deadline'), True),
+    (exceptions.ServiceUnavailable('down'), True),
+    (exceptions.TooManyRequests('quota'), True),
+    (exceptions.InvalidArgument('bad prompt'), False),
+    (ValueError('blocked response'), False),
+])
+def test_counts_as_failure(error, expected):
+    assert counts_as_failure(error) is expected
+
+
+def test_fallback_text_lists_sections_under_the_notice():
+    text = fallback_text('Maize in Durban:', ['Plant in October', 'Irrigate weekly'], '', [])
+
+    assert text == f"{FALLBACK_NOTICE}\n\nMaize in Durban:\n\n- Plant in October\n- Irrigate weekly"
+
+
+def test_parse_timeouts():
+    assert parse_timeouts(' market.analysis=4, community.advice = 2.5 ,') == \
+        {'market.analysis': 4.0, 'community.advice': 2.5}
+    assert parse_timeouts(None) == {}
+
+
+def test_open_breaker_answers_with_the_fallback_without_calling_gemini(clock):
+    class CountingModel:
+        calls = 0
+
+        def generate_content(self, contents, stream=False, request_options=None):
+            self.calls += 1
+            return SimpleNamespace(text='upstream answer')
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    open_breaker(breaker)
+    client = LLMClient(api_key='test-key', breaker=breaker)
+    client._model = model = CountingModel()
+
+    answer = client.generate('Market outlook for maize', call_site='market.analysis',
+                             fallback=lambda: fallback_text('Prices are unchanged.'))
+
+    assert answer.startswith(FALLBACK_NOTICE)
+    assert model.calls == 0
+    assert client.resilience_stats()['fallbacks'] == {'market.analysis': 1}
+    with pytest.raises(LLMCircuitOpen):
+        client.generate('Market outlook for maize', call_site='market.analysis')
+
+
+def test_missing_api_key_answers_with_the_fallback(monkeypatch):
+    monkeypatch.delenv('GOOGLE_API_KEY', raising=False)
+    client = LLMClient()
+    fallback = lambda: fallback_text('Plant maize after the first spring rains.')
+
+    assert client.generate('When should I plant maize?', call_site='planting.schedule',
+                           fallback=fallback) == fallback()
+    assert list(client.generate_stream('When should I plant maize?', call_site='planting.schedule',
+                                       fallback=fallback)) == [fallback()]
+    assert client.resilience_stats()['fallbacks'] == {'planting.schedule': 2}
+    with pytest.raises(LLMUnavailable):
+        client.generate('When should I plant maize?', call_site='planting.schedule')
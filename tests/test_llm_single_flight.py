@@ -0,0 +1,144 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from llm_client import LLMClient
+
+PROMPT = 'How should I irrigate maize in Durban this week?'
+
+
+class GatedModel:
+    """Stand-in GenerativeModel whose answers wait for release() before the last chunk"""
+
+    def __init__(self, chunks=('Water ', 'early ', 'in the morning.')):
+        self.chunks = chunks
+        self.calls = 0
+        self.started = threading.Event()
+        self.gate = threading.Event()
+
+    def release(self):
+        self.gate.set()
+
+    def generate_content(self, contents, stream=False, request_options=None):
+        self.calls += 1
+        self.started.set()
+        if not stream:
+            self.gate.wait(5)
+            return SimpleNamespace(text=''.join(self.chunks))
+        return self._stream()
+
+    def _stream(self):
+        for i, text in enumerate(self.chunks):
+            if i == len(self.chunks) - 1:
+                self.gate.wait(5)
+            yield SimpleNamespace(text=text)
+
+
+def make_client(model):
+    client = LLMClient(api_key='test-key')
+    client._model = model
+    return client
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert condition()
+
+
+def start_follower(client, results, stream):
+    def run():
+        try:
+            if stream:
+                results.append(''.join(client.generate_stream(PROMPT, call_site='weather.farming_analysis')))
+            else:
+                results.append(client.generate(PROMPT, call_site='weather.farming_analysis'))
+        except Exception as e:
+            results.append(e)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_concurrent_identical_prompts_share_one_upstream_call():
+    model = GatedModel()
+    client = make_client(model)
+    results = []
+
+    threads = [start_follower(client, results, stream=False) for _ in range(5)]
+    wait_for(lambda: client.single_flight_stats()['leaders'] + client.single_flight_stats()['coalesced'] == 5)
+    model.release()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ['Water early in the morning.'] * 5
+    assert model.calls == 1
+    stats = client.single_flight_stats()
+    assert (stats['leaders'], stats['coalesced'], stats['in_flight']) == (1, 4, 0)
+
+
+def test_followers_get_the_full_answer_when_the_leader_disconnects():
+    model = GatedModel()
+    client = make_client(model)
+
+    leader = client.generate_stream(PROMPT, call_site='weather.farming_analysis')
+    assert next(leader) == 'Water '
+    results = []
+    threads = [start_follower(client, results, stream=True) for _ in range(2)]
+    wait_for(lambda: client.single_flight_stats()['coalesced'] == 2)
+
+    # The leader's browser goes away mid-answer
+    leader.close()
+    model.release()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ['Water early in the morning.'] * 2
+    assert model.calls == 1
+    wait_for(lambda: client.single_flight_stats()['in_flight'] == 0)
+    # The drained answer is complete, so it counts as a successful call
+    assert client.stats()['weather.farming_analysis']['errors'] == 0
+
+
+def test_leader_disconnect_without_followers_ends_the_flight():
+    model = GatedModel()
+    client = make_client(model)
+
+    leader = client.generate_stream(PROMPT, call_site='weather.farming_analysis')
+    assert next(leader) == 'Water '
+    leader.close()
+    model.release()
+
+    assert client.single_flight_stats()['in_flight'] == 0
+    assert ''.join(client.generate_stream(PROMPT, call_site='weather.farming_analysis')) == \
+        'Water early in the morning.'
+    assert model.calls == 2
+
+
+def test_upstream_errors_reach_every_follower():
+    class FailingModel(GatedModel):
+        def generate_content(self, contents, stream=False, request_options=None):
+            self.calls += 1
+            self.gate.wait(5)
+            raise TimeoutError('deadline exceeded')
+
+    model = FailingModel()
+    client = make_client(model)
+    results = []
+
+    threads = [start_follower(client, results, stream=False) for _ in range(3)]
+    wait_for(lambda: client.single_flight_stats()['coalesced'] == 2)
+    model.release()
+    for thread in threads:
+        thread.join(5)
+
+    assert model.calls == 1
+    assert len(results) == 3
+    assert all(isinstance(result, TimeoutError) for result in results)
+
+    with pytest.raises(TimeoutError):
+        client.generate(PROMPT, call_site='weather.farming_analysis')
+    assert model.calls == 2
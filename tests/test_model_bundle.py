@@ -0,0 +1,82 @@
+import os
+import shutil
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from FarmingAnalysis import FarmingAnalyzer
+from conftest import train_analyzer
+from model_bundle import read_bundle, read_header
+
+INPUTS = [
+    {'season': season, 'plot_size': plot_size, 'harvest_month': month, 'soil_ph': ph, 'fertilizer_usage': 170}
+    for season, plot_size, month, ph in [('Summer', 'Small', 'March', 6.1), ('Winter', 'Large', 'July', 7.0),
+                                          ('Spring', 'Medium', 'October', 5.8), ('Fall', 'Medium', 'January', 6.4)]
+]
+
+
+@pytest.fixture(scope='module')
+def legacy_and_bundle_dirs(tmp_path_factory):
+    """One trained model, saved both as joblib artifacts and as a bundle"""
+    bundle_dir = tmp_path_factory.mktemp('bundle')
+    trained = train_analyzer(bundle_dir)
+
+    legacy_dir = tmp_path_factory.mktemp('legacy')
+    joblib.dump(trained.model, legacy_dir / 'farming_model.joblib')
+    joblib.dump(trained.scaler, legacy_dir / 'scaler.joblib')
+    joblib.dump(trained.label_encoders, legacy_dir / 'label_encoders.joblib')
+    joblib.dump(trained.target_scaler, legacy_dir / 'target_scaler.joblib')
+    return legacy_dir, bundle_dir
+
+
+def test_bundle_predictions_match_legacy_artifacts(legacy_and_bundle_dirs):
+    legacy_dir, bundle_dir = legacy_and_bundle_dirs
+    legacy = FarmingAnalyzer(model_dir=str(legacy_dir))
+    legacy.load_model()
+    bundled = FarmingAnalyzer(model_dir=str(bundle_dir))
+    bundled.load_model()
+
+    assert legacy.model_version == 'legacy'
+    assert bundled.model_bundle is not None
+    assert bundled.predict_batch(INPUTS, intervals=True) == legacy.predict_batch(INPUTS, intervals=True)
+
+
+def test_forest_matches_sklearn_through_the_bundle(legacy_and_bundle_dirs):
+    legacy_dir, bundle_dir = legacy_and_bundle_dirs
+    model = joblib.load(legacy_dir / 'farming_model.joblib')
+    bundle = read_bundle(str(bundle_dir / 'farming_model.bundle'))
+    X = np.random.default_rng(0).normal(size=(200, model.n_features_in_))
+
+    np.testing.assert_array_equal(bundle.forest.predict(X),
+                                  model.predict(pd.DataFrame(X, columns=model.feature_names_in_)))
+
+
+def test_converted_legacy_model_keeps_its_predictions(legacy_and_bundle_dirs, tmp_path):
+    legacy_dir, _ = legacy_and_bundle_dirs
+    for name in os.listdir(legacy_dir):
+        shutil.copy(legacy_dir / name, tmp_path / name)
+    legacy = FarmingAnalyzer(model_dir=str(tmp_path))
+    legacy.load_legacy_model()
+    expected = legacy.predict_batch(INPUTS)
+
+    header = legacy.save_model()
+    converted = FarmingAnalyzer(model_dir=str(tmp_path))
+    converted.load_model()
+
+    assert converted.model_version == header['metadata']['model_version']
+    assert converted.predict_batch(INPUTS) == expected
+
+
+def test_corrupted_bundle_is_rejected(legacy_and_bundle_dirs, tmp_path):
+    _, bundle_dir = legacy_and_bundle_dirs
+    path = tmp_path / 'farming_model.bundle'
+    shutil.copy(bundle_dir / 'farming_model.bundle', path)
+    header = read_header(str(path))
+    data = bytearray(path.read_bytes())
+    data[-header['data_size'] // 2] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError, match='checksum'):
+        read_bundle(str(path))
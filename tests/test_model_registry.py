@@ -0,0 +1,135 @@
+import threading
+import time
+
+import pytest
+
+from FarmingAnalysis import FarmingAnalyzer
+from conftest import TEST_FOREST_PARAMS, train_analyzer
+from model_registry import ModelRegistry
+
+INPUTS = [{}, {'harvest_month': 'May', 'season': 'Winter'}, {'drought_status': 'High', 'soil_ph': 5.9}]
+ADMIN_TOKEN = 'test-admin-token'
+
+
+@pytest.fixture(scope='module')
+def registry_dir(tmp_path_factory):
+    """Model directory with a bundle and two published versions that predict differently"""
+    model_dir = tmp_path_factory.mktemp('registry')
+    registry = ModelRegistry(str(model_dir))
+    registry.publish(train_analyzer(model_dir), 'v1')
+
+    other = FarmingAnalyzer(model_dir=str(tmp_path_factory.mktemp('other')),
+                            forest_params=dict(TEST_FOREST_PARAMS, max_depth=3, random_state=7))
+    other.train_model_with_simulated_data()
+    registry.publish(other, 'v2')
+    return model_dir
+
+
+@pytest.fixture(scope='module')
+def expected(registry_dir):
+    registry = ModelRegistry(str(registry_dir))
+    predictions = {version: registry.load(version).predict_batch(INPUTS) for version in ('v1', 'v2')}
+    assert predictions['v1'] != predictions['v2']
+    return predictions
+
+
+def test_requests_see_one_version_end_to_end(registry_dir, expected):
+    registry = ModelRegistry(str(registry_dir))
+    registry.activate('v1')
+    stop = threading.Event()
+    results = []
+
+    def serve():
+        while not stop.is_set():
+            # What every route does: fetch the active analyzer once per request
+            current = registry.active()
+            results.append((current.model_version, current.predict_batch(INPUTS)))
+
+    threads = [threading.Thread(target=serve) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for version in ('v2', 'v1', 'v2'):
+        time.sleep(0.05)
+        registry.activate(version)
+    time.sleep(0.05)
+    stop.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert {version for version, _ in results} == {'v1', 'v2'}
+    assert all(predictions == expected[version] for version, predictions in results)
+    assert registry.active_version == 'v2'
+
+
+def test_unknown_version_cannot_be_loaded(registry_dir):
+    registry = ModelRegistry(str(registry_dir))
+
+    with pytest.raises(KeyError):
+        registry.load('v9')
+    with pytest.raises(ValueError):
+        registry.activate_async('../v1')
+
+
+@pytest.fixture
+def client(registry_dir, monkeypatch):
+    monkeypatch.setenv('MODEL_DIR', str(registry_dir))
+    monkeypatch.setenv('MODEL_VERSION', 'v1')
+    monkeypatch.setenv('ADMIN_TOKEN', ADMIN_TOKEN)
+    from app import create_app
+
+    app = create_app()
+    assert app.extensions['startup'].wait('model', 60)
+    return app.test_client()
+
+
+def admin(token=ADMIN_TOKEN):
+    return {'X-Admin-Token': token}
+
+
+@pytest.mark.parametrize('headers', [{}, admin('wrong-token')])
+def test_admin_routes_need_the_token(client, headers):
+    assert client.get('/api/admin/models', headers=headers).status_code == 403
+    assert client.post('/api/admin/models/v2/activate', headers=headers).status_code == 403
+
+
+def test_admin_routes_are_closed_without_a_configured_token(client, monkeypatch):
+    monkeypatch.delenv('ADMIN_TOKEN')
+
+    assert client.get('/api/admin/models', headers=admin()).status_code == 403
+    assert client.get('/api/admin/models', headers=admin('')).status_code == 403
+
+
+def test_activating_an_unknown_version_is_not_found(client):
+    response = client.post('/api/admin/models/v9/activate', headers=admin())
+
+    assert response.status_code == 404
+    assert client.get('/api/admin/models', headers=admin()).json['jobs'] == {}
+
+
+def test_activation_switches_the_reported_version(client, expected):
+    listing = client.get('/api/admin/models', headers=admin()).json
+    assert listing['active_version'] == 'v1'
+    assert {entry['version'] for entry in listing['versions']} == {'v1', 'v2'}
+
+    batch = client.post('/api/predict/batch', json=INPUTS).json
+    assert batch == {'model_version': 'v1', 'predictions': expected['v1']}
+
+    response = client.post('/api/admin/models/v2/activate', headers=admin())
+    assert response.status_code == 202
+    assert response.json['state'] == 'loading'
+    deadline = time.monotonic() + 30
+    while client.get('/api/admin/models', headers=admin()).json['jobs']['v2']['state'] == 'loading':
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    listing = client.get('/api/admin/models', headers=admin()).json
+    assert listing['active_version'] == 'v2'
+    assert listing['jobs']['v2']['state'] == 'activated'
+    batch = client.post('/api/predict/batch', json=INPUTS).json
+    assert batch == {'model_version': 'v2', 'predictions': expected['v2']}
+
+    form = client.post('/submit_form', data={'location': 'Durban', 'plantType': 'Maize', 'plotSize': 'Medium',
+                                             'harvestMonth': 'May'})
+    assert form.status_code == 200
+    assert form.headers['X-Model-Version'] == 'v2'
+    assert b'Model version v2' in form.data
@@ -0,0 +1,55 @@
+import threading
+import time
+
+from llm_client import llm_client
+from planting_calendar import BRANCH_MARGIN_SECONDS, PlantingCalendarService
+
+
+def service(monkeypatch, workers, **timeouts):
+    monkeypatch.setenv('PLANTING_UPSTREAM_WORKERS', str(workers))
+    for name in ('PLANTING_WEATHER_TIMEOUT_SECONDS', 'PLANTING_MARKET_TIMEOUT_SECONDS'):
+        monkeypatch.delenv(name, raising=False)
+    planting = PlantingCalendarService()
+    planting.branch_timeouts.update(timeouts)
+    return planting
+
+
+def test_market_timeout_follows_the_llm_call_site_budget(monkeypatch):
+    planting = service(monkeypatch, 2)
+
+    assert planting.branch_timeouts['market'] == llm_client.timeout_for('market.analysis') + BRANCH_MARGIN_SECONDS
+
+
+def test_branches_run_concurrently(monkeypatch):
+    planting = service(monkeypatch, 2, weather=2, market=2)
+    started = time.monotonic()
+    results, degraded = planting._fan_out({
+        'weather': (lambda: time.sleep(0.3) or 'sunny', ()),
+        'market': (lambda: time.sleep(0.3) or 'bullish', ()),
+    })
+
+    assert results == {'weather': 'sunny', 'market': 'bullish'}
+    assert degraded == []
+    assert time.monotonic() - started < 0.55
+
+
+def test_saturated_pool_degrades_immediately(monkeypatch):
+    planting = service(monkeypatch, 2, weather=0.1, market=0.1)
+    release = threading.Event()
+    # A request whose branches time out but keep holding both workers
+    _, degraded = planting._fan_out({'weather': (release.wait, ()), 'market': (release.wait, ())})
+    assert degraded == ['weather', 'market']
+
+    started = time.monotonic()
+    results, degraded = planting._fan_out({'weather': (lambda: 'sunny', ()), 'market': (lambda: 'bullish', ())})
+    assert degraded == ['weather', 'market']
+    assert time.monotonic() - started < 0.05
+
+    release.set()
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        results, degraded = planting._fan_out({'weather': (lambda: 'sunny', ())})
+        if not degraded:
+            break
+        time.sleep(0.01)
+    assert results == {'weather': 'sunny'}
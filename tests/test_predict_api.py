@@ -0,0 +1,79 @@
+import pytest
+
+
+@pytest.fixture
+def client(trained_model_dir, monkeypatch):
+    monkeypatch.setenv('MODEL_DIR', str(trained_model_dir))
+    monkeypatch.setenv('PREDICT_BATCH_MAX_SIZE', '5')
+    from app import create_app
+
+    app = create_app()
+    assert app.extensions['startup'].wait('model', 60)
+    return app.test_client()
+
+
+def test_batch_scores_every_input(client):
+    response = client.post('/api/predict/batch', json={'inputs': [{'harvest_month': 'May'}, {'season': 'Winter'}]})
+
+    assert response.status_code == 200
+    assert len(response.json['predictions']) == 2
+
+
+@pytest.mark.parametrize('inputs', [[1, {'season': 'Summer'}], ['Summer'], [{'soil_ph': 'acidic'}]])
+def test_batch_rejects_malformed_items(client, inputs):
+    response = client.post('/api/predict/batch', json=inputs)
+
+    assert response.status_code == 400
+
+
+def test_batch_size_is_capped(client):
+    response = client.post('/api/predict/batch', json=[{}] * 6)
+
+    assert response.status_code == 413
+
+
+@pytest.mark.parametrize('field, value', [
+    ('months', 'March'),
+    ('months', ['Smarch']),
+    ('seasons', 'Summer'),
+    ('seasons', []),
+    ('drought_levels', ['Severe']),
+    ('drought_levels', {'Low': 1}),
+])
+def test_sweep_rejects_malformed_axes(client, field, value):
+    body = {'location': 'Durban', 'plant_type': 'Maize', 'recommendations': False, field: value}
+    response = client.post('/api/predict/sweep', json=body)
+
+    assert response.status_code == 400
+
+
+def test_sweep_caps_the_scenario_count(client):
+    body = {'location': 'Durban', 'plant_type': 'Maize', 'recommendations': False,
+            'months': ['May'] * 200}
+    response = client.post('/api/predict/sweep', json=body)
+
+    assert response.status_code == 400
+    assert 'at most' in response.json['error']
+
+
+def test_sweep_ranks_the_requested_scenarios(client):
+    body = {'location': 'Durban', 'plant_type': 'Maize', 'recommendations': False,
+            'months': ['May', 'June'], 'seasons': ['Summer', 'Winter'], 'include_drought': True}
+    response = client.post('/api/predict/sweep', json=body)
+
+    assert response.status_code == 200
+    assert [s['rank'] for s in response.json['scenarios']] == list(range(1, 13))
+
+
+def test_batch_intervals_use_the_requested_quantiles(client):
+    response = client.post('/api/predict/batch', json={'inputs': [{}], 'intervals': True, 'quantiles': [0.1, 0.9]})
+
+    assert response.status_code == 200
+    assert set(response.json['predictions'][0]['intervals']['yield_prediction']) == {'p10', 'p90', 'std'}
+
+
+@pytest.mark.parametrize('quantiles', [[2], ['high'], 0.5, [0.5] * 1000])
+def test_batch_rejects_malformed_quantiles(client, quantiles):
+    response = client.post('/api/predict/batch', json={'inputs': [{}], 'intervals': True, 'quantiles': quantiles})
+
+    assert response.status_code == 400
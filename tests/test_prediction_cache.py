@@ -0,0 +1,65 @@
+import pytest
+
+from prediction_cache import PredictionCache
+
+CUSTOM = {'location': 'Durban', 'plant_type': 'Maize', 'harvest_month': 'May', 'soil_ph': 6.6}
+
+
+def test_lru_eviction_and_hit_rate():
+    cache = PredictionCache(max_size=2)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, {'value': key})
+
+    assert cache.get('a') is None
+    assert cache.get('c') == {'value': 'c'}
+    stats = cache.stats()
+    assert (stats['size'], stats['hits'], stats['misses'], stats['evictions']) == (2, 1, 1, 1)
+    assert stats['hit_rate'] == 0.5
+
+
+def test_cached_results_are_copies():
+    cache = PredictionCache()
+    cache.put('key', {'value': 1})
+    cache.get('key')['value'] = 2
+
+    assert cache.get('key') == {'value': 1}
+
+
+def test_numeric_strings_succeed_whatever_the_cache_holds(analyzer):
+    as_string = analyzer.predict(dict(CUSTOM, fertilizer_usage='190'))
+    analyzer.prediction_cache.clear()
+    as_number = analyzer.predict(dict(CUSTOM, fertilizer_usage=190))
+
+    assert as_string == as_number
+    # Warm cache: the string form maps onto the same entry
+    assert analyzer.predict(dict(CUSTOM, fertilizer_usage='190.0')) == as_number
+    assert analyzer.prediction_cache.stats()['hits'] == 1
+
+
+@pytest.mark.parametrize('value', ['lots', True, float('nan'), [180]])
+def test_invalid_numerics_fail_cold_and_warm(analyzer, value):
+    analyzer.predict(dict(CUSTOM, fertilizer_usage=180))
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            analyzer.predict(dict(CUSTOM, fertilizer_usage=value))
+
+
+def test_unknown_categories_are_rejected(analyzer):
+    with pytest.raises(ValueError):
+        analyzer.predict(dict(CUSTOM, season='Monsoon'))
+    with pytest.raises(ValueError):
+        analyzer.predict_batch([dict(CUSTOM, harvest_month=None)])
+
+
+def test_reload_invalidates_cached_predictions(analyzer):
+    live = analyzer.predict(CUSTOM)
+    key = analyzer.prediction_cache.make_key(analyzer.normalize_input(CUSTOM))
+    analyzer.prediction_cache.put(key, {'yield_prediction': -1.0, 'yield_per_hectare': -1.0,
+                                        'success_rating': -1.0})
+    invalidations = analyzer.prediction_cache.stats()['invalidations']
+
+    analyzer.load_model()
+
+    assert analyzer.prediction_cache.stats()['size'] == 0
+    assert analyzer.prediction_cache.stats()['invalidations'] == invalidations + 1
+    assert analyzer.predict(CUSTOM) == live
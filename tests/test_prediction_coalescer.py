@@ -0,0 +1,68 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from FarmingAnalysis import FarmingAnalyzer
+from prediction_coalescer import PredictionCoalescer
+
+
+def doubling_batch(calls):
+    def predict_batch(inputs):
+        calls.append(len(inputs))
+        if any(value < 0 for value in inputs):
+            raise ValueError('negative input')
+        return [value * 2 for value in inputs]
+    return predict_batch
+
+
+def test_concurrent_requests_share_a_batch():
+    calls = []
+    coalescer = PredictionCoalescer(doubling_batch(calls), window_ms=50, max_batch=16)
+    barrier = threading.Barrier(8)
+
+    def submit(value):
+        barrier.wait()
+        return coalescer.predict(value, timeout=5)
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(submit, range(8)))
+
+    assert results == [value * 2 for value in range(8)]
+    assert len(calls) < 8
+    assert coalescer.stats()['requests'] == 8
+
+
+def test_invalid_input_does_not_fail_its_batch_mates():
+    calls = []
+    coalescer = PredictionCoalescer(doubling_batch(calls), window_ms=50)
+    futures = [coalescer.submit(value) for value in (1, -1, 3)]
+
+    assert futures[0].result(5) == 2
+    assert futures[2].result(5) == 6
+    with pytest.raises(ValueError, match='negative'):
+        futures[1].result(5)
+    assert coalescer.stats()['fallbacks'] == 1
+
+
+def test_max_batch_bounds_each_call():
+    calls = []
+    coalescer = PredictionCoalescer(doubling_batch(calls), window_ms=50, max_batch=2)
+    futures = [coalescer.submit(value) for value in range(5)]
+
+    assert [future.result(5) for future in futures] == [0, 2, 4, 6, 8]
+    assert max(calls) <= 2
+
+
+def test_analyzer_coalesced_predictions_match_direct_ones(trained_model_dir, monkeypatch):
+    monkeypatch.setenv('PREDICTION_COALESCE_WINDOW_MS', '20')
+    analyzer = FarmingAnalyzer(model_dir=str(trained_model_dir))
+    analyzer.load_model()
+    inputs = [{'harvest_month': 'May', 'soil_ph': 5.5 + i / 10} for i in range(6)] + [{'drought_status': 'Severe'}]
+
+    with ThreadPoolExecutor(len(inputs)) as pool:
+        futures = [pool.submit(analyzer.predict, input_data) for input_data in inputs]
+
+    assert [future.result() for future in futures[:-1]] == analyzer.predict_batch(inputs[:-1])
+    with pytest.raises(ValueError):
+        futures[-1].result()
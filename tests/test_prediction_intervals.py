@@ -0,0 +1,40 @@
+import pytest
+
+OUTPUTS = ('yield_prediction', 'yield_per_hectare', 'success_rating')
+INPUTS = [{}, {'harvest_month': 'May', 'plot_size': 'Large'}, {'season': 'Winter', 'soil_ph': 5.8},
+          {'drought_status': 'High', 'pest_pressure': 'High', 'harvest_month': 'December'}]
+
+
+def test_intervals_leave_the_point_prediction_unchanged(analyzer):
+    with_intervals = analyzer.predict_batch(INPUTS, intervals=True)
+
+    for input_data, prediction in zip(INPUTS, with_intervals):
+        band = prediction.pop('intervals')
+        assert set(band) == set(OUTPUTS)
+        assert prediction == analyzer.predict(input_data)
+
+
+def test_quantile_bands_are_ordered(analyzer):
+    for prediction in analyzer.predict_batch(INPUTS, intervals=True):
+        for name in OUTPUTS:
+            band = prediction['intervals'][name]
+            assert band['p5'] <= band['p50'] <= band['p95']
+            assert band['std'] >= 0
+
+
+def test_full_range_covers_the_mean(analyzer):
+    predictions = analyzer.predict_batch(INPUTS, intervals=True, quantiles=[0, 1])
+
+    for prediction in predictions:
+        for name in OUTPUTS:
+            band = prediction['intervals'][name]
+            assert set(band) == {'p0', 'p100', 'std'}
+            assert band['p0'] <= prediction[name] <= band['p100']
+
+
+@pytest.mark.parametrize('quantiles', [[], [1.5], [-0.1], ['p50'], [True], [None], 0.5, 'p50', [0.5] * 21])
+def test_malformed_quantiles_are_rejected(analyzer, quantiles):
+    with pytest.raises(ValueError):
+        analyzer.predict_batch(INPUTS[:1], intervals=True, quantiles=quantiles)
+    with pytest.raises(ValueError):
+        analyzer.predict(INPUTS[0], intervals=True, quantiles=quantiles)
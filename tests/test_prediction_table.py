@@ -0,0 +1,42 @@
+import itertools
+
+import pytest
+
+from prediction_table import PredictionTable
+
+
+def grid_inputs(analyzer):
+    axes = PredictionTable.grid_axes(analyzer)
+    for combination in itertools.product(*(levels for _, levels, _ in axes)):
+        input_data = {name: value for (name, _, _), value in zip(axes, combination)}
+        if input_data['harvest_month'] is None:
+            del input_data['harvest_month']
+        yield input_data
+
+
+def test_table_matches_live_path_on_every_grid_point(analyzer):
+    inputs = list(grid_inputs(analyzer))
+    live = analyzer.predict_batch(inputs)
+
+    assert len(analyzer.prediction_table) == len(inputs)
+    for input_data, expected in zip(inputs, live):
+        assert analyzer.prediction_table.lookup(input_data) == expected
+
+
+def test_defaults_share_the_grid_key(analyzer):
+    table = analyzer.prediction_table
+    explicit = {'season': 'Summer', 'plot_size': 'Medium', 'drought_status': 'Low',
+                'pest_pressure': 'Low', 'disease_pressure': 'Low'}
+
+    assert table.key_for({}) == table.key_for(explicit)
+
+
+@pytest.mark.parametrize('input_data', [
+    {'soil_ph': 6.8},
+    {'fertilizer_usage': 150},
+    {'plot_size_value': 90},
+    {'harvest_month': None},
+    {'season': 'Monsoon'},
+])
+def test_non_grid_requests_are_scored_live(analyzer, input_data):
+    assert analyzer.prediction_table.lookup(input_data) is None
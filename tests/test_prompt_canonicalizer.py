@@ -0,0 +1,105 @@
+import math
+
+import pytest
+
+import weather_service
+from llm_cache import LLMCache
+from prompt_canonicalizer import (HUMIDITY, PERCENT_CHANGE, PRECIPITATION, PRICE, TEMPERATURE, WIND_SPEED,
+                                  Bands, PromptCanonicalizer, RelativeBands)
+
+
+@pytest.mark.parametrize('bands', [TEMPERATURE, HUMIDITY, PRECIPITATION, WIND_SPEED, PERCENT_CHANGE])
+def test_edges_belong_to_the_band_above(bands):
+    for i, edge in enumerate(bands.edges):
+        assert bands(math.nextafter(edge, -math.inf)) == bands.labels[i]
+        assert bands(edge) == bands.labels[i + 1]
+        assert bands(math.nextafter(edge, math.inf)) == bands.labels[i + 1]
+
+
+def test_range_labels():
+    assert TEMPERATURE(-3) == 'below 0°C (frost)'
+    assert TEMPERATURE(21.4) == '20-25°C (warm)'
+    assert TEMPERATURE(41) == 'above 35°C (heat stress)'
+    assert PERCENT_CHANGE(2.37) == 'firming (+1 to +3%)'
+
+
+def test_bands_need_a_label_per_interval():
+    with pytest.raises(ValueError):
+        Bands([0, 10], ['low', 'high'])
+
+
+def test_relative_bands_round_their_edges():
+    assert PRICE(4573) == PRICE(4600) == 'R4,410-4,630/ton'
+    assert PRICE(4400) == 'R4,200-4,410/ton'
+    assert PRICE(99.5) == 'R98-103/ton'
+    assert PRICE(12000) == 'R11,700-12,300/ton'
+    assert PRICE(0) == 'R0-0/ton'
+
+
+def test_relative_bands_are_contiguous():
+    bands = RelativeBands(0.1, '{}-{}')
+    labels = [bands(value) for value in range(100, 2000, 7)]
+    edges = [tuple(map(int, label.split('-'))) for label in dict.fromkeys(labels)]
+
+    assert all(low < high for low, high in edges)
+    assert all(previous[1] == current[0] for previous, current in zip(edges, edges[1:]))
+
+
+@pytest.mark.parametrize('setting, weather, market', [
+    (None, True, True),
+    ('all', True, True),
+    ('none', False, False),
+    ('market.analysis', False, True),
+    (' weather.farming_analysis , ', True, False),
+])
+def test_toggle_from_env(monkeypatch, setting, weather, market):
+    if setting is None:
+        monkeypatch.delenv('PROMPT_CANONICALIZATION', raising=False)
+    else:
+        monkeypatch.setenv('PROMPT_CANONICALIZATION', setting)
+    canonicalizer = PromptCanonicalizer.from_env()
+
+    assert canonicalizer.format('weather.farming_analysis', 'temperature', 21.4) == \
+        ('20-25°C (warm)' if weather else '21.4°C')
+    assert canonicalizer.format('market.analysis', 'price', 4573.4) == \
+        ('R4,410-4,630/ton' if market else 'R4573/ton')
+
+
+def test_configure_replaces_one_rule():
+    canonicalizer = PromptCanonicalizer()
+    canonicalizer.configure('weather.farming_analysis', 'temperature', Bands([15], ['cool', 'warm']))
+
+    assert canonicalizer.format('weather.farming_analysis', 'temperature', 21.4) == 'warm'
+    assert canonicalizer.format('weather.farming_analysis', 'humidity', 64) == '50-70% (humid)'
+
+
+def weather_reading(temperature, humidity, wind_speed):
+    return {
+        'location': 'Durban',
+        'current': {'temperature': temperature, 'humidity': humidity, 'precipitation': 0.0,
+                    'wind_speed': wind_speed},
+        'daily_forecast': [{'date': '2026-10-17', 'temp_min': temperature - 6, 'temp_max': temperature + 4,
+                            'precipitation': 2.4}],
+    }
+
+
+def test_near_identical_readings_share_a_cache_key(monkeypatch):
+    prompts = []
+    service = weather_service.WeatherService()
+    monkeypatch.setattr(service, 'llm', type('RecordingLLM', (), {
+        'available': True,
+        'generate': lambda self, prompt, **kwargs: prompts.append(prompt) or 'advice',
+    })())
+    monkeypatch.setattr(weather_service, 'prompt_canonicalizer', PromptCanonicalizer())
+
+    for reading in (weather_reading(21.4, 64, 12.6), weather_reading(22.1, 66, 14.0)):
+        monkeypatch.setattr(service, 'get_current_weather', lambda location, reading=reading: reading)
+        service.get_farming_weather_analysis('Durban')
+
+    assert prompts[0] == prompts[1]
+    assert LLMCache.make_key('gemini-1.5-flash', prompts[0]) == LLMCache.make_key('gemini-1.5-flash', prompts[1])
+
+    # Raw readings keep every prompt distinct
+    monkeypatch.setattr(weather_service, 'prompt_canonicalizer', PromptCanonicalizer(templates=set()))
+    service.get_farming_weather_analysis('Durban')
+    assert prompts[2] != prompts[1]
@@ -0,0 +1,74 @@
+import threading
+import time
+
+from startup import StartupManager, FAILED, READY
+
+
+def fails(times):
+    calls = {'count': 0}
+
+    def loader():
+        calls['count'] += 1
+        if calls['count'] <= times:
+            raise RuntimeError('unavailable')
+    return loader, calls
+
+
+def test_optional_failure_does_not_block_readiness():
+    startup = StartupManager()
+    startup.register('model', lambda: None)
+    startup.register('database', fails(1)[0], required=False)
+    startup.start()
+
+    assert startup.wait('model', 5)
+    assert not startup.wait('database', 5)
+    status = startup.status()
+    assert status['ready']
+    assert status['degraded'] == ['database']
+    assert status['components']['database']['state'] == FAILED
+
+
+def test_required_failure_blocks_readiness():
+    startup = StartupManager()
+    startup.register('model', fails(1)[0])
+    startup.start()
+
+    assert not startup.wait('model', 5)
+    assert not startup.status()['ready']
+
+
+def test_failed_component_is_retried_until_ready():
+    startup = StartupManager()
+    loader, calls = fails(2)
+    startup.register('database', loader, required=False, retry_backoff=(0.01, 0.02))
+    startup.start()
+
+    deadline = time.monotonic() + 5
+    while not startup.is_ready('database') and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    component = startup.status()['components']['database']
+    assert component['state'] == READY
+    assert component['attempts'] == calls['count'] == 3
+    assert startup.status()['degraded'] == []
+
+
+def test_requires_answers_503_until_ready():
+    from flask import Flask
+
+    app = Flask(__name__)
+    startup = StartupManager()
+    release = threading.Event()
+    startup.register('database', release.wait, required=False)
+    startup.start()
+
+    @app.route('/posts')
+    @startup.requires('database')
+    def posts():
+        return 'ok'
+
+    client = app.test_client()
+    assert client.get('/posts').status_code == 503
+    release.set()
+    assert startup.wait('database', 5)
+    assert client.get('/posts').status_code == 200
@@ -0,0 +1,78 @@
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from FarmingAnalysis import FarmingAnalyzer
+from conftest import TEST_FOREST_PARAMS
+
+N_ROWS = 1000
+
+
+@pytest.fixture(scope='module')
+def training_frame():
+    df = FarmingAnalyzer()._load_training_data()
+    return df.rename(columns={'Yield_per_hectare': 'Yield_Tons_Per_Hectare'})
+
+
+def write_dataset(df, tmp_path, fmt):
+    if fmt == 'parquet':
+        pytest.importorskip('pyarrow', exc_type=ImportError)
+        path = tmp_path / 'farms.parquet'
+        df.to_parquet(path)
+    else:
+        path = tmp_path / 'farms.csv'
+        df.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet'])
+@pytest.mark.parametrize('n_jobs, expected_blocks', [(1, 8), (2, 4), (4, 2)])
+def test_blocks_fit_a_tree_per_worker(training_frame, tmp_path, fmt, n_jobs, expected_blocks):
+    data_path = write_dataset(training_frame, tmp_path, fmt)
+    analyzer = FarmingAnalyzer(model_dir=str(tmp_path / 'models'), forest_params=dict(TEST_FOREST_PARAMS))
+
+    report = analyzer.train_model_streaming(data_path, chunksize=50, n_estimators=8, n_jobs=n_jobs)
+
+    assert report['blocks'] == expected_blocks
+    assert report['rows'] == N_ROWS
+    assert report['n_estimators'] == 8
+    assert len(analyzer.model.estimators_) == 8
+    assert report['trained_rows'] + report['test_rows'] == N_ROWS
+    assert report['score'] is not None
+    assert analyzer.forest.n_trees == 8
+
+
+def test_each_warm_start_round_adds_a_tree_per_worker(training_frame, tmp_path, monkeypatch):
+    data_path = write_dataset(training_frame, tmp_path, 'csv')
+    analyzer = FarmingAnalyzer(model_dir=str(tmp_path / 'models'), forest_params=dict(TEST_FOREST_PARAMS))
+    rounds = []
+    original_fit = RandomForestRegressor.fit
+
+    def counting_fit(self, X, y, *args, **kwargs):
+        before = len(getattr(self, 'estimators_', []))
+        result = original_fit(self, X, y, *args, **kwargs)
+        rounds.append(len(self.estimators_) - before)
+        return result
+
+    monkeypatch.setattr(RandomForestRegressor, 'fit', counting_fit)
+    analyzer.train_model_streaming(data_path, chunksize=10, n_estimators=12, n_jobs=3)
+
+    assert rounds == [3, 3, 3, 3]
+
+
+def test_streamed_model_is_saved_with_its_report(training_frame, tmp_path):
+    data_path = write_dataset(training_frame, tmp_path, 'csv')
+    analyzer = FarmingAnalyzer(model_dir=str(tmp_path / 'models'), forest_params=dict(TEST_FOREST_PARAMS))
+    report = analyzer.train_model_streaming(data_path, chunksize=200, n_estimators=4, n_jobs=1)
+
+    loaded = FarmingAnalyzer(model_dir=str(tmp_path / 'models'))
+    loaded.load_model()
+
+    assert loaded.model_bundle.metadata['training']['blocks'] == report['blocks']
+    assert loaded.forest.n_trees == 4
+
+
+def test_sample_fraction_must_be_a_fraction(tmp_path):
+    analyzer = FarmingAnalyzer(model_dir=str(tmp_path), forest_params=dict(TEST_FOREST_PARAMS))
+
+    with pytest.raises(ValueError, match='sample_fraction'):
+        analyzer.train_model_streaming('unused.csv', sample_fraction=0)
@@ -1,13 +1,14 @@
+import config
 import requests
 from datetime import datetime, timedelta
-import google.generativeai as genai
 import os
-from dotenv import load_dotenv
 from database import weather_db
 import json
 import logging
-
-load_dotenv()
+from llm_client import llm_client
+from llm_rate_limiter import LLMBackpressure
+from llm_resilience import fallback_text
+from prompt_canonicalizer import prompt_canonicalizer
 
 class WeatherService:
     def __init__(self):
@@ -15,14 +16,11 @@ class WeatherService:
         # Get API keys
         self.openweather_api_key = os.getenv('OPEN_WEATHER_API')
         self.base_url = "https://api.openweathermap.org/data/2.5"
+        # Per OpenWeatherMap request; a refresh makes two requests in sequence
+        self.request_timeout = float(os.getenv('WEATHER_REQUEST_TIMEOUT_SECONDS', '5'))
 
-        # Initialize Gemini AI
-        google_api_key = os.getenv('GOOGLE_API_KEY')
-        if google_api_key:
-            genai.configure(api_key=google_api_key)
-            self.genai_model = genai.GenerativeModel('gemini-1.5-flash')
-        else:
-            self.genai_model = None
+        # Gemini client shared by all services
+        self.llm = llm_client
 
     def get_coordinates(self, location_name):
         """Get coordinates for a location name (simplified - you might want to use a geocoding service)"""
@@ -81,7 +79,7 @@ class WeatherService:
                 "units": "metric"
             }
 
-            current_response = requests.get(current_url, params=current_params)
+            current_response = requests.get(current_url, params=current_params, timeout=self.request_timeout)
             current_response.raise_for_status()
             current_data = current_response.json()
 
@@ -94,7 +92,7 @@ class WeatherService:
                 "units": "metric"
             }
 
-            forecast_response = requests.get(forecast_url, params=forecast_params)
+            forecast_response = requests.get(forecast_url, params=forecast_params, timeout=self.request_timeout)
             forecast_response.raise_for_status()
             forecast_data = forecast_response.json()
 
@@ -160,27 +158,32 @@ class WeatherService:
             print(f"Error processing weather data: {e}")
             return None
 
-    def get_farming_weather_analysis(self, location, crop_type="maize"):
-        """Get AI-powered farming weather analysis"""
+    def get_farming_weather_analysis(self, location, crop_type="maize", stream=False):
+        """Get AI-powered farming weather analysis (an iterator of text chunks when stream=True)"""
         weather_data = self.get_current_weather(location)
 
-        if not weather_data or not self.genai_model:
+        if not weather_data or not self.llm.available:
             return "Weather analysis unavailable"
 
+        current = weather_data['current']
+        band = lambda field, value: prompt_canonicalizer.format('weather.farming_analysis', field, value)
+
         prompt = f"""
         As an agricultural weather expert, analyze the following weather data for {crop_type} farming in {location}:
 
         Current Weather:
-        - Temperature: {weather_data['current']['temperature']}°C
-        - Humidity: {weather_data['current']['humidity']}%
-        - Precipitation: {weather_data['current']['precipitation']}mm
-        - Wind Speed: {weather_data['current']['wind_speed']} km/h
+        - Temperature: {band('temperature', current['temperature'])}
+        - Humidity: {band('humidity', current['humidity'])}
+        - Precipitation: {band('precipitation', current['precipitation'])}
+        - Wind Speed: {band('wind_speed', current['wind_speed'])}
 
         7-Day Forecast:
         """
 
         for day in weather_data['daily_forecast']:
-            prompt += f"\n- {day['date']}: {day['temp_min']}-{day['temp_max']}°C, Precipitation: {day['precipitation']}mm"
+            prompt += (f"\n- {day['date']}: low {band('temperature', day['temp_min'])}, "
+                       f"high {band('temperature', day['temp_max'])}, "
+                       f"Precipitation: {band('precipitation', day['precipitation'])}")
 
         prompt += f"""
 
@@ -194,12 +197,37 @@ class WeatherService:
         Keep the response practical and actionable for farmers.
         """
 
+        fallback = lambda: self._fallback_weather_analysis(weather_data, crop_type)
+        if stream:
+            return self.llm.generate_stream(prompt, call_site='weather.farming_analysis', fallback=fallback)
         try:
-            response = self.genai_model.generate_content(prompt)
-            return response.text
+            return self.llm.generate(prompt, call_site='weather.farming_analysis', fallback=fallback)
+        except LLMBackpressure:
+            raise
         except Exception as e:
             return f"Unable to generate weather analysis: {str(e)}"
 
+    def _fallback_weather_analysis(self, weather_data, crop_type):
+        """Deterministic weather summary from the readings and alert rules, used when Gemini is down"""
+        current = weather_data['current']
+        forecast = weather_data['daily_forecast']
+        total_precipitation = round(sum(day['precipitation'] for day in forecast), 1)
+
+        conditions = [
+            f"Now: {current['temperature']}°C, humidity {current['humidity']}%, wind {current['wind_speed']} km/h",
+            f"Forecast precipitation over {len(forecast)} days: {total_precipitation}mm"
+        ]
+        if forecast:
+            conditions.append(f"Forecast temperatures: {min(day['temp_min'] for day in forecast)}°C to "
+                              f"{max(day['temp_max'] for day in forecast)}°C")
+
+        alerts = [alert['message'] for alert in self._build_alerts(weather_data)]
+        if not alerts:
+            alerts = [f"No weather alerts for {crop_type}; continue routine field work and monitoring."]
+
+        return fallback_text(f"Weather for {crop_type} in {weather_data.get('location', 'your area')}:",
+                             conditions, "Alerts and actions:", alerts)
+
     def get_weather_alerts(self, location, crop_type="maize"):
         """Get weather alerts and warnings for farming"""
         weather_data = self.get_current_weather(location)
@@ -207,6 +235,10 @@ class WeatherService:
         if not weather_data:
             return []
 
+        return self._build_alerts(weather_data)
+
+    def _build_alerts(self, weather_data):
+        """Alert rules applied to one weather reading and its forecast"""
         alerts = []
         current = weather_data['current']
         forecast = weather_data['daily_forecast']